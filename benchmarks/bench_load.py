@@ -0,0 +1,117 @@
+"""
+Compare the load time and peak memory of streaming a games JSON file
+against reading and parsing it in whole, for synthetic catalogs, and of
+streaming it into a GameCatalog's columns rather than a dict per game,
+and of mapping the binary catalog cache instead of parsing the JSON.
+
+Run with: python benchmarks/bench_load.py
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from game_randomizer.catalog import GameCatalog
+from game_randomizer.catalog_cache import CatalogCache
+from game_randomizer.loader import load_catalog
+
+
+def write_catalog(path, size, rng):
+    """
+    Write a games JSON file with size made up games.
+    """
+    games = {}
+    for i in range(size):
+        games['Game %d' % (i)] = {
+            'pack': 'Pack %d' % (i % 20),
+            'players': rng.randint(2, 10),
+            'description': 'A made up game for benchmarking, number %d.' %
+                           (i),
+            'image': 'Game%d.png' % (i),
+            'weight': rng.choice([0.5, 0.8, 1.0]),
+        }
+    settings = {'Title': 'Benchmark', 'Max_Players': 10,
+                'Default_Players': 4, 'Logo': 'logo.png',
+                'Pack_Label': '', 'Image_Directory': 'benchmark'}
+    with open(path, 'w') as f:
+        json.dump({'Settings': settings, 'Games': games}, f, indent=4)
+
+
+def load_whole(path):
+    """
+    Load a games JSON file the way Randomizer.load_info used to.
+    """
+    with open(path) as f:
+        results = json.loads(f.read())
+    return results['Games'], results['Settings']
+
+
+def load_columns(path):
+    """
+    Load a games JSON file into a GameCatalog, as Randomizer.load_info
+    does.
+    """
+    return load_catalog(path, games=GameCatalog())
+
+
+def load_cached(path):
+    """
+    Map a games catalog from its binary cache, kept alongside it here, as
+    Randomizer.load_info does once the cache has been written.
+    """
+    return CatalogCache(path, os.path.dirname(path)).load()
+
+
+def measure(loader, path):
+    """
+    Returns the seconds taken by a loader and its peak traced memory in
+    bytes, timing and tracing separate runs so tracing doesn't skew the
+    time.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    loader(path)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    loader(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    """
+    Print the load time and peak memory of each loader for catalogs from
+    10^3 to 10^5 games.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--max-exponent', type=int, default=5,
+                        help='Largest catalog size as a power of ten.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    loaders = [('whole', load_whole), ('stream', load_catalog),
+               ('columns', load_columns), ('cached', load_cached)]
+    print('%10s %10s' % ('games', 'file MB') + ''.join(
+        ' %11s %11s' % (name + ' s', name + ' MB') for name, f in loaders))
+    with tempfile.TemporaryDirectory() as tmp:
+        for exponent in range(3, args.max_exponent + 1):
+            size = 10 ** exponent
+            path = os.path.join(tmp, 'games_%d.json' % (size))
+            write_catalog(path, size, rng)
+            cache = CatalogCache(path, tmp)
+            source = cache.source()
+            cache.save(*load_columns(path), source)
+            line = '%10d %10.1f' % (size, os.path.getsize(path) / 1e6)
+            for name, loader in loaders:
+                elapsed, peak = measure(loader, path)
+                line += ' %11.3f %11.1f' % (elapsed, peak / 1e6)
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark the per-pick cost of the weighted sampler as the catalog grows.
+
+Run with: python benchmarks/bench_sampler.py
+"""
+import argparse
+import random
+import time
+from game_randomizer.sampler import WeightedSampler
+
+
+def bench_sampler(size, picks, rng):
+    """
+    Returns the average seconds per pick using the weighted sampler.
+    """
+    weights = [rng.choice([0.5, 0.8, 1.0]) for i in range(size)]
+    occurrences = [rng.randint(0, 5) for i in range(size)]
+    sampler = WeightedSampler(weights, occurrences)
+    start = time.perf_counter()
+    for i in range(picks):
+        index = sampler.sample(rng=rng)
+        sampler.increment(index)
+        sampler.remove(index)
+        sampler.restore(index)
+    return (time.perf_counter() - start) / picks
+
+
+def bench_rebuild(size, picks, rng):
+    """
+    Returns the average seconds per pick rebuilding the weights every
+    pick, as pick_game used to.
+    """
+    weights = [rng.choice([0.5, 0.8, 1.0]) for i in range(size)]
+    occurrences = [rng.randint(0, 5) for i in range(size)]
+    population = list(range(size))
+    start = time.perf_counter()
+    for i in range(picks):
+        max_occurrence = max(occurrences)
+        current = [w * (max_occurrence + 1 - o)
+                   for w, o in zip(weights, occurrences)]
+        index = rng.choices(population=population, weights=current)[0]
+        occurrences[index] += 1
+    return (time.perf_counter() - start) / picks
+
+
+def main():
+    """
+    Print the per-pick cost for catalogs from 10^2 to 10^6 games.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--picks', type=int, default=10000,
+                        help='Picks to time per catalog size.')
+    parser.add_argument('--max-exponent', type=int, default=6,
+                        help='Largest catalog size as a power of ten.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    print('%10s %16s %16s' % ('games', 'sampler us/pick', 'rebuild us/pick'))
+    for exponent in range(2, args.max_exponent + 1):
+        size = 10 ** exponent
+        sampler = bench_sampler(size, args.picks, rng)
+        # The old approach is O(N) per pick, so keep its run short.
+        rebuild = bench_rebuild(size, max(1, args.picks // size * 10), rng)
+        print('%10d %16.2f %16.2f' % (size, sampler * 1e6, rebuild * 1e6))
+
+
+if __name__ == '__main__':
+    main()
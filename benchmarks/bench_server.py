@@ -0,0 +1,129 @@
+"""
+Load test the HTTP server with many keep-alive clients, reporting the
+p50/p99 latency and requests per second of each endpoint.
+
+Run with: python benchmarks/bench_server.py jackbox_games --clients 50
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+import tempfile
+import time
+from urllib.parse import urlsplit
+from game_randomizer.server import HTTPClient
+
+
+def run_server(games, stats_dir, ports):
+    """
+    Serve a games list on a free port in this process, sending the port
+    back on the ports queue.
+    """
+    from game_randomizer.app import Randomizer
+    from game_randomizer.server import RandomizerServer
+    randomizer = Randomizer(games, flush_every=None, flush_interval=1.0,
+                            stats_dir=stats_dir)
+    service = RandomizerServer(randomizer, port=0)
+
+    async def serve():
+        await service.start()
+        ports.put(service.port)
+        await service.serve_forever()
+    asyncio.run(serve())
+
+
+def percentile(times, p):
+    """
+    Returns a percentile of the sorted times.
+    """
+    return times[min(int(len(times) * p / 100), len(times) - 1)]
+
+
+async def load(host, port, clients, requests, players, pick_share, seed):
+    """
+    Returns each endpoint's request latencies and the total seconds taken,
+    from clients sending requests each as fast as they can.
+    """
+    latencies = {}
+
+    async def client_run(n):
+        rng = random.Random('%s:%s' % (seed, n))
+        client = HTTPClient(host, port)
+        await client.connect()
+        for i in range(requests):
+            if rng.random() < pick_share:
+                method, target = 'POST', '/pick?players=%d' % (players)
+            else:
+                method, target = 'GET', rng.choice(['/stats', '/settings'])
+            start = time.perf_counter()
+            status, data = await client.request(method, target)
+            elapsed = time.perf_counter() - start
+            if status != 200:
+                raise RuntimeError('%s %s failed: %s' % (method, target,
+                                                         data))
+            latencies.setdefault(urlsplit(target).path, []).append(elapsed)
+        await client.close()
+    start = time.perf_counter()
+    await asyncio.gather(*(client_run(n) for n in range(clients)))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    """
+    Run the load test and print the latencies and throughput.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('games_json', type=str, nargs='?',
+                        default='jackbox_games')
+    parser.add_argument('--url', default=None,
+                        help='Test a running server, rather than starting ' +
+                             'one.')
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=500,
+                        help='Requests per client.')
+    parser.add_argument('-p', '--players', type=int, default=4)
+    parser.add_argument('--pick-share', type=float, default=0.5,
+                        help='Share of requests that are picks, the rest ' +
+                             'read the stats or settings.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    process = None
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url is None:
+            ports = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=run_server, args=(args.games_json, tmp, ports),
+                daemon=True)
+            process.start()
+            host, port = '127.0.0.1', ports.get(timeout=60)
+        else:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        try:
+            latencies, elapsed = asyncio.run(load(
+                host, port, args.clients, args.requests, args.players,
+                args.pick_share, args.seed))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.join()
+    total = sum(len(t) for t in latencies.values())
+    print('%-10s %10s %10s %10s' % ('endpoint', 'requests', 'p50 ms',
+                                    'p99 ms'))
+    everything = []
+    for path, times in sorted(latencies.items()):
+        times.sort()
+        everything.extend(times)
+        print('%-10s %10d %10.3f %10.3f' % (path, len(times),
+                                            percentile(times, 50) * 1000,
+                                            percentile(times, 99) * 1000))
+    everything.sort()
+    print('%-10s %10d %10.3f %10.3f' % ('all', total,
+                                        percentile(everything, 50) * 1000,
+                                        percentile(everything, 99) * 1000))
+    print('%d requests in %.2fs from %d clients: %.0f requests/s' % (
+        total, elapsed, args.clients, total / elapsed))
+
+
+if __name__ == '__main__':
+    main()
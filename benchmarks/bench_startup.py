@@ -0,0 +1,60 @@
+"""
+Measure the import time of the CLI entry point with python -X importtime
+and check it against a startup budget.
+
+Run with: python benchmarks/bench_startup.py
+"""
+import argparse
+import subprocess
+import sys
+
+# Modules the CLI should never load.
+GUI_MODULES = ['tkinter', 'PIL']
+
+CHECK = ('import sys; import game_randomizer.app; '
+         'print(",".join(m for m in %r if m in sys.modules))' % (GUI_MODULES,))
+
+
+def import_time(module):
+    """
+    Returns the cumulative import time of a module in microseconds, and
+    any GUI modules it loaded.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHECK],
+                            capture_output=True, text=True, check=True)
+    total = None
+    for line in result.stderr.splitlines():
+        # Lines look like: import time: self | cumulative | name
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            total = int(parts[1].strip())
+    loaded = [m for m in result.stdout.strip().split(',') if m]
+    return total, loaded
+
+
+def main():
+    """
+    Print the best of several import times and fail if over budget.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--runs', type=int, default=5,
+                        help='Number of imports to time.')
+    parser.add_argument('--budget-ms', type=float, default=50,
+                        help='Fail if the best import time is over this.')
+    args = parser.parse_args()
+    times = []
+    for i in range(args.runs):
+        total, loaded = import_time('game_randomizer.app')
+        times.append(total)
+        if loaded:
+            sys.exit('game_randomizer.app loaded GUI modules: %s' %
+                     (', '.join(loaded)))
+    best = min(times) / 1000
+    print('game_randomizer.app import: best %.1fms, worst %.1fms, '
+          'budget %.1fms' % (best, max(times) / 1000, args.budget_ms))
+    if best > args.budget_ms:
+        sys.exit('Import time is over budget.')
+
+
+if __name__ == '__main__':
+    main()
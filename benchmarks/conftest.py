@@ -0,0 +1,89 @@
+"""
+Fixtures for the pytest-benchmark suite: synthetic games lists of each
+size, written to the package assets for Randomizer to load.
+
+Run with: python -m pytest benchmarks
+The results are saved under .benchmarks/ for comparing runs with
+--benchmark-compare, unless --benchmark-json is given.
+"""
+import json
+import os
+import random
+import pytest
+from game_randomizer.resources import asset_path
+
+# Catalog sizes benchmarked by default.
+SIZES = '10,1000,100000,1000000'
+
+
+def pytest_addoption(parser):
+    parser.addoption('--catalog-sizes', default=SIZES,
+                     help='Comma separated numbers of games to benchmark '
+                          'with, default %s.' % (SIZES))
+
+
+def pytest_configure(config):
+    # Keep every run's results so regressions can be tracked.
+    if config.pluginmanager.hasplugin('benchmark') and \
+            not config.getoption('benchmark_json') and \
+            not config.getoption('benchmark_autosave'):
+        from pytest_benchmark.utils import get_tag
+        config.option.benchmark_autosave = get_tag()
+
+
+def pytest_generate_tests(metafunc):
+    if 'catalog_size' in metafunc.fixturenames:
+        sizes = [int(s) for s in
+                 metafunc.config.getoption('catalog_sizes').split(',')]
+        metafunc.parametrize('catalog_size', sizes, scope='session')
+
+
+def write_games(path, size, seed=0):
+    """
+    Write a games JSON file with size made up games, a game at a time so
+    the biggest lists don't need building in memory.
+    """
+    rng = random.Random(seed)
+    settings = {'Title': 'Benchmark', 'Max_Players': 10,
+                'Default_Players': 4, 'Logo': 'logo.png',
+                'Pack_Label': '', 'Image_Directory': 'benchmark'}
+    tags = ['drawing', 'trivia', 'words', 'bluffing', 'teams']
+    with open(path, 'w') as f:
+        f.write('{"Settings": %s, "Games": {' % (json.dumps(settings)))
+        for i in range(size):
+            most = rng.randint(2, 10)
+            info = {'pack': 'Pack %d' % (i % 20),
+                    'min_players': rng.randint(1, most),
+                    'max_players': most,
+                    'description': 'A made up game for benchmarking, '
+                                   'number %d.' % (i),
+                    'image': 'Game%d.png' % (i),
+                    'weight': rng.choice([0.5, 0.8, 1.0]),
+                    'tags': rng.sample(tags, 2),
+                    'duration': rng.choice([10, 15, 20, 30, 45])}
+            f.write('%s%s: %s' % (', ' if i else '', json.dumps('Game %d' %
+                                                                (i)),
+                                  json.dumps(info)))
+        f.write('}}')
+
+
+@pytest.fixture(scope='session')
+def games_list(catalog_size):
+    """
+    Returns the name of a synthetic games list with catalog_size games,
+    removing it after the run. Its caches are kept with each test's
+    stats.
+    """
+    name = 'benchmark_%d' % (catalog_size)
+    path = asset_path(name + '.json')
+    write_games(path, catalog_size)
+    yield name
+    os.remove(path)
+
+
+@pytest.fixture
+def stats_dir(tmp_path):
+    """
+    Returns an empty directory for the stats files.
+    """
+    return str(tmp_path)
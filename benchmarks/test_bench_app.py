@@ -0,0 +1,97 @@
+"""
+Benchmarks of loading a games list, picking games and saving the stats
+with the synthetic catalogs.
+"""
+import pytest
+from game_randomizer.app import Randomizer
+
+pytest.importorskip('pytest_benchmark')
+
+
+def rounds(size, budget=1000000):
+    """
+    Returns how many rounds to time for a catalog size, fewer for the
+    bigger catalogs so a run stays within a few minutes.
+    """
+    return max(1, min(20, budget // size))
+
+
+def test_init_parse(benchmark, games_list, catalog_size, stats_dir):
+    """
+    Randomizer start up, parsing the games JSON file.
+    """
+    benchmark.pedantic(Randomizer, args=(games_list,),
+                       kwargs={'stats_dir': stats_dir,
+                               'cache_catalog': False},
+                       rounds=rounds(catalog_size))
+
+
+def test_init_cached(benchmark, games_list, catalog_size, stats_dir):
+    """
+    Randomizer start up, mapping the games cache.
+    """
+    # The first load writes the cache.
+    Randomizer(games_list, stats_dir=stats_dir)
+    benchmark.pedantic(Randomizer, args=(games_list,),
+                       kwargs={'stats_dir': stats_dir},
+                       rounds=rounds(catalog_size))
+
+
+def test_load_info(benchmark, games_list, catalog_size, stats_dir):
+    """
+    Loading the games on their own, from the cache.
+    """
+    randomizer = Randomizer(games_list, stats_dir=stats_dir)
+    benchmark.pedantic(randomizer.load_info, args=(games_list,),
+                       rounds=rounds(catalog_size))
+
+
+@pytest.mark.parametrize('backend', ['json', 'journal', 'sqlite'])
+def test_load_stats(benchmark, games_list, catalog_size, stats_dir,
+                    backend):
+    """
+    Loading the play counts of every game.
+    """
+    randomizer = Randomizer(games_list, stats_dir=stats_dir,
+                            stats_backend=backend)
+    randomizer.pick_game(4, None)
+    benchmark.pedantic(randomizer.load_stats, rounds=rounds(catalog_size))
+
+
+def test_pick(benchmark, games_list, stats_dir):
+    """
+    Sustained picks with saving the stats left to the end.
+    """
+    randomizer = Randomizer(games_list, stats_dir=stats_dir,
+                            flush_every=None)
+    benchmark(randomizer.pick_game, 4, None)
+    # Don't save the picks at exit.
+    randomizer.pending_picks.clear()
+
+
+@pytest.mark.parametrize('backend', ['json', 'journal', 'sqlite'])
+def test_pick_persist(benchmark, games_list, catalog_size, stats_dir,
+                      backend):
+    """
+    Picks saving the stats after every pick.
+    """
+    randomizer = Randomizer(games_list, stats_dir=stats_dir,
+                            stats_backend=backend)
+    benchmark.pedantic(randomizer.pick_game, args=(4, None),
+                       rounds=rounds(catalog_size, 10 ** 7), iterations=1)
+
+
+@pytest.mark.parametrize('backend', ['json', 'journal', 'sqlite'])
+def test_save_stats(benchmark, games_list, catalog_size, stats_dir,
+                    backend):
+    """
+    Saving one pick's stats.
+    """
+    randomizer = Randomizer(games_list, stats_dir=stats_dir,
+                            stats_backend=backend, flush_every=None)
+
+    def pick():
+        randomizer.pick_game(4, None)
+        return (), {}
+    benchmark.pedantic(randomizer.flush, setup=pick,
+                       rounds=rounds(catalog_size, 10 ** 7))
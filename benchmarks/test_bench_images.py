@@ -0,0 +1,50 @@
+"""
+Benchmarks of decoding and resizing the banner images.
+"""
+import os
+import pytest
+from game_randomizer.resources import asset_path
+
+pytest.importorskip('pytest_benchmark')
+images = pytest.importorskip('game_randomizer.images')
+
+# Banners from the Jackbox games list, a realistic mix of sizes.
+BANNER_DIR = asset_path('jackbox_games')
+BANNERS = 10
+
+
+@pytest.fixture(scope='module')
+def banners():
+    """
+    Returns the paths of the first few banners.
+    """
+    paths = sorted(os.path.join(BANNER_DIR, f) for f in os.listdir(BANNER_DIR)
+                   if f.endswith(('.jpg', '.png')))
+    return paths[:BANNERS]
+
+
+def test_decode_resize(benchmark, banners):
+    """
+    Decoding and resizing a set of banners, skipping the cache.
+    """
+    cache = images.ImageCache(wrap=lambda img: img)
+
+    def load_all():
+        for path in banners:
+            cache.load(path)
+    benchmark.extra_info['images'] = len(banners)
+    benchmark(load_all)
+
+
+def test_cached(benchmark, banners):
+    """
+    Fetching the same banners once they're cached.
+    """
+    cache = images.ImageCache(wrap=lambda img: img)
+
+    def get_all():
+        for path in banners:
+            cache.get(path)
+    get_all()
+    benchmark.extra_info['images'] = len(banners)
+    benchmark(get_all)
@@ -37,11 +37,19 @@ setuptools.setup(
         'test': [
             'pytest',
         ],
+        'sim': [
+            'numpy',
+        ],
+        'bench': [
+            'pytest',
+            'pytest-benchmark',
+        ],
     },
     entry_points={
         "console_scripts": [
             "game_randomizer=game_randomizer.app:gui_app",
             "game_randomizer_cli=game_randomizer.app:cli_app",
+            "game_randomizer_server=game_randomizer.server:main",
         ],
     },
 )
@@ -1,144 +1,460 @@
 import os
-import random
 import argparse
-import json
-from .gui import RandomGUI, JSONGUI
+import random
+import threading
+from .catalog_cache import load_games
 from .cli import CLI
-from pkg_resources import resource_filename
+from .discovery import CatalogIndex
+from .filters import AttributeIndex, FilteredIndex, Query
+from .resources import catalog_path
+from .index import PlayerIndex, order_games
+from .profiling import enable_from_env, profiler
+from .stats import BACKENDS, WriteBehind, stats_path
+from .strategies import STRATEGIES
+from .watcher import CatalogWatcher, diff_games, index_changed
 
 
 class Randomizer(object):
     """
     Randomizer class to handle the random game selection.
     """
-    def __init__(self, games, verbose=False):
+    def __init__(self, games, verbose=False, flush_every=1,
+                 flush_interval=None, stats_backend='json', stats_dir=None,
+                 strategy='reverse_occurrence', cache_catalog=True):
         """
         Set up our variables and load the games json file.
+
+        Stats are written after every flush_every picks and no more than
+        flush_interval seconds after an unsaved pick. Set both to None to
+        only write them on flush() and at exit.
+
+        strategy picks the games, given as a name from STRATEGIES or a
+        Strategy subclass.
+
+        With cache_catalog, the games are kept in a binary cache after the
+        first load, which later loads map instead of parsing the JSON.
         """
         self.verbose = verbose
+        if isinstance(strategy, str):
+            strategy = STRATEGIES[strategy]
+        self.strategy_class = strategy
+        self.strategy = None
+        # Filter on the games' attributes, if any.
+        self.query = None
+        # Picks are saved to the stats file behind the picks.
+        self.write_behind = WriteBehind(self.save_stats, flush_every,
+                                        flush_interval)
+        self.pick_lock = threading.Lock()
+        # Picks made so far, to see if any were made while the pick index
+        # was being rebuilt.
+        self.pick_count = 0
+        self.max_occurrence = 0
+        # Store stats based on json filename, in the home directory by
+        # default.
+        self.stats_file = stats_path(games, stats_dir)
+        # Keep the games cache here if the assets can't be written to.
+        self.cache_dir = os.path.join(os.path.dirname(self.stats_file),
+                                      'cache') if cache_catalog else None
+        self.stats_store = BACKENDS[stats_backend](self.stats_file,
+                                                  verbose=verbose)
+        # The games list name, and the file it's found in.
+        self.games = games
+        self.json_path = catalog_path(games)
         # Load the games from the json file.
-        self.game_info, self.game_settings = self.load_info(games)
-        self.played_games = []
-        # Store stats based on json filename
-        stats_filename = '%s_stats.json' % (games)
-        # Set the stats file in the home directory.
-        self.stats_file = os.path.join(os.path.expanduser('~'),
-                                       '.game_randomizer', stats_filename)
-        self.game_stats = self.load_stats()
+        with profiler.timer('load'):
+            self.game_info, self.game_settings = self.load_info(games)
+        with profiler.timer('load.stats'):
+            self.game_stats = self.load_stats()
+        # Build the lookup structures used when picking games.
+        with profiler.timer('index'):
+            self.build_index()
 
     def load_info(self, games):
         """
         Loads the games data from the JSON file.
         """
-        # Figure out the path based on the current environment.
-        json_path = resource_filename('game_randomizer',
-                                      os.path.join(
-                                          'assets',
-                                          f'{games}.json'))
+        # Find the file in the games list folders.
+        json_path = catalog_path(games)
         if self.verbose:
             print(f'Loading games from { json_path }')
-        # Open the file, parse the games/settings.
-        with open(json_path) as f:
-            results = json.loads(f.read())
-        # Return the games and settings.
-        return results['Games'], results['Settings']
+        # Use the stats backend's copy of the games if it keeps one.
+        catalog = self.stats_store.load_catalog(json_path)
+        if catalog is not None:
+            return catalog
+        return load_games(json_path, self.cache_dir, self.verbose)
+
+    def reload(self):
+        """
+        Load the games from the JSON file again, after it's been edited.
+        New games start with no plays and removed games keep their stats.
+        The pick index is only rebuilt if games were added or removed or
+        their players or weight changed. Returns the names of the games
+        (added, removed, changed).
+        """
+        if self.stats_store.LIVE_CATALOG:
+            # The SQLite backend's games table shows the new games as soon
+            # as they're synced, so picks and reads wait for the load too.
+            with self.pick_lock:
+                old, games, settings = self.reload_info()
+                update = self.prepare_games(old, games,
+                                            self.stats_snapshot())
+                changes = self.swap_games(games, settings, *update)
+        else:
+            # Parse the file and build any new index before taking the
+            # lock, so picks carry on with the old games meanwhile.
+            old, games, settings = self.reload_info()
+            with self.pick_lock:
+                snapshot = self.stats_snapshot()
+            update = self.prepare_games(old, games, snapshot)
+            with self.pick_lock:
+                changes = self.swap_games(games, settings, *update)
+        added, removed, changed = changes
+        if self.verbose:
+            print('Reloaded %s: %s added, %s removed, %s changed.' % (
+                self.json_path, len(added), len(removed), len(changed)))
+        return changes
+
+    def reload_info(self):
+        """
+        Returns a copy of the current games, and the games and settings
+        loaded from the JSON file again.
+        """
+        # Copy the current games, as the SQLite backend's games table
+        # shows the new games once it's synced.
+        old = {name: dict(info) for name, info in self.game_info.items()}
+        with profiler.timer('reload'):
+            games, settings = self.load_info(self.games)
+        return old, games, settings
+
+    def prepare_games(self, old, games, snapshot):
+        """
+        Returns the names of the games (added, removed, changed) between
+        two games lists, and the pick structures for the new games if the
+        index needs rebuilding, or else None.
+        """
+        added, removed, changed = diff_games(old, games)
+        built = None
+        if added or removed or index_changed(old, games, changed):
+            built = self.index_games(games, snapshot)
+        return (added, removed, changed), built
+
+    def swap_games(self, games, settings, changes, built):
+        """
+        Swap in reloaded games and any pick structures built for them.
+        Returns the changes. Call with the pick lock held, so a pick or a
+        read sees either the old games or the new ones and never a mix.
+        """
+        added, removed, changed = changes
+        self.game_info, self.game_settings = games, settings
+        for g in added:
+            self.game_stats.setdefault(g, 0)
+        if built is not None:
+            self.publish_index(built)
+        elif changed:
+            # Only the descriptions, images or filter attributes changed,
+            # so the order and weights stay as they are.
+            self.attributes = None
+            self.apply_filter(self.query)
+        return changes
+
+    def watch(self, interval=1.0, on_reload=None):
+        """
+        Reload the games whenever the JSON file changes, checking every
+        interval seconds on a background thread. Returns the started
+        CatalogWatcher.
+        """
+        watcher = CatalogWatcher(self, interval, on_reload)
+        watcher.start()
+        return watcher
 
     def load_stats(self):
         """
-        Loads the data from the stats JSON file.
-        """
-        # Try to open our stats file.
-        try:
-            with open(self.stats_file) as f:
-                results = json.loads(f.read())
-            # Update the stats to add new games.
-            for g in self.game_info.keys():
-                if g not in results:
-                    results[g] = 0
-        # Create a new stats file if it doesn't exist.
-        except FileNotFoundError:
-            if self.verbose:
-                print('No stats file, creating new.')
-            # Set up new stats
-            results = {}
-            for g in self.game_info.keys():
+        Loads the data from the stats backend.
+        """
+        results = self.stats_store.load()
+        # Update the stats to add new games.
+        for g in self.game_info.keys():
+            if g not in results:
                 results[g] = 0
         return results
 
-    def save_stats(self):
+    def save_stats(self, picks):
         """
         Save the game occurence stats to a file so we can track them between
-        sessions.
+        sessions, along with the picks made since the last save.
         """
-        # Ensure the directory exists.
-        if not os.path.isdir(os.path.dirname(self.stats_file)):
-            os.makedirs(os.path.dirname(self.stats_file))
-        # Write out the stats
-        with open(self.stats_file, 'w') as f:
-            f.write(json.dumps(self.game_stats, indent=4))
+        if self.verbose:
+            print('Saving stats for %s picks.' % (len(picks)))
+        # Copy the counts under the pick lock, as picks and reloads
+        # change them on other threads.
+        stats = self.view_stats()
+        with profiler.timer('persist'):
+            self.stats_store.save(stats, picks)
+        profiler.count('persist.picks', len(picks))
+
+    @property
+    def pending_picks(self):
+        """
+        The picks that haven't been saved yet.
+        """
+        return self.write_behind.pending_picks
+
+    @property
+    def flush_timer(self):
+        """
+        The timer saving the unsaved picks, if one is running.
+        """
+        return self.write_behind.timer
+
+    def pick_history(self):
+        """
+        Returns the picks recorded by the stats backend, if it keeps them.
+        """
+        self.flush()
+        return self.stats_store.history()
+
+    def flush(self):
+        """
+        Write out any picks that haven't been saved yet.
+        """
+        self.write_behind.flush()
+
+    def close(self):
+        """
+        Save any unsaved picks and stop watching for the exit.
+        """
+        self.write_behind.close()
+
+    def record_pick(self, game, player_count):
+        """
+        Note an unsaved pick, flushing the stats once the write-behind
+        limits are reached.
+        """
+        self.write_behind.record(game, player_count)
+
+    def build_index(self):
+        """
+        Precompute the structures pick_game uses, so a roll doesn't need to
+        rescan the whole games list.
+        """
+        with self.pick_lock:
+            snapshot = self.stats_snapshot()
+        built = self.index_games(self.game_info, snapshot)
+        with self.pick_lock:
+            self.publish_index(built)
+
+    def stats_snapshot(self):
+        """
+        Returns a copy of the play counts, the number of picks made so far
+        and the filter, to build the pick structures from. Call with the
+        pick lock held.
+        """
+        return dict(self.game_stats), self.pick_count, self.query
+
+    def index_games(self, games, snapshot):
+        """
+        Returns the pick structures for a games list, built from a
+        stats_snapshot() without touching the ones in use: the games in
+        pick order, the PlayerIndex over them, their positions, the
+        strategy, the attribute bitsets if a filter is set, the most
+        occurrences and the snapshot.
+        """
+        stats, pick_count, query = snapshot
+        # Order the games by supported players, most first, so the games
+        # with enough room for any player count are a prefix of the list.
+        entries = order_games(games)
+        games_by_players = [g for g, fewest, most, weight in entries]
+        index = PlayerIndex([most for g, fewest, most, weight in entries],
+                            [fewest for g, fewest, most, weight in entries])
+        # Map each game to its position in the index.
+        game_ids = {g: i for i, g in enumerate(games_by_players)}
+        # The occurrence count of the most played game, including games
+        # since removed from the list.
+        max_occurrence = max(stats.values(), default=0)
+        # Set up the strategy over the games in the same order.
+        strategy = self.strategy_class(
+            index,
+            [weight for g, fewest, most, weight in entries],
+            [stats.get(g, 0) for g in games_by_players],
+            max_occurrence)
+        # The attribute bitsets are only built once a filter is used.
+        attributes = None
+        if query:
+            attributes = AttributeIndex(games.items(), game_ids)
+            strategy.set_index(FilteredIndex(index, attributes.mask(query)))
+        return (games_by_players, index, game_ids, strategy, attributes,
+                max_occurrence, snapshot)
+
+    def publish_index(self, built):
+        """
+        Swap in pick structures from index_games(), catching them up with
+        the picks and filter changes made while they were built. Call with
+        the pick lock held.
+        """
+        (games_by_players, index, game_ids, strategy, attributes,
+         max_occurrence, (stats, pick_count, query)) = built
+        # Keep the games played this session, as they can't be picked
+        # again.
+        if self.strategy is not None:
+            played = [self.games_by_players[i] for i in self.strategy.played]
+            strategy.set_played([game_ids[g] for g in played
+                                 if g in game_ids])
+        # Count any picks made since the snapshot.
+        if pick_count != self.pick_count and \
+                'occurrences' in strategy.UPDATES:
+            for g, i in game_ids.items():
+                for n in range(self.game_stats.get(g, 0) - stats.get(g, 0)):
+                    strategy.occurred(i)
+        (self.games_by_players, self.index, self.game_ids, self.strategy,
+         self.attributes) = (games_by_players, index, game_ids, strategy,
+                             attributes)
+        # Picks since the snapshot only ever raise the most occurrences.
+        self.max_occurrence = max(self.max_occurrence, max_occurrence)
+        if query != self.query:
+            self.apply_filter(self.query)
+
+    def attribute_index(self):
+        """
+        Returns the bitsets of the games with each attribute, building them
+        the first time.
+        """
+        with self.pick_lock:
+            return self.current_attributes()
+
+    def current_attributes(self):
+        """
+        Returns the attribute bitsets, building them if needed. Call with
+        the pick lock held.
+        """
+        if self.attributes is None:
+            self.attributes = AttributeIndex(self.game_info.items(),
+                                             self.game_ids)
+        return self.attributes
+
+    def set_filter(self, query):
+        """
+        Only pick games matching a Query, or any game if it's None.
+        """
+        with self.pick_lock:
+            self.apply_filter(query)
+
+    def apply_filter(self, query):
+        """
+        Point the strategy at the games matching a Query. Call with the
+        pick lock held.
+        """
+        self.query = query
+        if query:
+            mask = self.current_attributes().mask(query)
+            self.strategy.set_index(FilteredIndex(self.index, mask))
+        else:
+            self.strategy.set_index(self.index)
+
+    @property
+    def played_games(self):
+        """
+        The games played this session.
+        """
+        with self.pick_lock:
+            return {self.games_by_players[i] for i in self.strategy.played}
+
+    def eligible_count(self, player_count):
+        """
+        Returns the number of games that support the given number of
+        players and match the filter.
+        """
+        with self.pick_lock:
+            return self.strategy.index.eligible_count(player_count)
+
+    def eligible_games(self, player_count):
+        """
+        Returns the games that support the given number of players and
+        match the filter.
+        """
+        with self.pick_lock:
+            return [self.games_by_players[i]
+                    for i in self.strategy.index.eligible(player_count)]
+
+    def player_counts(self):
+        """
+        Returns the player counts supported by at least one game. Lists
+        where no game gives a minimum only offer 2 up to Max_Players, as
+        they always have.
+        """
+        with self.pick_lock:
+            counts = self.index.player_counts()
+            if not any(fewest > 1 for fewest in self.index.min_players):
+                most = self.game_settings.get('Max_Players',
+                                              max(counts, default=0))
+                counts = [c for c in counts if 2 <= c <= most]
+        return counts
+
+    def reset_played(self):
+        """
+        Clear the games played this session so they can be picked again.
+        """
+        with self.pick_lock:
+            self.strategy.reset()
 
     def view_stats(self):
         """
         Return an up-to-date copy of the game played stats.
         """
-        return self.game_stats
+        with self.pick_lock:
+            return dict(self.game_stats)
 
     def settings(self):
         """
         Returns a copy of the settings from the JSON file.
         """
-        return self.game_settings
+        with self.pick_lock:
+            return self.game_settings
 
     def games_list(self):
         """
         Returns a list of games and their info.
         """
-        return self.game_info
+        with self.pick_lock:
+            return self.game_info
+
+    def snapshot_games(self, player_count=None):
+        """
+        Returns a copy of every game's info, or only of the games for a
+        number of players, all from the same version of the games list.
+        """
+        with self.pick_lock:
+            if player_count is None:
+                return {name: dict(info)
+                        for name, info in self.game_info.items()}
+            return {self.games_by_players[i]:
+                    dict(self.game_info[self.games_by_players[i]])
+                    for i in self.strategy.index.eligible(player_count)}
 
     def pick_game(self, player_count, prev_game):
         """
         Pick a game from a list of avialable games,
         then update the played stats.
         """
-        # Create a list to hold the games
-        games = []
-        # Another for the weights
-        weights = []
-        # Compute the maximum occurrence of all games.
-        max_occurrence = max([self.game_stats[g] for g in self.game_stats])
-        # Add games that allow for the current player count.
-        for g in self.game_info:
-            if (self.game_info[g]['players'] >= player_count and
-                    g not in self.played_games):
-                games.append(g)
-                # Rank games in reverse order of occurrence and
-                # according to preference.
-                reverse_occurrence = max_occurrence + 1 - self.game_stats[g]
-                weights.append(self.game_info[g]['weight'] *
-                               reverse_occurrence)
-        # Reset games played if we've gone through the entire list.
-        if len(games) < 1 and len(self.played_games) > 0:
-            # Reset games played
-            self.played_games = []
-            for g in self.game_info:
-                if (self.game_info[g]['players'] >= player_count and
-                        g not in self.played_games):
-                    games.append(g)
-                    # Rank games in reverse order of occurrence and
-                    # according to preference.
-                    reverse_occurrence = max_occurrence + 1 - \
-                        self.game_stats[g]
-                    weights.append(self.game_info[g]['weight'] *
-                                   reverse_occurrence)
-        # Pick the game
-        game = random.choices(population=games, weights=weights)[0]
-        # Update the states.
-        self.game_stats[game] += 1
-        self.played_games.append(game)
+        # Picks from several threads take turns, so the strategy and the
+        # stats are never seen half updated.
+        with profiler.timer('pick'), self.pick_lock:
+            # Let the strategy pick the game, by default ranked in reverse
+            # order of occurrence and according to preference.
+            index = self.strategy.pick(player_count)
+            game = self.games_by_players[index]
+            # Update the states.
+            self.game_stats[game] += 1
+            self.pick_count += 1
+            self.max_occurrence = max(self.max_occurrence,
+                                      self.game_stats[game])
+            if 'occurrences' in self.strategy.UPDATES:
+                self.strategy.occurred(index)
+            # Look the game up before a reload can swap the games.
+            info = self.game_info[game]
         # Save the occurrence data.
-        self.save_stats()
+        self.record_pick(game, player_count)
         # Return the game and its info.
-        return game, self.game_info[game]
+        return game, info
 
 
 def cli_app():
@@ -150,21 +466,110 @@ def cli_app():
     parser.add_argument('-v', '--verbose', default=False,
                         help='Enable verbose output.', action='store_true')
     parser.add_argument('games_json', type=str,
-                        choices=['boardgames', 'jackbox_games', 'unit_tests'],
+                        choices=CatalogIndex().names(),
                         help='The name of the JSON file ' +
                              'containing the games information.')
+    parser.add_argument('--flush-every', type=int, default=1, metavar='N',
+                        help='Save the stats after every N picks.')
+    parser.add_argument('--flush-interval', type=float, default=None,
+                        metavar='SECONDS',
+                        help='Save unsaved picks after at most this many ' +
+                             'seconds.')
+    parser.add_argument('--stats-backend', default='json',
+                        choices=sorted(BACKENDS),
+                        help='How to store the play stats: a JSON map ' +
+                             'rewritten on save, a journal of picks, or a ' +
+                             'SQLite database also holding the games.')
+    parser.add_argument('--strategy', default='reverse_occurrence',
+                        choices=sorted(STRATEGIES),
+                        help='How to pick the games, by default favouring ' +
+                             'the least played.')
+    parser.add_argument('-p', '--players', type=int, default=None,
+                        help='The number of players, instead of prompting.')
+    parser.add_argument('-n', '--count', type=int, default=None,
+                        help='Pick this many games without prompting, ' +
+                             'then exit.')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed the random picks, for repeatable runs.')
+    parser.add_argument('--pack', action='append', default=None,
+                        help='Only pick games from this pack, can be ' +
+                             'given more than once.')
+    parser.add_argument('--tag', action='append', default=None,
+                        help='Only pick games with this tag, can be given ' +
+                             'more than once.')
+    parser.add_argument('--max-duration', type=int, default=None,
+                        metavar='MINUTES',
+                        help='Only pick games taking at most this long.')
+    parser.add_argument('--min-duration', type=int, default=None,
+                        metavar='MINUTES',
+                        help='Only pick games taking at least this long.')
+    parser.add_argument('--format', default='ndjson',
+                        choices=CLI.BATCH_FORMATS,
+                        help='Output format for the --count picks.')
+    parser.add_argument('--profile', default=False, action='store_true',
+                        help='Print the time spent loading, picking and ' +
+                             'saving at exit.')
+    parser.add_argument('--profile-json', default=None, metavar='PATH',
+                        help='Also write the profile summary to a JSON ' +
+                             'file.')
+    parser.add_argument('--cprofile', default=None, metavar='PATH',
+                        help='Save a cProfile of the whole run, for ' +
+                             'pstats or snakeviz.')
+    parser.add_argument('--watch', type=float, nargs='?', const=1.0,
+                        default=None, metavar='SECONDS',
+                        help='Reload the games list when the JSON file ' +
+                             'is edited, checking every SECONDS (1 by ' +
+                             'default).')
     args = parser.parse_args()
+    # Profiling can also be turned on from the environment.
+    if args.profile or args.profile_json or args.cprofile:
+        profiler.enable(args.profile_json, args.cprofile)
+    else:
+        enable_from_env()
+    if args.count is not None and args.players is None:
+        parser.error('--count requires --players')
+    if args.seed is not None:
+        random.seed(args.seed)
+    # Batch picks only save the stats once they're all done.
+    if args.count is not None:
+        args.flush_every = None
+        args.flush_interval = None
     # Create instance with game data.
-    randomizer = Randomizer(args.games_json, args.verbose)
+    randomizer = Randomizer(args.games_json, args.verbose,
+                            flush_every=args.flush_every,
+                            flush_interval=args.flush_interval,
+                            stats_backend=args.stats_backend,
+                            strategy=args.strategy)
+    query = Query(args.pack, args.tag, args.max_duration, args.min_duration)
+    if query:
+        randomizer.set_filter(query)
+    # Stop here rather than failing on the first pick.
+    if args.players is not None and \
+            not randomizer.eligible_count(args.players):
+        if query:
+            parser.error('No games match the filters for %s players.' %
+                         (args.players))
+        parser.error('No games support %s players.' % (args.players))
+    if args.watch is not None:
+        randomizer.watch(args.watch)
     # CLI version
     p = CLI(randomizer, args.verbose)
-    p()
+    p.players = args.players
+    if args.count is not None:
+        p.batch(args.count, args.format)
+        randomizer.flush()
+    else:
+        p()
 
 
 def gui_app():
     """
     Main App.
     """
+    # Only load tkinter and PIL when the GUI is used.
+    from .gui import RandomGUI, JSONGUI
+    # The GUI takes no options, so profiling is set from the environment.
+    enable_from_env()
     # Prompt for JSON
     j = JSONGUI()
     games_json = j()
@@ -0,0 +1,235 @@
+import sys
+from array import array
+from collections.abc import Mapping, MutableMapping
+from .index import player_range
+
+
+class StringColumn(object):
+    """
+    Column of strings stored end to end as UTF-8 in one buffer, rather
+    than as a str object each. Strings are only decoded when read.
+
+    The buffers can also be read-only views, such as of a mapped cache
+    file, in which case they're copied the first time the column changes.
+    """
+    def __init__(self, data=None, offsets=None):
+        """
+        Set up the column over existing buffers, or an empty one.
+        """
+        self.data = bytearray() if data is None else data
+        self.offsets = array('Q', [0]) if offsets is None else offsets
+        # Strings replaced since they were added, by row.
+        self.changed = {}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        if row in self.changed:
+            return self.changed[row]
+        if row < 0:
+            row += len(self)
+        return str(self.data[self.offsets[row]:self.offsets[row + 1]],
+                   'utf-8')
+
+    def __setitem__(self, row, value):
+        self.changed[row] = value
+
+    def own(self):
+        """
+        Copy read-only buffers so the column can be added to.
+        """
+        if not isinstance(self.data, bytearray):
+            self.data = bytearray(self.data)
+            self.offsets = array('Q', self.offsets)
+
+    def append(self, value):
+        """
+        Add a string to the end of the column.
+        """
+        self.own()
+        self.data += value.encode()
+        self.offsets.append(len(self.data))
+
+
+class GameCatalog(Mapping):
+    """
+    Games list stored as columns rather than a dict per game, all indexed
+    by a game id: the numbers in arrays, the names and packs as interned
+    strings and the descriptions and images in string columns. Looking up
+    a game returns a GameRecord, a dict-like view of its row.
+
+    Fields other than the standard ones are kept in a dict for just the
+    games that have them.
+
+    The columns can be views of a mapped cache file (see catalog_cache),
+    which are copied the first time a game is added or changed.
+    """
+    # Fields every game has.
+    FIELDS = ('pack', 'players', 'description', 'image', 'weight')
+    # Fields kept in the columns, including the player range aliases.
+    COLUMNS = frozenset(FIELDS + ('min_players', 'max_players'))
+
+    def __init__(self, games=()):
+        """
+        Set up the columns, adding any (name, info) pairs given.
+        """
+        self.names = []
+        self.ids = {}
+        self.packs = []
+        self.players = array('l')
+        self.min_players = array('l')
+        self.descriptions = StringColumn()
+        self.images = StringColumn()
+        self.weights = array('d')
+        self.extras = {}
+        # The mapped file the columns are read from, if any.
+        self.buffer = None
+        for name, info in games:
+            self[name] = info
+
+    def __getitem__(self, name):
+        return GameRecord(self, self.ids[name])
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __setitem__(self, name, info):
+        """
+        Add a game, or replace one with the same name.
+        """
+        fewest, most = player_range(info)
+        get = info.get
+        if self.buffer is not None:
+            self.own()
+        if name in self.ids:
+            game_id = self.ids[name]
+            self.packs[game_id] = sys.intern(get('pack', ''))
+            self.players[game_id] = most
+            self.min_players[game_id] = fewest
+            self.descriptions[game_id] = get('description', '')
+            self.images[game_id] = get('image', '')
+            self.weights[game_id] = get('weight', 1)
+        else:
+            game_id = len(self.names)
+            name = sys.intern(name)
+            self.names.append(name)
+            self.ids[name] = game_id
+            # Many games share a pack, so share the string too.
+            self.packs.append(sys.intern(get('pack', '')))
+            self.players.append(most)
+            self.min_players.append(fewest)
+            self.descriptions.append(get('description', ''))
+            self.images.append(get('image', ''))
+            self.weights.append(get('weight', 1))
+        # Keep any other fields for just this game.
+        extras = info.keys() - self.COLUMNS
+        if extras:
+            self.extras[game_id] = {sys.intern(k): info[k] for k in info
+                                    if k in extras}
+        else:
+            self.extras.pop(game_id, None)
+
+    def own(self):
+        """
+        Copy any columns read from a mapped file, so they can be changed.
+        """
+        self.players = array('l', self.players)
+        self.min_players = array('l', self.min_players)
+        self.weights = array('d', self.weights)
+        self.descriptions.own()
+        self.images.own()
+        self.buffer = None
+
+    def items(self):
+        """
+        Returns the games and their records, without looking up each name.
+        """
+        return ((name, GameRecord(self, i))
+                for i, name in enumerate(self.names))
+
+    def field(self, game_id, key):
+        """
+        Returns one field of a game.
+        """
+        if key == 'pack':
+            return self.packs[game_id]
+        if key == 'players':
+            return self.players[game_id]
+        if key == 'description':
+            return self.descriptions[game_id]
+        if key == 'image':
+            return self.images[game_id]
+        if key == 'weight':
+            return self.weights[game_id]
+        # The minimum is only a field when it's been set.
+        if key == 'min_players' and self.min_players[game_id] != 1:
+            return self.min_players[game_id]
+        return self.extras.get(game_id, {})[key]
+
+    def fields(self, game_id):
+        """
+        Returns the names of a game's fields.
+        """
+        keys = list(self.FIELDS)
+        if self.min_players[game_id] != 1:
+            keys.append('min_players')
+        keys.extend(self.extras.get(game_id, ()))
+        return keys
+
+    def set_field(self, game_id, key, value):
+        """
+        Change one field of a game.
+        """
+        info = dict(GameRecord(self, game_id))
+        info[key] = value
+        self[self.names[game_id]] = info
+
+    def del_field(self, game_id, key):
+        """
+        Remove one field of a game, putting standard fields back to their
+        defaults.
+        """
+        if key == 'players':
+            raise TypeError('Games must have a number of players.')
+        info = dict(GameRecord(self, game_id))
+        del info[key]
+        self[self.names[game_id]] = info
+
+
+class GameRecord(MutableMapping):
+    """
+    Dict-like view of one game in a GameCatalog.
+    """
+    __slots__ = ('catalog', 'id')
+
+    def __init__(self, catalog, game_id):
+        """
+        Set the catalog and the id of the game.
+        """
+        self.catalog = catalog
+        self.id = game_id
+
+    def __getitem__(self, key):
+        return self.catalog.field(self.id, key)
+
+    def __setitem__(self, key, value):
+        self.catalog.set_field(self.id, key, value)
+
+    def __delitem__(self, key):
+        self.catalog.del_field(self.id, key)
+
+    def __iter__(self):
+        return iter(self.catalog.fields(self.id))
+
+    def __len__(self):
+        return len(self.catalog.fields(self.id))
+
+    def __repr__(self):
+        return repr(dict(self))
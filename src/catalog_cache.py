@@ -0,0 +1,295 @@
+"""
+Binary cache of a games JSON file, kept in the user's cache folder, so
+later loads map the cache rather than parsing the JSON again.
+
+The cache starts with a fixed size header noting the JSON file's
+modification time, size and SHA-1 hash, followed by a table of where each
+section is. The numbers are stored as little-endian arrays and the
+strings as UTF-8 data with an array of offsets, each section aligned to 8
+bytes so it can be used straight from the mapped file.
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import tempfile
+from array import array
+from .catalog import GameCatalog, StringColumn
+from .loader import intern_keys, load_catalog
+from .profiling import profiler
+from .resources import user_path
+
+# Start of every cache file, and the format version.
+MAGIC = b'GRCACHE\0'
+VERSION = 1
+# Magic, version, game count, JSON mtime in ns, JSON size and SHA-1.
+HEADER = struct.Struct('<8sIIqQ20s12x')
+# Offset and length of a section.
+SECTION = struct.Struct('<QQ')
+# Sections in file order: JSON, numeric arrays and string columns.
+SECTIONS = ('settings', 'extras', 'players', 'min_players', 'weights',
+            'names', 'name_offsets', 'packs', 'pack_offsets',
+            'descriptions', 'description_offsets', 'images',
+            'image_offsets')
+# Array typecodes of the numeric sections.
+TYPECODES = {'players': 'q', 'min_players': 'q', 'weights': 'd',
+             'name_offsets': 'Q', 'pack_offsets': 'Q',
+             'description_offsets': 'Q', 'image_offsets': 'Q'}
+
+
+def file_signature(path):
+    """
+    Returns the modification time in nanoseconds and size of a file.
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_hash(path):
+    """
+    Returns the SHA-1 digest of a file.
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def string_sections(strings):
+    """
+    Returns the UTF-8 data and offsets array for a column of strings.
+    """
+    data = bytearray()
+    offsets = array('Q', [0])
+    for s in strings:
+        data += s.encode()
+        offsets.append(len(data))
+    return data, offsets
+
+
+def decode_strings(data, offsets):
+    """
+    Returns the strings in UTF-8 data, split at the offsets.
+    """
+    text = str(data, 'utf-8')
+    if len(text) == len(data):
+        # All ASCII, so the byte offsets are character offsets too.
+        return [text[offsets[i]:offsets[i + 1]]
+                for i in range(len(offsets) - 1)]
+    return [str(data[offsets[i]:offsets[i + 1]], 'utf-8')
+            for i in range(len(offsets) - 1)]
+
+
+class CatalogCache(object):
+    """
+    Cache of a games JSON file, kept in a cache directory as
+    <games>-<hash of the JSON file's path>.catalog, so lists of the same
+    name in different folders don't share a cache, and nothing is written
+    into the package.
+    """
+    def __init__(self, json_path, cache_dir=None):
+        """
+        Set the JSON file to cache and where to keep the cache, by default
+        the cache folder of .game_randomizer in the home directory.
+        """
+        self.json_path = json_path
+        if cache_dir is None:
+            cache_dir = user_path('cache')
+        name = os.path.splitext(os.path.basename(json_path))[0]
+        key = hashlib.sha1(os.path.abspath(json_path).encode()).hexdigest()
+        self.path = os.path.join(cache_dir, '%s-%s.catalog' % (name,
+                                                               key[:12]))
+
+    def load(self):
+        """
+        Returns the games and settings from the cache if it's still up to
+        date with the JSON file, or None if it isn't.
+        """
+        try:
+            return self.read(self.path)
+        except (OSError, ValueError, struct.error):
+            # A missing, unreadable or corrupt cache is rebuilt.
+            return None
+
+    def check(self, path, header):
+        """
+        Returns whether a cache header matches the JSON file. The time and
+        size are checked first, then the hash if those differ, in which
+        case the header is updated so the hash isn't needed next time.
+        """
+        magic, version, count, mtime, size, sha1 = header
+        if magic != MAGIC or version != VERSION:
+            return False
+        signature = file_signature(self.json_path)
+        if (mtime, size) == signature:
+            return True
+        if size != signature[1] or file_hash(self.json_path) != sha1:
+            return False
+        # The file was touched but not changed.
+        with open(path, 'r+b') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, count, signature[0],
+                                signature[1], sha1))
+        return True
+
+    def read(self, path):
+        """
+        Returns the games and settings from a cache file, or None if it's
+        out of date. The columns are views of the mapped file, so only the
+        names and packs are decoded up front.
+        """
+        with open(path, 'rb') as f:
+            header = HEADER.unpack(f.read(HEADER.size))
+            if not self.check(path, header):
+                return None
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer)
+        table = HEADER.size
+        sections = {}
+        for name in SECTIONS:
+            offset, length = SECTION.unpack_from(view, table)
+            table += SECTION.size
+            section = view[offset:offset + length]
+            if name in TYPECODES:
+                section = section.cast(TYPECODES[name])
+                if sys.byteorder == 'big':
+                    # Copy the arrays to swap them to this platform.
+                    section = array(TYPECODES[name], section)
+                    section.byteswap()
+            sections[name] = section
+        count = header[2]
+        if len(sections['players']) != count:
+            raise ValueError('Cache %s is truncated.' % (path))
+        catalog = GameCatalog()
+        catalog.buffer = buffer
+        catalog.names = [sys.intern(n) for n in decode_strings(
+            sections['names'], sections['name_offsets'])]
+        catalog.ids = {n: i for i, n in enumerate(catalog.names)}
+        catalog.packs = [sys.intern(p) for p in decode_strings(
+            sections['packs'], sections['pack_offsets'])]
+        catalog.players = sections['players']
+        catalog.min_players = sections['min_players']
+        catalog.weights = sections['weights']
+        catalog.descriptions = StringColumn(
+            sections['descriptions'], sections['description_offsets'])
+        catalog.images = StringColumn(sections['images'],
+                                      sections['image_offsets'])
+        catalog.extras = {game_id: info for game_id, info in json.loads(
+            str(sections['extras'], 'utf-8'), object_pairs_hook=intern_keys)}
+        settings = json.loads(str(sections['settings'], 'utf-8'))
+        return catalog, settings
+
+    def source(self):
+        """
+        Returns the JSON file's modification time and size and its hash,
+        to take before parsing it and pass to save().
+        """
+        return file_signature(self.json_path), file_hash(self.json_path)
+
+    def save(self, games, settings, source):
+        """
+        Write the cache of a games catalog and settings loaded from the
+        JSON file, given the file's source() from before it was parsed.
+        Returns the path written, or None if it couldn't be.
+        """
+        signature, sha1 = source
+        sections = self.sections(games, settings)
+        # Only write the cache if the JSON file hasn't changed since it
+        # was parsed, or the old games would be cached as the new file.
+        try:
+            if file_signature(self.json_path) != signature:
+                return None
+        except OSError:
+            return None
+        try:
+            self.write(self.path, sections, len(games), signature, sha1)
+        except OSError:
+            return None
+        return self.path
+
+    def sections(self, games, settings):
+        """
+        Returns the data of each section of the cache for a catalog.
+        """
+        sections = {
+            'settings': json.dumps(settings).encode(),
+            'extras': json.dumps(sorted(games.extras.items())).encode(),
+            'players': array('q', games.players),
+            'min_players': array('q', games.min_players),
+            'weights': array('d', games.weights),
+        }
+        for name, strings in (
+                ('name', games.names), ('pack', games.packs),
+                ('description', (games.descriptions[i]
+                                 for i in range(len(games)))),
+                ('image', (games.images[i] for i in range(len(games))))):
+            data, offsets = string_sections(strings)
+            sections[name + 's'] = data
+            sections[name + '_offsets'] = offsets
+        # Arrays are stored little-endian whatever the platform.
+        if sys.byteorder == 'big':
+            for name in TYPECODES:
+                sections[name].byteswap()
+        return sections
+
+    def write(self, path, sections, count, signature, sha1):
+        """
+        Write a cache file, replacing any old one in one step so readers
+        never see it half written.
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, temp = tempfile.mkstemp(dir=directory or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, count, signature[0],
+                                    signature[1], sha1))
+                # Lay out the sections after the table, 8 byte aligned.
+                offset = HEADER.size + SECTION.size * len(SECTIONS)
+                table = []
+                for name in SECTIONS:
+                    offset += -offset % 8
+                    length = len(memoryview(sections[name]).cast('B'))
+                    table.append((offset, length))
+                    offset += length
+                for entry in table:
+                    f.write(SECTION.pack(*entry))
+                for name, (start, length) in zip(SECTIONS, table):
+                    f.write(b'\0' * (start - f.tell()))
+                    f.write(sections[name])
+            os.replace(temp, path)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+
+
+def load_games(json_path, cache_dir=None, verbose=False):
+    """
+    Returns the games and settings from a games JSON file, mapping them
+    from its cache when it's up to date, or else parsing the file and
+    caching it in cache_dir. Pass cache_dir=None to skip the cache.
+    """
+    cache = None
+    if cache_dir is not None:
+        cache = CatalogCache(json_path, cache_dir)
+        catalog = cache.load()
+        if catalog is not None:
+            profiler.count('load.cached')
+            return catalog
+        # Note the file as it is before parsing, so an edit part way
+        # through isn't cached with the games from before it.
+        source = cache.source()
+    # Stream the games/settings from the file, so large games lists
+    # aren't held in memory as text and parsed tree at once, and keep
+    # the games in columns rather than a dict each.
+    games, settings = load_catalog(json_path, games=GameCatalog())
+    profiler.count('load.parsed')
+    if cache is not None:
+        path = cache.save(games, settings, source)
+        if verbose and path is not None:
+            print(f'Cached games in { path }')
+    return games, settings
@@ -1,4 +1,7 @@
 import sys
+import csv
+import json
+from .index import player_range
 
 
 class CLI(object):
@@ -8,6 +11,8 @@ class CLI(object):
     WELCOME_MESSAGE = \
         '\n*****************\nGame Randomizer!\n*****************\n'
     INVALID_NUMBER_MESSAGE = 'That didn\'t seem like a number...'
+    BATCH_FORMATS = ['ndjson', 'json', 'csv']
+    BATCH_FIELDS = ['pick', 'game', 'pack', 'players']
 
     def __init__(self, randomizer, verbose):
         """
@@ -68,8 +73,42 @@ class CLI(object):
         """
         print('\n**********\n%s' % (game))
         print('Pack: %s' % (info['pack']))
-        print('Players: %s' % (info['players']))
+        fewest, most = player_range(info)
+        if fewest > 1:
+            print('Players: %s-%s' % (fewest, most))
+        else:
+            print('Players: %s' % (most))
         print('Description: %s' % (info['description']))
         print('**********')
         # Wait for input before moving on.
         input('\nHit enter to continue...')
+
+    def batch(self, count, output_format='ndjson', out=None):
+        """
+        Pick count games for the current player count without prompting,
+        writing each pick to out as it's made.
+        """
+        out = out or sys.stdout
+        writer = None
+        # Start the output off.
+        if output_format == 'csv':
+            writer = csv.DictWriter(out, fieldnames=self.BATCH_FIELDS,
+                                    lineterminator='\n')
+            writer.writeheader()
+        elif output_format == 'json':
+            out.write('[')
+        game = None
+        for i in range(count):
+            game, info = self.randomizer.pick_game(self.players, game)
+            row = {'pick': i + 1, 'game': game, 'pack': info['pack'],
+                   'players': player_range(info)[1]}
+            # Write each pick out as soon as it's made.
+            if writer is not None:
+                writer.writerow(row)
+            elif output_format == 'json':
+                out.write(('\n  ' if i == 0 else ',\n  ') + json.dumps(row))
+            else:
+                out.write(json.dumps(row) + '\n')
+        # Close off the JSON list.
+        if output_format == 'json':
+            out.write('\n]\n' if count else ']\n')
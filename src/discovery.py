@@ -0,0 +1,154 @@
+"""
+Find the games lists in the folders from catalog_dirs, keeping an index
+of each list's title, number of games and image folder so they can be
+listed without opening every file.
+
+The index is cached in .game_randomizer/cache/catalogs.json with each
+folder's and file's modification time. A folder is only listed again if
+its time has changed, and a file only read again if its time or size
+has.
+"""
+import os
+import json
+import time
+from .loader import iter_catalog
+from .resources import catalog_dirs, user_path
+from .stats import atomic_write
+
+# Format version of the cached index.
+VERSION = 1
+# A folder listed within this many nanoseconds of it changing may have
+# changed again in the same tick of a coarse clock, so is listed again.
+RACY_NS = 2 * 10 ** 9
+
+
+def summarize(path):
+    """
+    Returns the title, number of games and image folder of a games list,
+    streaming the file. Raises ValueError if it isn't a games list.
+    """
+    count = 0
+    settings = {}
+    with open(path) as f:
+        for section, key, value in iter_catalog(f):
+            if section == 'Games':
+                count += 1
+            else:
+                settings[key] = value
+    if not settings:
+        raise ValueError('%s has no settings.' % (path))
+    name = os.path.basename(path)[:-5]
+    return {'title': settings.get('Title', name), 'games': count,
+            'image_dir': settings.get('Image_Directory')}
+
+
+class CatalogIndex(object):
+    """
+    Index of the games lists in a set of folders, revalidated against the
+    folders' and files' modification times.
+    """
+    def __init__(self, dirs=None, path=None):
+        """
+        Set the folders to search, by default from catalog_dirs, and where
+        to cache the index.
+        """
+        self.dirs = catalog_dirs() if dirs is None else dirs
+        self.path = user_path('cache', 'catalogs.json') if path is None \
+            else path
+        self.catalogs = {}
+
+    def read(self):
+        """
+        Returns the cached index of each folder, or an empty one if there
+        isn't a usable cache.
+        """
+        try:
+            with open(self.path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(cached, dict) or cached.get('version') != VERSION:
+            return {}
+        return cached.get('dirs', {})
+
+    def write(self, dirs):
+        """
+        Cache the index of each folder. Failing to is ignored, the folders
+        are just scanned again next time.
+        """
+        try:
+            atomic_write(self.path, json.dumps({'version': VERSION,
+                                                'dirs': dirs}))
+        except OSError:
+            pass
+
+    def scan(self, directory, cached=None):
+        """
+        Returns the index of a folder: its modification time, when it was
+        listed and a summary of each games list in it. The cached index is
+        reused for anything that hasn't changed. Returns None if the
+        folder doesn't exist.
+        """
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+        cached = cached or {}
+        files = cached.get('files', {})
+        if cached.get('mtime') == mtime and \
+                cached.get('listed', 0) - mtime > RACY_NS:
+            # No files were added or removed, so the listing still holds.
+            names = list(files)
+            listed = cached['listed']
+        else:
+            listed = time.time_ns()
+            names = [f for f in os.listdir(directory) if f.endswith('.json')]
+        entries = {}
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = files.get(name)
+            if entry is None or entry['mtime'] != stat.st_mtime_ns or \
+                    entry['size'] != stat.st_size:
+                try:
+                    entry = summarize(path)
+                except (OSError, ValueError):
+                    # Not a games list, or not readable.
+                    continue
+                entry['mtime'] = stat.st_mtime_ns
+                entry['size'] = stat.st_size
+            entries[name] = entry
+        return {'mtime': mtime, 'listed': listed, 'files': entries}
+
+    def refresh(self):
+        """
+        Bring the index up to date with the folders. Returns the games
+        lists by name, each a dict of its title, number of games, image
+        folder, path and modification time.
+        """
+        cached = self.read()
+        dirs = {}
+        catalogs = {}
+        for directory in self.dirs:
+            index = self.scan(directory, cached.get(directory))
+            if index is None:
+                continue
+            dirs[directory] = index
+            for name, entry in index['files'].items():
+                # Lists in earlier folders hide those in later ones.
+                catalogs.setdefault(name[:-5], dict(
+                    entry, name=name[:-5],
+                    path=os.path.join(directory, name)))
+        if dirs != cached:
+            self.write(dirs)
+        self.catalogs = dict(sorted(catalogs.items()))
+        return self.catalogs
+
+    def names(self):
+        """
+        Returns the names of the games lists, refreshing the index first.
+        """
+        return list(self.refresh())
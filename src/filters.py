@@ -0,0 +1,203 @@
+import bisect
+
+
+def mask_digits(mask):
+    """
+    Returns the binary digits of a bitset, lowest bit first.
+    """
+    return bin(mask)[:1:-1]
+
+
+def indexes_mask(indexes, size):
+    """
+    Returns a bitset with the bits at the given positions set.
+    """
+    # Setting bits in a byte array avoids growing a new int for each one.
+    data = bytearray((size + 7) // 8)
+    for i in indexes:
+        data[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(data, 'little')
+
+
+def mask_indexes(mask):
+    """
+    Returns the positions of the bits set in a bitset, in order.
+    """
+    # Searching the binary digits runs in C rather than bit by bit.
+    digits = mask_digits(mask)
+    indexes = []
+    i = digits.find('1')
+    while i >= 0:
+        indexes.append(i)
+        i = digits.find('1', i + 1)
+    return indexes
+
+
+class Query(object):
+    """
+    Filter on the games' attributes. Games have to match every condition
+    given: be from one of the packs, have all the tags, and take between
+    the minimum and maximum duration in minutes.
+    """
+    def __init__(self, packs=None, tags=None, max_duration=None,
+                 min_duration=None):
+        """
+        Set the conditions, leaving out any that aren't needed. An empty
+        list of packs matches no games.
+        """
+        self.packs = frozenset(packs) if packs is not None else None
+        self.tags = frozenset(tags) if tags else None
+        self.max_duration = max_duration
+        self.min_duration = min_duration
+
+    def __bool__(self):
+        """
+        Returns whether the query filters anything out.
+        """
+        return any(c is not None for c in (self.packs, self.tags,
+                                           self.max_duration,
+                                           self.min_duration))
+
+    def matches(self, info):
+        """
+        Returns whether a game matches the query, checking it directly.
+        """
+        if self.packs is not None and info.get('pack') not in self.packs:
+            return False
+        if self.tags is not None and \
+                not self.tags.issubset(info.get('tags', ())):
+            return False
+        duration = info.get('duration')
+        if self.max_duration is not None and \
+                (duration is None or duration > self.max_duration):
+            return False
+        if self.min_duration is not None and \
+                (duration is None or duration < self.min_duration):
+            return False
+        return True
+
+
+class AttributeIndex(object):
+    """
+    Bitsets of the games with each pack, tag and duration, with bit i set
+    for the game at position i of the player index. Queries are answered
+    by combining the bitsets rather than checking every game.
+    """
+    def __init__(self, games, game_ids):
+        """
+        Build the bitsets from (name, info) pairs, positioned by game_ids.
+        """
+        size = len(game_ids)
+        self.all = (1 << size) - 1
+        # Gather the games with each value, then make the bitsets.
+        packs = {}
+        tags = {}
+        durations = {}
+        for name, info in games:
+            i = game_ids[name]
+            packs.setdefault(info.get('pack', ''), []).append(i)
+            for tag in info.get('tags', ()):
+                tags.setdefault(tag, []).append(i)
+            duration = info.get('duration')
+            if duration is not None:
+                durations.setdefault(duration, []).append(i)
+        self.pack_masks = {p: indexes_mask(i, size)
+                           for p, i in packs.items()}
+        self.tag_masks = {t: indexes_mask(i, size) for t, i in tags.items()}
+        durations = {d: indexes_mask(i, size) for d, i in durations.items()}
+        # Games up to each duration, shortest first, for range queries.
+        self.durations = sorted(durations)
+        self.duration_masks = [0]
+        for d in self.durations:
+            self.duration_masks.append(self.duration_masks[-1] |
+                                       durations[d])
+
+    def packs(self):
+        """
+        Returns the packs, in the order they appear in the games list.
+        """
+        return list(self.pack_masks)
+
+    def tags(self):
+        """
+        Returns the tags, sorted.
+        """
+        return sorted(self.tag_masks)
+
+    def mask(self, query):
+        """
+        Returns the bitset of the games matching a query.
+        """
+        mask = self.all
+        if query.packs is not None:
+            packs = 0
+            for pack in query.packs:
+                packs |= self.pack_masks.get(pack, 0)
+            mask &= packs
+        if query.tags is not None:
+            for tag in query.tags:
+                mask &= self.tag_masks.get(tag, 0)
+        if query.max_duration is not None:
+            end = bisect.bisect_right(self.durations, query.max_duration)
+            mask &= self.duration_masks[end]
+        if query.min_duration is not None:
+            start = bisect.bisect_left(self.durations, query.min_duration)
+            mask &= self.duration_masks[-1] & ~self.duration_masks[start]
+        return mask
+
+
+class FilteredIndex(object):
+    """
+    A PlayerIndex limited to the games in a bitset. The eligible games for
+    each player count are worked out the first time they're needed, then
+    kept.
+    """
+    def __init__(self, index, mask):
+        """
+        Set the index to filter and the bitset of games to keep.
+        """
+        self.index = index
+        self.mask = mask
+        self.digits = mask_digits(mask)
+        self.eligibility = {}
+
+    def __len__(self):
+        """
+        Returns the number of games in the index.
+        """
+        return len(self.index)
+
+    def eligible(self, player_count):
+        """
+        Returns the indexes of the games that support the given number of
+        players and match the filter, in order. This is a range when they
+        are a prefix of the index.
+        """
+        if player_count not in self.eligibility:
+            eligible = self.index.eligible(player_count)
+            if isinstance(eligible, range):
+                prefix = (1 << len(eligible)) - 1
+                mask = self.mask & prefix
+                if mask == prefix:
+                    self.eligibility[player_count] = eligible
+                    return eligible
+                games = mask_indexes(mask)
+            else:
+                games = [i for i in eligible if i < len(self.digits) and
+                         self.digits[i] == '1']
+            self.eligibility[player_count] = games
+        return self.eligibility[player_count]
+
+    def eligible_count(self, player_count):
+        """
+        Returns the number of games that support the given number of
+        players and match the filter.
+        """
+        return len(self.eligible(player_count))
+
+    def player_counts(self):
+        """
+        Returns the player counts supported by at least one matching game.
+        """
+        return [c for c in self.index.player_counts()
+                if self.eligible_count(c)]
@@ -6,7 +6,12 @@ import random
 import time
 import subprocess
 import platform
-from pkg_resources import resource_filename
+from .discovery import CatalogIndex
+from .filters import Query
+from .images import ImageCache, Prefetcher
+from .profiling import profiler
+from .resources import asset_path
+from .watcher import CatalogWatcher
 
 
 README = """
@@ -19,6 +24,92 @@ based on a JSON file of games.
 """
 
 
+def ease_out_quad(progress):
+    """
+    Easing curve that starts quickly and slows to a stop.
+    """
+    return 1 - (1 - progress) ** 2
+
+
+class RollAnimation(object):
+    """
+    Frame-timed animation driven by Tk's after(), so the window keeps
+    handling events while it runs.
+
+    Each tick works out which frame should be showing from the time
+    elapsed, so frames are dropped rather than the animation falling
+    behind when drawing one is slow.
+    """
+    def __init__(self, root, frames, duration, draw_frame, on_finish,
+                 fps=30, easing=ease_out_quad):
+        """
+        Set up the animation. draw_frame is called for each frame shown,
+        and on_finish once it ends or is skipped.
+        """
+        self.root = root
+        self.frames = frames
+        self.duration = duration
+        self.draw_frame = draw_frame
+        self.on_finish = on_finish
+        self.interval = 1.0 / fps
+        self.easing = easing
+        self.frame = -1
+        self.dropped = 0
+        self.after_id = None
+        self.running = False
+        self.started = None
+
+    def start(self):
+        """
+        Start the animation.
+        """
+        self.running = True
+        self.started = time.perf_counter()
+        self.tick()
+
+    def tick(self):
+        """
+        Draw the frame for the current time and schedule the next tick.
+        """
+        self.after_id = None
+        elapsed = time.perf_counter() - self.started
+        if elapsed >= self.duration:
+            self.finish()
+            return
+        # Work out which frame should be showing, skipping any we've
+        # fallen behind on.
+        frame = int(self.frames * self.easing(elapsed / self.duration))
+        if frame > self.frame:
+            dropped = max(frame - self.frame - 1, 0)
+            self.dropped += dropped
+            profiler.count('frame.dropped', dropped)
+            self.frame = frame
+            with profiler.timer('frame.render'):
+                self.draw_frame()
+        # Line the next tick up with the frame clock.
+        elapsed = time.perf_counter() - self.started
+        next_tick = (int(elapsed / self.interval) + 1) * self.interval
+        delay = max(int((next_tick - elapsed) * 1000), 1)
+        self.after_id = self.root.after(delay, self.tick)
+
+    def finish(self):
+        """
+        End the animation, skipping any remaining frames.
+        """
+        if self.running:
+            self.cancel()
+            self.on_finish()
+
+    def cancel(self):
+        """
+        Stop the animation without finishing it.
+        """
+        self.running = False
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+
 class GUI(object):
     """
     Base class for shared GUI functionality.
@@ -96,18 +187,20 @@ class JSONGUI(GUI):
 
     TITLE = "Select Game List"
     WIDTH = 340
-    HEIGHT = 180
+    HEIGHT = 210
     BACKGROUND = 'grey25'
 
-    def __init__(self):
+    def __init__(self, index=None):
         """
-        Create some variables and set up the GUI.
+        Create some variables and set up the GUI, listing the games lists
+        found by a CatalogIndex.
         """
         self.selected = None
-        # Retrieve list of .json files in the directory
-        self.assets_dir = resource_filename('game_randomizer', 'assets')
-        self.json_files = [f[:-5] for f in os.listdir(self.assets_dir)
-                           if f.endswith('.json')]
+        self.assets_dir = asset_path()
+        # Find the games lists, only reading those new since last time.
+        self.index = CatalogIndex() if index is None else index
+        self.catalogs = self.index.refresh()
+        self.json_files = list(self.catalogs)
         # Apply class specific settings.
         self.apply_settings()
         # Do the normal GUI setup
@@ -149,6 +242,14 @@ class JSONGUI(GUI):
                                 highlightthickness=0, width=15,
                                 font=("Arial", 12), fg="white")
         self.dropdown.grid(row=1, column=2, columnspan=3)
+        # Title and size of the selected list, from the index.
+        self.info = tk.StringVar(self.mainframe)
+        self.label_info = tk.Label(self.mainframe, textvariable=self.info,
+                                   background=self.background_colour,
+                                   font=("Arial", 10), fg="white")
+        self.label_info.grid(row=2, column=0, columnspan=5, padx=10)
+        self.selected_file.trace_add('write', self.show_info)
+        self.show_info()
 
         # Label for assets folder.
         self.label_open_folder = tk.Label(self.mainframe,
@@ -156,7 +257,7 @@ class JSONGUI(GUI):
                                           background=self.background_colour,
                                           font=("Arial", 12), fg="white",
                                           height=3)
-        self.label_open_folder.grid(row=2, column=0, columnspan=3, padx=10)
+        self.label_open_folder.grid(row=3, column=0, columnspan=3, padx=10)
         # Open assets folder button.
         self.open_folder_btn = tk.Button(self.mainframe, text='\U0001F4C1',
                                          command=self.open_folder,
@@ -164,7 +265,7 @@ class JSONGUI(GUI):
         self.open_folder_btn.configure(background=self.background_colour,
                                        highlightcolor=self.background_colour,
                                        highlightthickness=0)
-        self.open_folder_btn.grid(row=2, column=3)
+        self.open_folder_btn.grid(row=3, column=3)
         # Load button
         self.load_btn = tk.Button(self.mainframe, text="Load",
                                   command=self.select,
@@ -172,7 +273,7 @@ class JSONGUI(GUI):
         self.load_btn.configure(background=self.background_colour,
                                 highlightcolor=self.background_colour,
                                 highlightthickness=0)
-        self.load_btn.grid(row=3, column=1, pady=15)
+        self.load_btn.grid(row=4, column=1, pady=15)
         # Exit button
         self.exit_btn = tk.Button(self.mainframe, text="Exit",
                                   command=self.exit,
@@ -180,18 +281,33 @@ class JSONGUI(GUI):
         self.exit_btn.configure(background=self.background_colour,
                                 highlightcolor=self.background_colour,
                                 highlightthickness=0)
-        self.exit_btn.grid(row=3, column=3)
+        self.exit_btn.grid(row=4, column=3)
+
+    def show_info(self, *args):
+        """
+        Shows the title and number of games of the selected list.
+        """
+        catalog = self.catalogs.get(self.selected_file.get())
+        if catalog is None:
+            self.info.set('')
+        else:
+            self.info.set('%s: %s games' % (catalog['title'],
+                                            catalog['games']))
 
     def open_folder(self):
         """
-        Opens the folder containing the .json files.
+        Opens the folder containing the selected .json file, or the assets
+        folder.
         """
+        catalog = self.catalogs.get(self.selected_file.get())
+        folder = os.path.dirname(catalog['path']) if catalog is not None \
+            else self.assets_dir
         if platform.system() == "Windows":
-            os.startfile(self.assets_dir)
+            os.startfile(folder)
         elif platform.system() == "Darwin":  # for MacOS
-            subprocess.Popen(["open", self.assets_dir])
+            subprocess.Popen(["open", folder])
         else:  # assumed to be Linux/Unix
-            subprocess.Popen(["xdg-open", self.assets_dir])
+            subprocess.Popen(["xdg-open", folder])
 
     def select(self):
         """
@@ -218,43 +334,62 @@ class RandomGUI(GUI):
     HEIGHT = 620
     BACKGROUND = 'grey25'
 
-    def __init__(self, randomizer):
+    def __init__(self, randomizer, image_cache_mb=64, prefetch_workers=4,
+                 watch_interval=1.0):
         """
-        Set up some basic variables for the GUI
+        Set up some basic variables for the GUI. The games list is checked
+        for edits every watch_interval seconds, or never if it's None.
         """
         # Set randomize variable.
         self.randomizer = randomizer
+        # Keep resized banners around so repeat showings are cheap.
+        self.banners = ImageCache(max_bytes=image_cache_mb * 1024 * 1024)
+        # Worker threads used to load the banners up front, 0 disables.
+        self.prefetch_workers = prefetch_workers
+        self.prefetcher = None
         # Get our settings.
         self.game_setting = randomizer.settings()
         self.default_subheader = 'Number of players: '
         self.default_description = ' '
-        # Set player info
+        # Set player info, offering the player counts the games support.
+        self.player_options = randomizer.player_counts()
         self.default_players = self.game_setting['Default_Players']
-        self.max_players = self.game_setting['Max_Players']
-        # Number of random games to display before the actual pick.
+        if self.player_options and \
+                self.default_players not in self.player_options:
+            self.default_players = self.player_options[0]
+        # Number of random games to display before the actual pick, over
+        # how many seconds and at what frame rate.
         self.pretty_roll_count = 75
+        self.pretty_roll_duration = 2.85
+        self.pretty_roll_fps = 30
+        self.animation = None
+        # Longest durations offered in the filters, in minutes.
+        self.duration_options = [15, 30, 60]
         # Set size/background
         self.apply_settings()
         # Set the title based off the json file.
         self.title = self.game_setting['Title']
         # Set up logo path.
-        self.default_img = \
-            resource_filename('game_randomizer',
-                              os.path.join(
-                                  'assets',
-                                  self.game_setting['Image_Directory'],
-                                  self.game_setting['Logo']))
+        self.default_img = self.image_path(self.game_setting['Logo'])
         # Do the normal GUI setup
         super().__init__()
+        # Start loading the banners in the background.
+        if self.prefetch_workers:
+            self.prefetch_banners()
+        # Pick up edits to the games list while the app is open.
+        self.watch_interval = watch_interval
+        self.watcher = None
+        if self.watch_interval is not None:
+            self.watcher = CatalogWatcher(randomizer, watch_interval)
+            self.root.after(int(self.watch_interval * 1000),
+                            self.watch_catalog)
 
     def frame_layout(self):
         """
         Sets the frame layout.
         """
         # Image
-        img = PIL.Image.open(self.default_img)
-        img = img.resize((420, 192), PIL.Image.Resampling.LANCZOS)
-        photo = PIL.ImageTk.PhotoImage(img)
+        photo = self.banners.get(self.default_img)
         self.banner = tk.Label(self.mainframe, image=photo,
                                background=self.background_colour)
         self.banner.image = photo
@@ -276,9 +411,8 @@ class RandomGUI(GUI):
         self.subheader_label.grid(row=2, column=0, pady=0, columnspan=2)
         self.players = tk.IntVar(self.mainframe)
         self.players.set(self.default_players)  # default players
-        player_options = list(range(2, self.max_players + 1))
         self.player_prompt = tk.OptionMenu(self.mainframe, self.players,
-                                           *player_options)
+                                           *self.player_options)
         self.player_prompt.configure(background=self.background_colour,
                                      highlightcolor=self.background_colour,
                                      highlightthickness=0)
@@ -287,6 +421,8 @@ class RandomGUI(GUI):
                                              borderwidth=0)
         self.player_prompt.grid(row=2, column=2, pady=20,
                                 columnspan=1, sticky='w')
+        # Filters
+        self.filter_layout()
         # Description
         self.description = tk.StringVar()
         self.description.set(self.default_description)
@@ -318,16 +454,17 @@ class RandomGUI(GUI):
                                           font=('Arial', 10),
                                           height=1,
                                           background=self.background_colour)
-        # Empty row for keeping things spaced correctly
-        self.blank_label = tk.Label(self.mainframe, text="",
+        # Empty row for keeping things spaced correctly, also used to
+        # show banner loading progress.
+        self.progress = tk.StringVar()
+        self.progress.set('')
+        self.blank_label = tk.Label(self.mainframe,
+                                    textvariable=self.progress,
+                                    font=('Arial', 8),
                                     background=self.background_colour)
         self.blank_label.grid(row=6, column=0, pady=(10, 0), columnspan=3)
         # Random Selection Button
-        roll_img = PIL.Image.open(
-            resource_filename('game_randomizer',
-                              os.path.join(
-                                  'assets',
-                                  'rollv2.png')))
+        roll_img = PIL.Image.open(asset_path('rollv2.png'))
         roll = PIL.ImageTk.PhotoImage(roll_img)
         roll_button = tk.Button(self.mainframe, image=roll,
                                 command=self.rollGame,
@@ -349,47 +486,191 @@ class RandomGUI(GUI):
                                 background=self.background_colour)
         exit_button.grid(row=8, column=2, pady=30)
 
-    def pretty_roll(self):
+    def filter_layout(self):
         """
-        Shows random game banners over a short delay to make
-        the roll process more satisfying.
+        Sets up the filters menu, with a toggle for each pack and tag and a
+        choice of durations if the games have them.
+        """
+        attributes = self.randomizer.attribute_index()
+        self.filter_button = tk.Menubutton(self.mainframe, text='Filters',
+                                           relief=tk.RAISED,
+                                           background=self.background_colour)
+        self.filter_menu = tk.Menu(self.filter_button, tearoff=0,
+                                   background=self.background_colour)
+        self.filter_button['menu'] = self.filter_menu
+        # Every pack is included to start with.
+        self.pack_filters = {}
+        for pack in attributes.packs():
+            self.pack_filters[pack] = tk.IntVar(value=1)
+            self.filter_menu.add_checkbutton(
+                label=pack or 'No pack', variable=self.pack_filters[pack],
+                command=self.apply_filters)
+        # Tags only pick games that have them once toggled on.
+        self.tag_filters = {}
+        if attributes.tags():
+            self.filter_menu.add_separator()
+        for tag in attributes.tags():
+            self.tag_filters[tag] = tk.IntVar(value=0)
+            self.filter_menu.add_checkbutton(
+                label=tag, variable=self.tag_filters[tag],
+                command=self.apply_filters)
+        self.max_duration = tk.IntVar(value=0)
+        if attributes.durations:
+            self.filter_menu.add_separator()
+            self.filter_menu.add_radiobutton(label='Any length', value=0,
+                                             variable=self.max_duration,
+                                             command=self.apply_filters)
+            for minutes in self.duration_options:
+                self.filter_menu.add_radiobutton(
+                    label='Up to %s minutes' % (minutes), value=minutes,
+                    variable=self.max_duration, command=self.apply_filters)
+        self.filter_button.grid(row=3, column=0, pady=0, columnspan=3)
+
+    def apply_filters(self):
+        """
+        Limit the picks to the games matching the toggled filters.
+        """
+        packs = [p for p, v in self.pack_filters.items() if v.get()]
+        # No need to filter on packs if they're all included.
+        if len(packs) == len(self.pack_filters):
+            packs = None
+        tags = [t for t, v in self.tag_filters.items() if v.get()]
+        self.progress.set('')
+        self.randomizer.set_filter(Query(packs, tags,
+                                         self.max_duration.get() or None))
+
+    def watch_catalog(self):
+        """
+        Reload the games list if it's been edited, checking back every
+        watch_interval seconds. The check is made on the Tk thread between
+        rolls, so a roll never shows a game that's been removed.
+        """
+        if self.animation is None or not self.animation.running:
+            if self.watcher.check() is not None:
+                self.refresh_options()
+        self.root.after(int(self.watch_interval * 1000), self.watch_catalog)
+
+    def refresh_options(self):
+        """
+        Update the player counts and filters offered after the games list
+        is reloaded.
+        """
+        self.player_options = self.randomizer.player_counts()
+        menu = self.player_prompt['menu']
+        menu.delete(0, 'end')
+        for count in self.player_options:
+            menu.add_command(label=count,
+                             command=tk._setit(self.players, count))
+        if self.player_options and \
+                self.players.get() not in self.player_options:
+            self.players.set(self.player_options[0])
+        # Rebuild the filters with every game included again, only showing
+        # them on the setup screen.
+        setup = str(self.setup_button['state']) == tk.DISABLED
+        self.filter_button.destroy()
+        self.filter_layout()
+        self.apply_filters()
+        if not setup:
+            self.filter_button.grid_forget()
+
+    def image_path(self, image):
+        """
+        Returns the path to one of the game list's images, kept alongside
+        its JSON file.
+        """
+        return os.path.join(os.path.dirname(self.randomizer.json_path),
+                            self.game_setting['Image_Directory'], image)
+
+    def show_banner(self, path):
+        """
+        Display an image in the banner, using the cached copy if there is
+        one.
+        """
+        banner = self.banners.get(path)
+        self.banner.configure(image=banner)
+        self.banner.image = banner
+
+    def prefetch_banners(self):
+        """
+        Load all the game banners into the cache using worker threads.
         """
-        i = 0
-        # Get the number of games in the list
         games = self.randomizer.games_list()
-        games_list = list(games.keys())
-        # Loop through random banners for a short time
-        while i <= self.pretty_roll_count:
-            # Pick a game at random
-            game = random.choice(games_list)
-            # Get the game info to display
-            game_info = games[game]
-            # Set the banner image
-            img = PIL.Image.open(
-                resource_filename('game_randomizer',
-                                  os.path.join(
-                                      'assets',
-                                      self.game_setting['Image_Directory'],
-                                      game_info['image'])))
-            img = img.resize((420, 192), PIL.Image.Resampling.LANCZOS)
-            banner = PIL.ImageTk.PhotoImage(img)
-            self.banner.configure(image=banner)
-            self.banner.image = banner
-            # Set the game info
-            self.header.set(game)
-            self.subheader.set(game_info['pack'])
-            self.description.set(game_info['description'])
-            self.occurrences.set('Occurrences: %s' % (self.stats[game]))
-            # Update the window
-            self.mainframe.update()
-            # Sleep
-            time.sleep(i*0.001)
-            i += 1
+        paths = [self.image_path(info['image']) for info in games.values()]
+        self.prefetcher = Prefetcher(self.banners, paths,
+                                     max_workers=self.prefetch_workers)
+        self.prefetcher.start()
+        self.prefetch_poll()
+
+    def prefetch_poll(self):
+        """
+        Hand finished banners to the cache and update the progress, checking
+        back until they're all done.
+        """
+        if self.prefetcher.poll():
+            self.progress.set('')
+        else:
+            self.progress.set('Loading banners: %s/%s' %
+                              (self.prefetcher.done, self.prefetcher.total))
+            self.root.after(50, self.prefetch_poll)
+
+    def pretty_roll(self, game, game_info):
+        """
+        Shows random game banners over a short delay to make
+        the roll process more satisfying, then shows the picked game.
+        """
+        # Get the games to show, kept for the roll in case of a reload.
+        self.roll_info = self.randomizer.snapshot_games()
+        self.roll_games = list(self.roll_info.keys())
+        self.animation = RollAnimation(
+            self.root, self.pretty_roll_count + 1, self.pretty_roll_duration,
+            draw_frame=lambda: self.roll_frame(game),
+            on_finish=lambda: self.show_game(game, game_info),
+            fps=self.pretty_roll_fps)
+        self.animation.start()
+
+    def roll_frame(self, picked):
+        """
+        Shows a random game banner as a frame of the roll animation.
+        """
+        # Pick a game at random
+        game = random.choice(self.roll_games)
+        # Get the game info to display
+        game_info = self.roll_info[game]
+        # Set the banner image
+        self.show_banner(self.image_path(game_info['image']))
+        # Set the game info
+        self.header.set(game)
+        self.subheader.set(game_info['pack'])
+        self.description.set(game_info['description'])
+        # The picked game's stats already include this roll.
+        occurrences = self.stats.get(game, 0)
+        if game == picked:
+            occurrences -= 1
+        self.occurrences.set('Occurrences: %s' % (occurrences))
+
+    def show_game(self, game, game_info):
+        """
+        Shows the picked game.
+        """
+        self.show_banner(self.image_path(game_info['image']))
+        self.header.set(game)
+        self.subheader.set(game_info['pack'])
+        self.description.set(game_info['description'])
+        # Stats are updated before display, so remove 1.
+        self.occurrences.set('Occurrences: %s' % (self.stats[game]-1))
 
     def rollGame(self):
         """
         Performs the roll process to select a random game.
         """
+        # Skip to the result if a roll is already showing.
+        if self.animation is not None and self.animation.running:
+            self.animation.finish()
+            return
+        # Stay on the setup screen if the filters leave nothing to pick.
+        if not self.randomizer.eligible_count(self.players.get()):
+            self.progress.set('No games match the filters.')
+            return
         # Change widget state
         self.setup_button.config(state=tk.NORMAL)
         self.desc_label.grid(row=4, column=0, pady=10, columnspan=3)
@@ -397,43 +678,33 @@ class RandomGUI(GUI):
                                     columnspan=3, rowspan=2)
         self.subheader_label.grid(row=2, column=0, pady=0, columnspan=3)
         self.player_prompt.grid_forget()
+        self.filter_button.grid_forget()
         self.repeat_check.grid_forget()
         self.proll_check.grid_forget()
         self.blank_label.grid_forget()
-        # Get a copy of the current occurrences.
-        self.stats = self.randomizer.view_stats()
         # Check if user doesn't want to play the same game twice.
         if self.repeat_option.get():
             last_game = self.header.get()
         else:
             last_game = False
-        # Show random banners if Pizza is enabled
-        if self.enable_pretty_roll.get():
-            self.pretty_roll()
-        # Select the random game
+        # Select the random game up front, so the animation ends on it.
         game, game_info = self.randomizer.pick_game(self.players.get(),
                                                     last_game)
-        # Update the screen
-        img = PIL.Image.open(
-            resource_filename('game_randomizer',
-                              os.path.join(
-                                  'assets',
-                                  self.game_setting['Image_Directory'],
-                                  game_info['image'])))
-        img = img.resize((420, 192), PIL.Image.Resampling.LANCZOS)
-        banner = PIL.ImageTk.PhotoImage(img)
-        self.banner.configure(image=banner)
-        self.banner.image = banner
-        self.header.set(game)
-        self.subheader.set(game_info['pack'])
-        self.description.set(game_info['description'])
-        # Stats are updated before display, so remove 1.
-        self.occurrences.set('Occurrences: %s' % (self.stats[game]-1))
+        # Get a copy of the occurrences, including this pick.
+        self.stats = self.randomizer.view_stats()
+        # Show random banners if Pizza is enabled
+        if self.enable_pretty_roll.get():
+            self.pretty_roll(game, game_info)
+        else:
+            self.show_game(game, game_info)
 
     def settings(self):
         """
         Switch back to the setup/settings window.
         """
+        # Stop any roll still showing.
+        if self.animation is not None:
+            self.animation.cancel()
         # Disable setup button
         self.setup_button.config(state=tk.DISABLED)
         self.desc_label.grid_forget()
@@ -441,15 +712,12 @@ class RandomGUI(GUI):
         self.subheader_label.grid(row=2, column=0, pady=0, columnspan=2)
         self.player_prompt.grid(row=2, column=2, pady=20, columnspan=1,
                                 sticky='w')
+        self.filter_button.grid(row=3, column=0, pady=0, columnspan=3)
         self.repeat_check.grid(row=5, column=0, pady=0, columnspan=3)
         self.proll_check.grid(row=4, column=0, pady=0, columnspan=3)
         self.blank_label.grid(row=6, column=0, pady=(14, 0), columnspan=3)
         # Reset
-        img = PIL.Image.open(self.default_img)
-        img = img.resize((420, 192), PIL.Image.Resampling.LANCZOS)
-        banner = PIL.ImageTk.PhotoImage(img)
-        self.banner.configure(image=banner)
-        self.banner.image = banner
+        self.show_banner(self.default_img)
         self.header.set(self.title)
         self.subheader.set(self.default_subheader)
         self.description.set(self.default_description)
@@ -476,6 +744,11 @@ class RandomGUI(GUI):
         """
         Allows the user to quit the app.
         """
+        # Stop loading banners and any roll still showing.
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+        if self.animation is not None:
+            self.animation.cancel()
         # Destory the window.
         self.root.destroy()
         # Attempt to destory the about window.
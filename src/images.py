@@ -0,0 +1,162 @@
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import PIL.Image
+import PIL.ImageTk
+from .profiling import profiler
+
+
+# Size banners are displayed at in the GUI.
+BANNER_SIZE = (420, 192)
+
+
+class ImageCache(object):
+    """
+    Least recently used cache of decoded and resized images, keyed by
+    image path and target size.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, wrap=None):
+        """
+        Set the memory cap for the cached images. Images are passed
+        through wrap before caching, by default making a Tk PhotoImage.
+        """
+        self.max_bytes = max_bytes
+        self.wrap = wrap
+        self.images = OrderedDict()
+        self.costs = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __contains__(self, key):
+        """
+        Returns whether a (path, size) pair is cached.
+        """
+        return key in self.images
+
+    def __len__(self):
+        """
+        Returns the number of cached images.
+        """
+        return len(self.images)
+
+    def get(self, path, size=BANNER_SIZE):
+        """
+        Returns the image at path resized to size, loading it if it isn't
+        already cached.
+        """
+        key = (path, size)
+        with self.lock:
+            if key in self.images:
+                self.hits += 1
+                self.images.move_to_end(key)
+                return self.images[key]
+            self.misses += 1
+        return self.put(path, size, self.load(path, size))
+
+    def load(self, path, size=BANNER_SIZE):
+        """
+        Decode an image and resize it.
+        """
+        with PIL.Image.open(path) as img:
+            # Opening only reads the header, so decode before resizing to
+            # time them apart.
+            with profiler.timer('image.decode'):
+                img.load()
+            with profiler.timer('image.resize'):
+                return img.resize(size, PIL.Image.Resampling.LANCZOS)
+
+    def put(self, path, size, image):
+        """
+        Cache a decoded image, evicting the least recently used images to
+        stay under the memory cap. Returns the cached image.
+        """
+        key = (path, size)
+        # Tk keeps 4 bytes per pixel, whatever the source format.
+        cost = image.width * image.height * 4
+        wrap = self.wrap or PIL.ImageTk.PhotoImage
+        value = wrap(image)
+        with self.lock:
+            if key in self.images:
+                self.total_bytes -= self.costs[key]
+            self.images[key] = value
+            self.images.move_to_end(key)
+            self.costs[key] = cost
+            self.total_bytes += cost
+            # Always keep the newest image, even if it's over the cap.
+            while self.total_bytes > self.max_bytes and len(self.images) > 1:
+                old_key, old_value = self.images.popitem(last=False)
+                self.total_bytes -= self.costs.pop(old_key)
+        return value
+
+    def clear(self):
+        """
+        Empty the cache.
+        """
+        with self.lock:
+            self.images.clear()
+            self.costs.clear()
+            self.total_bytes = 0
+
+
+class Prefetcher(object):
+    """
+    Decodes and resizes images into an ImageCache using a pool of worker
+    threads. Finished images are only handed to the cache by poll(), so
+    the Tk images are always made on the thread that calls it.
+    """
+    def __init__(self, cache, paths, size=BANNER_SIZE, max_workers=4):
+        """
+        Set the cache to fill and the images to load, skipping any already
+        cached and any that wouldn't fit under the cache's memory cap.
+        """
+        self.cache = cache
+        self.size = size
+        self.max_workers = max_workers
+        image_bytes = size[0] * size[1] * 4
+        limit = max(cache.max_bytes // image_bytes, 1)
+        self.paths = [p for p in dict.fromkeys(paths)
+                      if (p, size) not in cache][:limit]
+        self.total = len(self.paths)
+        self.done = 0
+        self.futures = deque()
+        self.pool = None
+
+    def start(self):
+        """
+        Queue all the images on the worker pool.
+        """
+        if self.paths:
+            self.pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            self.futures = deque((p, self.pool.submit(self.cache.load, p,
+                                                      self.size))
+                                 for p in self.paths)
+
+    def poll(self):
+        """
+        Cache the images finished so far, in order. Returns True once all
+        of them are done.
+        """
+        while self.futures and self.futures[0][1].done():
+            path, future = self.futures.popleft()
+            # Skip images that couldn't be loaded, they'll be retried
+            # when shown.
+            if future.exception() is None:
+                self.cache.put(path, self.size, future.result())
+            self.done += 1
+        if not self.futures:
+            self.stop()
+            return True
+        return False
+
+    def stop(self):
+        """
+        Cancel any images not started yet and release the pool.
+        """
+        for path, future in self.futures:
+            future.cancel()
+        self.futures.clear()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+            self.pool = None
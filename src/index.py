@@ -0,0 +1,97 @@
+import bisect
+from array import array
+
+
+def player_range(info):
+    """
+    Returns the fewest and most players a game supports. Games can give
+    min_players and max_players, or just players for the most, in which
+    case any number up to that is supported.
+    """
+    if 'max_players' in info:
+        most = info['max_players']
+    else:
+        most = info['players']
+    return info.get('min_players', 1), most
+
+
+def order_games(games):
+    """
+    Returns (name, fewest, most players, weight) for each game, ordered by
+    the most players supported, most first, as PlayerIndex needs.
+    """
+    if hasattr(games, 'min_players'):
+        # Read the player ranges and weights straight from a GameCatalog's
+        # columns.
+        columns = zip(games.names, games.min_players, games.players,
+                      games.weights)
+    else:
+        columns = ((g,) + player_range(info) + (info['weight'],)
+                   for g, info in games.items())
+    return sorted(columns, key=lambda e: e[2], reverse=True)
+
+
+class PlayerIndex(object):
+    """
+    Index of the games by the number of players they support.
+
+    Games are given in order of the most players supported, most first,
+    so the games supporting enough players for any count are a prefix of
+    that order. The games eligible for each player count are worked out up
+    front: a range over that prefix when no game in it needs more players,
+    or otherwise an array of the indexes of the eligible games in order.
+    """
+    def __init__(self, players, min_players=None):
+        """
+        Build the index from each game's most and fewest supported players.
+        """
+        if min_players is None:
+            min_players = [1] * len(players)
+        # Negated player counts, for bisecting.
+        self.keys = [-p for p in players]
+        if any(a > b for a, b in zip(self.keys, self.keys[1:])):
+            raise ValueError('Games must be ordered by players, most first.')
+        self.min_players = array('l', min_players)
+        # The most players needed by any game in each prefix of the index.
+        needed = array('l', [0])
+        for p in self.min_players:
+            needed.append(max(needed[-1], p))
+        # Work out the eligible games for every count any game supports.
+        self.lowest = min(self.min_players, default=1)
+        self.highest = max(players, default=0)
+        self.eligibility = {}
+        for count in range(self.lowest, self.highest + 1):
+            end = bisect.bisect_right(self.keys, -count)
+            if needed[end] <= count:
+                self.eligibility[count] = range(end)
+            else:
+                self.eligibility[count] = array(
+                    'l', (i for i in range(end)
+                          if self.min_players[i] <= count))
+
+    def __len__(self):
+        """
+        Returns the number of games in the index.
+        """
+        return len(self.keys)
+
+    def eligible(self, player_count):
+        """
+        Returns the indexes of the games that support the given number of
+        players, in order. This is a range when they're a prefix of the
+        index.
+        """
+        return self.eligibility.get(player_count, range(0))
+
+    def eligible_count(self, player_count):
+        """
+        Returns the number of games that support the given number of
+        players.
+        """
+        return len(self.eligible(player_count))
+
+    def player_counts(self):
+        """
+        Returns the player counts supported by at least one game.
+        """
+        return [c for c, games in self.eligibility.items() if len(games)]
@@ -0,0 +1,169 @@
+import re
+import sys
+import json
+
+
+# Whitespace allowed between JSON tokens.
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+# An object key and its colon.
+KEY = re.compile(r'[ \t\n\r]*("(?:[^"\\]|\\.)*")'
+                 r'[ \t\n\r]*:[ \t\n\r]*')
+# The comma or brace after an object value.
+NEXT = re.compile(r'[ \t\n\r]*([,}])')
+
+
+def intern_keys(pairs):
+    """
+    Builds a JSON object with its keys interned, so every game shares one
+    copy of each field name.
+    """
+    return {sys.intern(k): v for k, v in pairs}
+
+
+class StreamReader(object):
+    """
+    Reads a games JSON file a chunk at a time, decoding one value at a time
+    so only the current chunk of text is held in memory rather than the
+    whole file.
+    """
+    def __init__(self, f, chunk_size=64 * 1024):
+        """
+        Set the file to read and how much of it to read at once.
+        """
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder(object_pairs_hook=intern_keys)
+
+    def fill(self):
+        """
+        Read the next chunk into the buffer, dropping what's been decoded.
+        Returns False at the end of the file.
+        """
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """
+        Returns the next character that isn't whitespace, or '' at the end
+        of the file.
+        """
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars):
+        """
+        Read the next character, which must be one of chars.
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError('Expecting one of %r' % (chars),
+                                       self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self):
+        """
+        Decode the next complete JSON value.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.scan_once(self.buffer, self.pos)
+            except (StopIteration, json.JSONDecodeError):
+                # The value may run on into the next chunk.
+                if self.fill():
+                    continue
+                raise json.JSONDecodeError('Expecting value', self.buffer,
+                                           self.pos)
+            # A number could be cut off at the end of the buffer.
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def items(self):
+        """
+        Yields the key and value pairs of the object that comes next.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            # Match the key and the separators around the value with
+            # regular expressions, decoding only the value itself.
+            key = KEY.match(self.buffer, self.pos)
+            try:
+                if key is None:
+                    raise StopIteration(self.pos)
+                value, end = self.decoder.scan_once(self.buffer, key.end())
+                after = NEXT.match(self.buffer, end)
+                if after is None or end == len(self.buffer):
+                    raise StopIteration(end)
+            except (StopIteration, json.JSONDecodeError):
+                # The entry may run on into the next chunk.
+                if self.fill():
+                    continue
+                raise json.JSONDecodeError('Expecting object entry',
+                                           self.buffer, self.pos)
+            self.pos = after.end()
+            name = key.group(1)
+            yield json.loads(name) if '\\' in name else name[1:-1], value
+            if after.group(1) == '}':
+                return
+
+
+# Top level objects of a games JSON file that hold entries.
+SECTIONS = ('Games', 'Settings')
+
+
+def iter_catalog(f, chunk_size=64 * 1024):
+    """
+    Yields ('Games', name, info) and ('Settings', key, value) for each
+    entry in a games JSON file, in file order. Anything else at the top
+    level is skipped.
+    """
+    reader = StreamReader(f, chunk_size)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        section = reader.value()
+        reader.expect(':')
+        if section in SECTIONS:
+            for key, value in reader.items():
+                yield section, key, value
+        else:
+            reader.value()
+        if reader.expect(',}') == '}':
+            return
+
+
+def load_catalog(path, chunk_size=64 * 1024, games=None):
+    """
+    Returns the games and settings from a games JSON file, streaming the
+    file rather than reading it in whole. The games are added to games as
+    they're read, a dict by default.
+    """
+    catalog = {'Games': {} if games is None else games, 'Settings': {}}
+    with open(path) as f:
+        for section, key, value in iter_catalog(f, chunk_size):
+            if section == 'Games' and 'pack' in value:
+                # Many games share a pack, so share the string too.
+                value['pack'] = sys.intern(value['pack'])
+            catalog[section][key] = value
+    return catalog['Games'], catalog['Settings']
@@ -0,0 +1,247 @@
+"""
+Share games lists between many sessions, for services running several
+rooms at once.
+
+A CatalogManager loads each games list once into a SharedCatalog, which
+holds the games, the player index and the play counts. Sessions only
+keep their player count and the games played so far, so thousands of
+them cost little more than their played sets.
+"""
+import os
+import random
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+from .catalog_cache import load_games
+from .index import PlayerIndex, order_games
+from .resources import catalog_path
+from .sampler import WeightedSampler
+from .stats import BACKENDS, WriteBehind, stats_path
+
+# Tries at sampling an unplayed game from the shared sampler before
+# weighing up the unplayed games directly.
+REJECTIONS = 8
+
+
+class SharedGames(Mapping):
+    """
+    Read-only mapping of game name to info over a games catalog shared by
+    many sessions. Each game's info is handed out as a read-only copy, so
+    no session can change it for the others.
+    """
+    def __init__(self, games):
+        """
+        Set the games catalog to read from.
+        """
+        self.catalog = games
+
+    def __getitem__(self, name):
+        return MappingProxyType(dict(self.catalog[name]))
+
+    def __iter__(self):
+        return iter(self.catalog)
+
+    def __len__(self):
+        return len(self.catalog)
+
+    def __contains__(self, name):
+        return name in self.catalog
+
+
+class SharedCatalog(object):
+    """
+    A games list loaded once and shared by every session picking from it:
+    the games and settings, which aren't changed, and the play counts,
+    which picks from every session add to.
+
+    Picks are made under a lock, so sessions on different threads never
+    see the counts half updated.
+    """
+    def __init__(self, name, games, settings, stats_store, flush_every=1,
+                 flush_interval=None):
+        """
+        Index the games and load their play counts. The stats are saved
+        after every flush_every picks and no more than flush_interval
+        seconds after an unsaved pick, as by a Randomizer.
+        """
+        self.name = name
+        # Only read-only views of the games and settings are handed out.
+        self.games = SharedGames(games)
+        self.settings = MappingProxyType(settings)
+        self.stats_store = stats_store
+        self.lock = threading.Lock()
+        self.write_behind = WriteBehind(self.save_stats, flush_every,
+                                        flush_interval)
+        entries = order_games(games)
+        self.games_by_players = tuple(g for g, fewest, most, weight
+                                      in entries)
+        self.index = PlayerIndex([most for g, fewest, most, weight
+                                  in entries],
+                                 [fewest for g, fewest, most, weight
+                                  in entries])
+        self.stats = stats_store.load()
+        for g in self.games_by_players:
+            self.stats.setdefault(g, 0)
+        # One sampler over every game, shared by the sessions, which
+        # skip the games they've played.
+        self.sampler = WeightedSampler(
+            [weight for g, fewest, most, weight in entries],
+            [self.stats[g] for g in self.games_by_players],
+            max(self.stats.values(), default=0))
+
+    def eligible_count(self, player_count):
+        """
+        Returns the number of games that support the number of players.
+        """
+        return self.index.eligible_count(player_count)
+
+    def pick(self, player_count, played, rng=random):
+        """
+        Pick a game for the number of players that isn't in played, the
+        set of game indexes a session has played, and count the play.
+        Once every eligible game has been played, played is cleared.
+        Returns the index of the game.
+        """
+        with self.lock:
+            eligible = self.index.eligible(player_count)
+            if not len(eligible):
+                raise IndexError('No games available for %s players.' %
+                                 (player_count))
+            end = eligible[-1] + 1
+            index = None
+            # Sampling the shared weights and skipping played or
+            # ineligible games picks with the same odds as leaving them
+            # out, and usually takes one try.
+            for i in range(REJECTIONS):
+                candidate = self.sampler.sample(end, rng)
+                if candidate not in played and \
+                        self.index.min_players[candidate] <= player_count:
+                    index = candidate
+                    break
+            if index is None:
+                # Most games are played, so weigh up the rest directly.
+                unplayed = [i for i in eligible if i not in played]
+                if not unplayed:
+                    played.clear()
+                    unplayed = list(eligible)
+                index = rng.choices(unplayed, weights=[
+                    self.sampler.weight(i) for i in unplayed])[0]
+            played.add(index)
+            game = self.games_by_players[index]
+            self.stats[game] += 1
+            self.sampler.increment(index)
+        self.write_behind.record(game, player_count)
+        return index
+
+    def save_stats(self, picks):
+        """
+        Save the play counts along with the picks since the last save.
+        """
+        with self.lock:
+            stats = dict(self.stats)
+        self.stats_store.save(stats, picks)
+
+    def flush(self):
+        """
+        Save any picks that haven't been saved yet.
+        """
+        self.write_behind.flush()
+
+
+class Session(object):
+    """
+    One group picking games from a shared catalog, keeping only its
+    player count and the games it has played.
+    """
+    __slots__ = ('catalog', 'players', 'played', 'rng')
+
+    def __init__(self, catalog, players=None, rng=random):
+        """
+        Set the catalog to pick from and the number of players.
+        """
+        self.catalog = catalog
+        self.players = players
+        # Indexes of the games played this session.
+        self.played = set()
+        self.rng = rng
+
+    def pick(self, players=None):
+        """
+        Pick a game for the session's players, or the number given, and
+        returns the game and a read-only copy of its info.
+        """
+        if players is None:
+            players = self.players
+        if players is None:
+            raise ValueError('No number of players given for the session '
+                             'or the pick.')
+        index = self.catalog.pick(players, self.played, self.rng)
+        game = self.catalog.games_by_players[index]
+        return game, self.catalog.games[game]
+
+    @property
+    def played_games(self):
+        """
+        The games played this session.
+        """
+        return {self.catalog.games_by_players[i] for i in self.played}
+
+    def reset(self):
+        """
+        Clear the games played this session.
+        """
+        self.played.clear()
+
+
+class CatalogManager(object):
+    """
+    Loads games lists from the assets on first use and hands out sessions
+    sharing them.
+    """
+    def __init__(self, stats_dir=None, stats_backend='json', flush_every=1,
+                 flush_interval=None, cache_catalog=True, verbose=False):
+        """
+        Set where the stats are kept and how they're saved, as for a
+        Randomizer. Each catalog saves its unsaved picks at exit.
+        """
+        self.stats_dir = stats_dir
+        self.stats_backend = stats_backend
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.cache_catalog = cache_catalog
+        self.verbose = verbose
+        self.catalogs = {}
+        self.lock = threading.Lock()
+
+    def catalog(self, games):
+        """
+        Returns the shared catalog of a games list, loading it the first
+        time.
+        """
+        with self.lock:
+            if games not in self.catalogs:
+                json_path = catalog_path(games)
+                path = stats_path(games, self.stats_dir)
+                cache_dir = os.path.join(os.path.dirname(path), 'cache') \
+                    if self.cache_catalog else None
+                info, settings = load_games(json_path, cache_dir,
+                                            self.verbose)
+                store = BACKENDS[self.stats_backend](path,
+                                                    verbose=self.verbose)
+                self.catalogs[games] = SharedCatalog(
+                    games, info, settings, store, self.flush_every,
+                    self.flush_interval)
+            return self.catalogs[games]
+
+    def session(self, games, players=None, rng=random):
+        """
+        Returns a new session picking from a games list.
+        """
+        return Session(self.catalog(games), players, rng)
+
+    def flush(self):
+        """
+        Save the unsaved picks of every catalog.
+        """
+        for catalog in list(self.catalogs.values()):
+            catalog.flush()
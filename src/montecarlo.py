@@ -0,0 +1,200 @@
+"""
+Compare pick weighting strategies by simulating many sessions across
+worker processes.
+
+Run with: python -m game_randomizer.montecarlo jackbox_games --players 6
+"""
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .index import PlayerIndex, player_range
+from .strategies import STRATEGIES
+
+
+def run_sessions(strategy, players, min_players, weights, occurrences,
+                 player_count, sessions, picks, seed):
+    """
+    Simulate sessions of a strategy in one process. Returns the pick
+    counts per game summed over the sessions, and the pick each session
+    had played every eligible game by (None if it never did).
+    """
+    # Each chunk of sessions gets its own random stream.
+    rng = random.Random(seed)
+    index = PlayerIndex(players, min_players)
+    end = index.eligible_count(player_count)
+    totals = [0] * len(players)
+    coverage = []
+    for s in range(sessions):
+        policy = STRATEGIES[strategy](index, weights, list(occurrences),
+                                      rng=rng)
+        count_picks = 'occurrences' in policy.UPDATES
+        seen = set()
+        covered = None
+        for i in range(picks):
+            pick = policy.pick(player_count)
+            totals[pick] += 1
+            if count_picks:
+                policy.occurred(pick)
+            if covered is None:
+                seen.add(pick)
+                if len(seen) == end:
+                    covered = i + 1
+        coverage.append(covered)
+    return totals, coverage
+
+
+class StrategyReport(object):
+    """
+    Merged results for one strategy.
+    """
+    def __init__(self, strategy, games, eligible):
+        """
+        Set up an empty report over the games, with the indexes of those
+        eligible for the player count.
+        """
+        self.strategy = strategy
+        self.games = games
+        self.eligible = eligible
+        self.totals = [0] * len(games)
+        self.coverage = []
+
+    def merge(self, totals, coverage):
+        """
+        Add a worker's results to the report.
+        """
+        self.totals = [a + b for a, b in zip(self.totals, totals)]
+        self.coverage.extend(coverage)
+
+    def shares(self):
+        """
+        Returns each eligible game's share of the picks.
+        """
+        picks = sum(self.totals) or 1
+        return {self.games[i]: self.totals[i] / picks for i in self.eligible}
+
+    def max_min_ratio(self):
+        """
+        Returns the ratio of the most to least picked eligible game.
+        """
+        totals = [self.totals[i] for i in self.eligible]
+        if not totals or min(totals) == 0:
+            return float('inf')
+        return max(totals) / min(totals)
+
+    def share_spread(self):
+        """
+        Returns the coefficient of variation of the eligible games' picks.
+        """
+        totals = [self.totals[i] for i in self.eligible]
+        if not totals:
+            return 0
+        mean = sum(totals) / len(totals)
+        if not mean:
+            return 0
+        variance = sum((t - mean) ** 2 for t in totals) / len(totals)
+        return math.sqrt(variance) / mean
+
+    def coverage_picks(self, percentile):
+        """
+        Returns a percentile of the picks it took to play every eligible
+        game, counting sessions that never did as infinite.
+        """
+        picks = sorted(c if c is not None else float('inf')
+                       for c in self.coverage)
+        if not picks:
+            return None
+        return picks[min(int(len(picks) * percentile / 100), len(picks) - 1)]
+
+
+class MonteCarlo(object):
+    """
+    Runs strategies over a Randomizer's games, fanning the sessions out
+    across worker processes.
+    """
+    def __init__(self, randomizer, workers=None, seed=0):
+        """
+        Take the games and stats from the randomizer.
+        """
+        self.games = randomizer.games_by_players
+        info = randomizer.games_list()
+        ranges = [player_range(info[g]) for g in self.games]
+        self.min_players = [fewest for fewest, most in ranges]
+        self.players = [most for fewest, most in ranges]
+        self.weights = [info[g]['weight'] for g in self.games]
+        self.occurrences = [randomizer.game_stats[g] for g in self.games]
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+
+    def run(self, strategies, player_count, sessions, picks):
+        """
+        Simulate each strategy, returning a report for each.
+        """
+        eligible = list(PlayerIndex(self.players, self.min_players)
+                        .eligible(player_count))
+        reports = {s: StrategyReport(s, self.games, eligible)
+                   for s in strategies}
+        # Split the sessions evenly across the workers.
+        chunks = [sessions // self.workers + (1 if i < sessions % self.workers
+                                              else 0)
+                  for i in range(self.workers)]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = []
+            for strategy in strategies:
+                for chunk, count in enumerate(chunks):
+                    if count:
+                        seed = '%s:%s:%s' % (self.seed, strategy, chunk)
+                        futures.append((strategy, pool.submit(
+                            run_sessions, strategy, self.players,
+                            self.min_players, self.weights,
+                            self.occurrences, player_count, count, picks,
+                            seed)))
+            for strategy, future in futures:
+                reports[strategy].merge(*future.result())
+        return reports
+
+
+def main():
+    """
+    Compare the strategies on a games list and print a summary.
+    """
+    from .app import Randomizer
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('games_json', type=str,
+                        help='The name of the JSON file ' +
+                             'containing the games information.')
+    parser.add_argument('-p', '--players', type=int, required=True)
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--picks', type=int, default=1000,
+                        help='Picks per session.')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes, defaults to the CPU count.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--strategy', action='append',
+                        choices=sorted(STRATEGIES),
+                        help='Strategy to run, defaults to all of them.')
+    args = parser.parse_args()
+    randomizer = Randomizer(args.games_json, flush_every=None)
+    # Check up front, rather than every worker failing on its first pick.
+    if not randomizer.eligible_count(args.players):
+        parser.error('No games support %s players.' % (args.players))
+    runner = MonteCarlo(randomizer, args.workers, args.seed)
+    strategies = args.strategy or list(STRATEGIES)
+    start = time.perf_counter()
+    reports = runner.run(strategies, args.players, args.sessions, args.picks)
+    elapsed = time.perf_counter() - start
+    print('%-20s %10s %10s %12s %12s' % ('strategy', 'max/min', 'spread',
+                                         'cover p50', 'cover p90'))
+    for strategy, report in reports.items():
+        print('%-20s %10.3f %10.4f %12s %12s' % (
+            strategy, report.max_min_ratio(), report.share_spread(),
+            report.coverage_picks(50), report.coverage_picks(90)))
+    total = len(strategies) * args.sessions * args.picks
+    print('%s picks in %.1fs on %s workers' % (total, elapsed,
+                                               runner.workers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+Opt-in timers and counters for the hot paths: loading, picking, saving
+the stats, decoding and resizing images and drawing roll frames.
+
+Profiling is off unless enabled with --profile or the
+GAME_RANDOMIZER_PROFILE environment variable. While it's off, timer()
+hands back one shared do-nothing context manager and count() returns
+straight away, so the instrumented code pays only for the call.
+"""
+import os
+import sys
+import json
+import atexit
+import cProfile
+import threading
+import time
+
+# Environment variables enabling profiling, and setting where to write
+# the JSON summary and the cProfile stats.
+ENV_VAR = 'GAME_RANDOMIZER_PROFILE'
+JSON_ENV_VAR = 'GAME_RANDOMIZER_PROFILE_JSON'
+CPROFILE_ENV_VAR = 'GAME_RANDOMIZER_CPROFILE'
+
+
+class NullTimer(object):
+    """
+    Context manager that does nothing, used while profiling is off.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+class Timer(object):
+    """
+    Context manager adding the time spent in its block to a profiler.
+    """
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        """
+        Set the profiler and the name of the timing.
+        """
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler(object):
+    """
+    Collects named timings and counters. Images are loaded on worker
+    threads, so updates are made under a lock.
+    """
+    def __init__(self):
+        """
+        Set up a disabled profiler with nothing recorded.
+        """
+        self.enabled = False
+        self.json_path = None
+        self.cprofile_path = None
+        self.cprofile = None
+        self.registered = False
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Clear the recorded timings and counters.
+        """
+        # Calls, total seconds and slowest call, by name.
+        self.timings = {}
+        self.counters = {}
+
+    def enable(self, json_path=None, cprofile_path=None):
+        """
+        Start recording, and print a summary at exit. The summary is also
+        written to json_path as JSON, and a cProfile of the whole run to
+        cprofile_path, if given.
+        """
+        self.enabled = True
+        self.json_path = json_path
+        self.cprofile_path = cprofile_path
+        if cprofile_path is not None and self.cprofile is None:
+            self.start_cprofile()
+        if not self.registered:
+            atexit.register(self.finish)
+            self.registered = True
+
+    def disable(self):
+        """
+        Stop recording, keeping what's been recorded so far.
+        """
+        self.enabled = False
+        self.stop_cprofile()
+
+    def timer(self, name):
+        """
+        Returns a context manager timing its block under name.
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return Timer(self, name)
+
+    def record(self, name, seconds):
+        """
+        Add one timing under name.
+        """
+        with self.lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                self.timings[name] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+
+    def count(self, name, n=1):
+        """
+        Add n to the counter called name.
+        """
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def start_cprofile(self):
+        """
+        Start capturing a cProfile of everything that runs.
+        """
+        self.cprofile = cProfile.Profile()
+        self.cprofile.enable()
+
+    def stop_cprofile(self, path=None):
+        """
+        Stop the cProfile capture, saving the stats to path if given.
+        Returns the cProfile.Profile, or None if none was running.
+        """
+        profile = self.cprofile
+        if profile is not None:
+            profile.disable()
+            self.cprofile = None
+            if path is not None:
+                profile.dump_stats(path)
+        return profile
+
+    def report(self):
+        """
+        Returns the timings in milliseconds and the counters as a dict.
+        """
+        with self.lock:
+            timers = {name: {'calls': calls,
+                             'total_ms': total * 1000,
+                             'mean_ms': total * 1000 / calls,
+                             'max_ms': slowest * 1000}
+                      for name, (calls, total, slowest)
+                      in sorted(self.timings.items())}
+            counters = dict(sorted(self.counters.items()))
+        return {'timers': timers, 'counters': counters}
+
+    def summary(self):
+        """
+        Returns the report as a text table.
+        """
+        report = self.report()
+        lines = ['%-16s %8s %12s %10s %10s' % ('timer', 'calls', 'total ms',
+                                               'mean ms', 'max ms')]
+        for name, t in report['timers'].items():
+            lines.append('%-16s %8d %12.3f %10.3f %10.3f' % (
+                name, t['calls'], t['total_ms'], t['mean_ms'], t['max_ms']))
+        if report['counters']:
+            lines.append('%-16s %8s' % ('counter', 'count'))
+            for name, value in report['counters'].items():
+                lines.append('%-16s %8d' % (name, value))
+        return '\n'.join(lines)
+
+    def finish(self):
+        """
+        Print the summary to stderr and write out the JSON report and
+        cProfile stats, if asked for.
+        """
+        if self.cprofile is not None:
+            self.stop_cprofile(self.cprofile_path)
+        if not self.enabled:
+            return
+        print(self.summary(), file=sys.stderr)
+        if self.json_path is not None:
+            with open(self.json_path, 'w') as f:
+                json.dump(self.report(), f, indent=4)
+
+
+# The profiler the app's hot paths report to.
+profiler = Profiler()
+
+
+def enable_from_env(environ=None):
+    """
+    Enable the profiler if GAME_RANDOMIZER_PROFILE is set to anything but
+    0, or either of the output paths are set. Returns whether it is on.
+    """
+    if environ is None:
+        environ = os.environ
+    json_path = environ.get(JSON_ENV_VAR) or None
+    cprofile_path = environ.get(CPROFILE_ENV_VAR) or None
+    if environ.get(ENV_VAR, '0') not in ('', '0') or json_path or \
+            cprofile_path:
+        profiler.enable(json_path, cprofile_path)
+    return profiler.enabled
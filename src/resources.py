@@ -0,0 +1,63 @@
+import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def package_dir():
+    """
+    Returns the directory the package is installed in.
+    """
+    try:
+        from importlib.resources import files
+    except ImportError:
+        # Python 3.8 and older, the package is installed unzipped.
+        return os.path.dirname(os.path.abspath(__file__))
+    return str(files('game_randomizer'))
+
+
+def asset_path(*parts):
+    """
+    Returns the path to a file in the package assets folder.
+    """
+    return os.path.join(package_dir(), 'assets', *parts)
+
+
+# Extra folders of games lists, separated like PATH.
+PATH_ENV_VAR = 'GAME_RANDOMIZER_PATH'
+
+
+def user_path(*parts):
+    """
+    Returns the path to a file in the .game_randomizer folder of the home
+    directory.
+    """
+    return os.path.join(os.path.expanduser('~'), '.game_randomizer', *parts)
+
+
+def catalog_dirs(environ=None):
+    """
+    Returns the folders searched for games lists, in order: any given in
+    GAME_RANDOMIZER_PATH, then .game_randomizer/games in the home
+    directory, then the package assets. A list in an earlier folder hides
+    one of the same name in a later one.
+    """
+    if environ is None:
+        environ = os.environ
+    dirs = [d for d in environ.get(PATH_ENV_VAR, '').split(os.pathsep) if d]
+    dirs.append(user_path('games'))
+    dirs.append(asset_path())
+    return dirs
+
+
+def catalog_path(games, dirs=None):
+    """
+    Returns the path to a games list's JSON file, from the first folder
+    that has it, or in the package assets if none do.
+    """
+    if dirs is None:
+        dirs = catalog_dirs()
+    for directory in dirs:
+        path = os.path.join(directory, f'{games}.json')
+        if os.path.isfile(path):
+            return path
+    return asset_path(f'{games}.json')
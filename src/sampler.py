@@ -0,0 +1,176 @@
+import random
+
+
+class FenwickTree(object):
+    """
+    Binary indexed tree holding running sums over a list of values.
+    """
+    def __init__(self, values):
+        """
+        Build the tree from the initial values in linear time.
+        """
+        self.size = len(values)
+        # The tree is 1-indexed, slot 0 is unused.
+        self.tree = [0] + list(values)
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+
+    def add(self, index, delta):
+        """
+        Add delta to the value at the (0-based) index.
+        """
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, end):
+        """
+        Returns the sum of the values before the (0-based) end index.
+        """
+        total = 0
+        i = min(end, self.size)
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+class WeightedSampler(object):
+    """
+    Picks items weighted by weight * (max_occurrence + 1 - occurrences).
+
+    The weights are split into two trees, one summing the weights and the
+    other summing weight * occurrences, so a change to the maximum
+    occurrence reweights every item without touching any of them.
+    Sampling, updating an item and removing or restoring an item all
+    cost O(log N).
+    """
+    def __init__(self, weights, occurrences, max_occurrence=None):
+        """
+        Build the trees from the item weights and their play counts.
+        """
+        self.weights = list(weights)
+        self.occurrences = list(occurrences)
+        self.active = [True] * len(self.weights)
+        # Default to the highest count of the items given.
+        if max_occurrence is None:
+            max_occurrence = max(self.occurrences, default=0)
+        self.max_occurrence = max_occurrence
+        # Running sums of weight, weight * occurrences and active items.
+        self.base = FenwickTree(self.weights)
+        self.scaled = FenwickTree([w * o for w, o in
+                                   zip(self.weights, self.occurrences)])
+        self.count = FenwickTree([1] * len(self.weights))
+        # Largest power of two within the tree, for the sampling descent.
+        self.top = 1 << (len(self.weights).bit_length() - 1) \
+            if self.weights else 0
+
+    def __len__(self):
+        """
+        Returns the number of items, active or not.
+        """
+        return len(self.weights)
+
+    def weight(self, index):
+        """
+        Returns the current weight of a single item.
+        """
+        if not self.active[index]:
+            return 0
+        return self.weights[index] * \
+            (self.max_occurrence + 1 - self.occurrences[index])
+
+    def total(self, end=None):
+        """
+        Returns the total weight of the active items before end.
+        """
+        if end is None:
+            end = len(self)
+        return (self.max_occurrence + 1) * self.base.prefix_sum(end) - \
+            self.scaled.prefix_sum(end)
+
+    def available(self, end=None):
+        """
+        Returns the number of active items before end.
+        """
+        if end is None:
+            end = len(self)
+        return self.count.prefix_sum(end)
+
+    def increment(self, index):
+        """
+        Record another occurrence of an item.
+        """
+        self.occurrences[index] += 1
+        if self.active[index]:
+            self.scaled.add(index, self.weights[index])
+        # Raising the maximum reweights every item at once.
+        if self.occurrences[index] > self.max_occurrence:
+            self.max_occurrence = self.occurrences[index]
+
+    def remove(self, index):
+        """
+        Exclude an item from sampling.
+        """
+        if self.active[index]:
+            self.active[index] = False
+            self.base.add(index, -self.weights[index])
+            self.scaled.add(index,
+                            -self.weights[index] * self.occurrences[index])
+            self.count.add(index, -1)
+
+    def restore(self, index):
+        """
+        Allow a removed item to be sampled again.
+        """
+        if not self.active[index]:
+            self.active[index] = True
+            self.base.add(index, self.weights[index])
+            self.scaled.add(index,
+                            self.weights[index] * self.occurrences[index])
+            self.count.add(index, 1)
+
+    def sample(self, end=None, rng=random):
+        """
+        Pick the index of an active item before end, weighted by the
+        current weights.
+        """
+        if end is None:
+            end = len(self)
+        if self.available(end) < 1:
+            raise IndexError('No items available to sample.')
+        total = self.total(end)
+        if total <= 0:
+            raise ValueError('Total of weights must be greater than zero')
+        remaining = rng.random() * total
+        # Walk down the trees to the item the target falls within.
+        scale = self.max_occurrence + 1
+        base = self.base.tree
+        scaled = self.scaled.tree
+        size = len(self)
+        pos = 0
+        step = self.top
+        while step:
+            nxt = pos + step
+            if nxt <= size:
+                value = scale * base[nxt] - scaled[nxt]
+                if value <= remaining:
+                    pos = nxt
+                    remaining -= value
+            step >>= 1
+        # Rounding in the float sums can land just past the last item or
+        # on a removed one, so fall back to a direct pick in that case.
+        if pos >= end or not self.active[pos]:
+            return self.sample_slow(end, rng)
+        return pos
+
+    def sample_slow(self, end, rng=random):
+        """
+        Pick an active item before end by building the full weight list.
+        """
+        indexes = [i for i in range(end) if self.active[i]]
+        weights = [self.weight(i) for i in indexes]
+        return rng.choices(population=indexes, weights=weights)[0]
@@ -0,0 +1,361 @@
+"""
+Serve a Randomizer over HTTP, for several rooms or stream overlays to
+share one games list and its stats.
+
+Run with: python -m game_randomizer.server jackbox_games --port 8080
+
+Endpoints, all returning JSON:
+    POST /pick?players=N   Pick a game for N players.
+    GET  /stats            The play counts.
+    GET  /games            The games and their info, or only those for N
+                           players with ?players=N.
+    GET  /settings         The games list settings.
+"""
+import argparse
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+from .watcher import CatalogWatcher
+
+# Reasons for the response statuses used.
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 500: 'Internal Server Error'}
+# Largest request body accepted.
+MAX_BODY = 64 * 1024
+
+
+class HTTPError(Exception):
+    """
+    An error to send back as a response, rather than a server error.
+    """
+    def __init__(self, status, message):
+        """
+        Set the response status and the error message.
+        """
+        super().__init__(message)
+        self.status = status
+
+
+def encode(data):
+    """
+    Returns data as compact JSON bytes.
+    """
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+class RandomizerServer(object):
+    """
+    HTTP/1.1 JSON server over a Randomizer, using asyncio so many clients
+    can stay connected at once.
+
+    Requests are handled on the event loop, and picks don't wait on
+    anything part way through, so picks are serialized and the stats are
+    never seen half updated. Give the Randomizer a flush_interval and
+    flush_every=None, as main() does, to leave saving the stats to its
+    write-behind timer thread. A save there doesn't hold any lock a pick
+    needs, so it stays off the request path.
+    """
+    def __init__(self, randomizer, host='127.0.0.1', port=8080):
+        """
+        Set the randomizer to serve and where to listen.
+        """
+        self.randomizer = randomizer
+        self.host = host
+        self.port = port
+        self.server = None
+        self.routes = {
+            '/pick': ('POST', self.pick),
+            '/stats': ('GET', self.stats),
+            '/games': ('GET', self.games),
+            '/settings': ('GET', self.settings),
+        }
+        # The full games list and settings only change on a reload, so
+        # are only encoded once until then.
+        self.encoded = {}
+
+    async def start(self):
+        """
+        Start listening. Port 0 picks a free port, set as self.port.
+        """
+        self.server = await asyncio.start_server(self.handle, self.host,
+                                                 self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """
+        Serve until cancelled.
+        """
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def watch(self, interval=1.0):
+        """
+        Reload the games list whenever the JSON file is edited, checking
+        every interval seconds until cancelled. The file is loaded on a
+        worker thread, so requests carry on meanwhile.
+        """
+        watcher = CatalogWatcher(self.randomizer, interval)
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            if await loop.run_in_executor(None, watcher.check) is not None:
+                self.encoded.clear()
+
+    async def close(self):
+        """
+        Stop listening and save any unsaved picks.
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        self.randomizer.flush()
+
+    async def handle(self, reader, writer):
+        """
+        Answer the requests on one connection until the client closes it.
+        """
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                status, data = self.dispatch(method, target, body)
+                keep_alive = version == 'HTTP/1.1' and \
+                    headers.get('connection', '').lower() != 'close'
+                writer.write(b''.join((
+                    b'HTTP/1.1 %d %s\r\n' % (status,
+                                             REASONS[status].encode()),
+                    b'Content-Type: application/json\r\n',
+                    b'Content-Length: %d\r\n' % (len(data)),
+                    b'Connection: keep-alive\r\n\r\n' if keep_alive else
+                    b'Connection: close\r\n\r\n',
+                    data)))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError, ValueError):
+            # The client went away or sent something we can't parse.
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        """
+        Returns the method, target, HTTP version, headers and body of the
+        next request, or None once the client closes the connection.
+        """
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        method, target, version = line.decode('latin-1').split()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY:
+            raise ValueError('Request body too large.')
+        body = await reader.readexactly(length) if length else b''
+        return method, target, version, headers, body
+
+    def dispatch(self, method, target, body):
+        """
+        Returns the status and JSON body of the response to a request.
+        """
+        url = urlsplit(target)
+        try:
+            if url.path not in self.routes:
+                raise HTTPError(404, 'No such endpoint %s.' % (url.path))
+            allowed, handler = self.routes[url.path]
+            if method != allowed:
+                raise HTTPError(405, 'Use %s for %s.' % (allowed, url.path))
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            # Parameters can also be given as a JSON object.
+            if body:
+                try:
+                    params.update(json.loads(body))
+                except (ValueError, TypeError):
+                    raise HTTPError(400, 'The body must be a JSON object.')
+            return 200, handler(params)
+        except HTTPError as e:
+            return e.status, encode({'error': str(e)})
+        except Exception as e:
+            # Still answer the request, rather than dropping the
+            # connection.
+            return 500, encode({'error': 'Server error: %s' % (e)})
+
+    def player_count(self, params, required=False):
+        """
+        Returns the players parameter as a number, or None if it's
+        optional and not given.
+        """
+        if 'players' not in params:
+            if required:
+                raise HTTPError(400, 'The players parameter is required.')
+            return None
+        try:
+            return int(params['players'])
+        except (TypeError, ValueError):
+            raise HTTPError(400, 'The players parameter must be a number.')
+
+    def pick(self, params):
+        """
+        Pick a game for the number of players.
+        """
+        players = self.player_count(params, required=True)
+        if not self.randomizer.eligible_count(players):
+            raise HTTPError(400, 'No games for %s players.' % (players))
+        try:
+            game, info = self.randomizer.pick_game(players,
+                                                   params.get('previous'))
+        except IndexError:
+            # A reload removed the last of the games since the check.
+            raise HTTPError(400, 'No games for %s players.' % (players))
+        return encode({'game': game, 'info': dict(info),
+                       'occurrences': self.randomizer.game_stats[game]})
+
+    def stats(self, params):
+        """
+        Returns the play counts.
+        """
+        return encode(self.randomizer.view_stats())
+
+    def games(self, params):
+        """
+        Returns the games and their info, optionally only those for a
+        number of players.
+        """
+        players = self.player_count(params)
+        if players is None:
+            if 'games' not in self.encoded:
+                self.encoded['games'] = encode(
+                    self.randomizer.snapshot_games())
+            return self.encoded['games']
+        # Take the games and the eligible ones together, so a reload
+        # can't come between them.
+        return encode(self.randomizer.snapshot_games(players))
+
+    def settings(self, params):
+        """
+        Returns the games list settings.
+        """
+        if 'settings' not in self.encoded:
+            self.encoded['settings'] = encode(self.randomizer.settings())
+        return self.encoded['settings']
+
+
+class HTTPClient(object):
+    """
+    Minimal keep-alive client for the server, for tests and load tests.
+    """
+    def __init__(self, host, port):
+        """
+        Set the server to connect to.
+        """
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        """
+        Open the connection.
+        """
+        self.reader, self.writer = await asyncio.open_connection(self.host,
+                                                                 self.port)
+
+    async def close(self):
+        """
+        Close the connection.
+        """
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+            self.writer = None
+
+    async def request(self, method, target, data=None):
+        """
+        Send a request and returns the response status and decoded JSON.
+        """
+        if self.writer is None:
+            await self.connect()
+        body = encode(data) if data is not None else b''
+        self.writer.write(b'%s %s HTTP/1.1\r\nHost: %s\r\n'
+                          b'Content-Length: %d\r\n\r\n%s' % (
+                              method.encode(), target.encode(),
+                              self.host.encode(), len(body), body))
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+
+def main():
+    """
+    Serve a games list until interrupted.
+    """
+    from .app import Randomizer
+    from .stats import BACKENDS
+    from .strategies import STRATEGIES
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0])
+    parser.add_argument('games_json', type=str,
+                        help='The name of the JSON file ' +
+                             'containing the games information.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--flush-interval', type=float, default=1.0,
+                        metavar='SECONDS',
+                        help='Save picks in the background after at most ' +
+                             'this many seconds.')
+    parser.add_argument('--stats-backend', default='json',
+                        choices=sorted(BACKENDS))
+    parser.add_argument('--strategy', default='reverse_occurrence',
+                        choices=sorted(STRATEGIES))
+    parser.add_argument('--watch', type=float, nargs='?', const=1.0,
+                        default=None, metavar='SECONDS',
+                        help='Reload the games list when the JSON file ' +
+                             'is edited, checking every SECONDS.')
+    parser.add_argument('-v', '--verbose', default=False,
+                        action='store_true')
+    args = parser.parse_args()
+    # Picks are only saved by the write-behind timer and at exit.
+    randomizer = Randomizer(args.games_json, args.verbose, flush_every=None,
+                            flush_interval=args.flush_interval,
+                            stats_backend=args.stats_backend,
+                            strategy=args.strategy)
+    server = RandomizerServer(randomizer, args.host, args.port)
+
+    async def serve():
+        await server.start()
+        print('Serving %s on http://%s:%s' % (args.games_json, server.host,
+                                               server.port))
+        if args.watch is not None:
+            asyncio.ensure_future(server.watch(args.watch))
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""
+Vectorized simulation of the Randomizer pick policy, for measuring how
+fairly it spreads plays across the games over many sessions.
+
+Run with: python -m game_randomizer.simulate jackbox_games --players 6
+"""
+import argparse
+import numpy as np
+from .index import player_range
+
+
+class Simulation(object):
+    """
+    Runs many independent sessions of the Randomizer pick policy at once,
+    with the play counts, weights and eligibility held in NumPy arrays.
+
+    Each pick weights the eligible, unplayed games by
+    weight * (max_occurrence + 1 - occurrences), and the played games are
+    reset once every eligible game has been played, as in
+    Randomizer.pick_game.
+    """
+    def __init__(self, players, weights, sessions=1000, occurrences=None,
+                 max_occurrence=None, played=None, seed=None,
+                 min_players=None):
+        """
+        Set up the sessions. players, min_players and weights hold a value
+        per game, occurrences and played the starting stats shared by every
+        session.
+        """
+        self.players = np.asarray(players)
+        if min_players is None:
+            min_players = np.ones(len(self.players), dtype=np.int64)
+        self.min_players = np.asarray(min_players)
+        self.weights = np.asarray(weights, dtype=float)
+        self.sessions = sessions
+        games = len(self.players)
+        if occurrences is None:
+            occurrences = np.zeros(games, dtype=np.int64)
+        occurrences = np.asarray(occurrences, dtype=np.int64)
+        # Every session starts from the same stats.
+        self.occurrences = np.tile(occurrences, (sessions, 1))
+        if max_occurrence is None:
+            max_occurrence = occurrences.max(initial=0)
+        self.max_occurrence = np.full(sessions, max_occurrence,
+                                      dtype=np.int64)
+        self.played = np.zeros((sessions, games), dtype=bool)
+        if played is not None:
+            self.played[:, played] = True
+        self.rng = np.random.default_rng(seed)
+        self.rows = np.arange(sessions)
+
+    @classmethod
+    def from_randomizer(cls, randomizer, sessions=1000, seed=None):
+        """
+        Set up sessions starting from a Randomizer's games and stats. The
+        games are in the order of randomizer.games_by_players.
+        """
+        games = randomizer.games_by_players
+        info = randomizer.games_list()
+        ranges = [player_range(info[g]) for g in games]
+        return cls([most for fewest, most in ranges],
+                   [info[g]['weight'] for g in games],
+                   sessions=sessions,
+                   occurrences=[randomizer.game_stats[g] for g in games],
+                   max_occurrence=randomizer.max_occurrence,
+                   played=[randomizer.game_ids[g]
+                           for g in randomizer.played_games],
+                   seed=seed,
+                   min_players=[fewest for fewest, most in ranges])
+
+    def eligible(self, player_count):
+        """
+        Returns the mask of games that support the number of players.
+        """
+        return (self.players >= player_count) & \
+            (self.min_players <= player_count)
+
+    def candidates(self, player_count):
+        """
+        Returns the mask of games each session can pick from, resetting
+        the played games of sessions that have played them all.
+        """
+        eligible = self.eligible(player_count)
+        candidates = eligible & ~self.played
+        # Reset sessions with nothing left to pick.
+        empty = ~candidates.any(axis=1) & self.played.any(axis=1)
+        if empty.any():
+            self.played[empty] = False
+            candidates[empty] = eligible
+        return candidates
+
+    def probabilities(self, player_count):
+        """
+        Returns each session's chance of picking each game next.
+        """
+        weights = self.pick_weights(self.candidates(player_count))
+        totals = weights.sum(axis=1, keepdims=True)
+        return np.divide(weights, totals, out=np.zeros_like(weights),
+                         where=totals > 0)
+
+    def pick_weights(self, candidates):
+        """
+        Returns the pick weights of the candidate games.
+        """
+        reverse_occurrence = self.max_occurrence[:, None] + 1 - \
+            self.occurrences
+        return self.weights * reverse_occurrence * candidates
+
+    def step(self, player_count, picks=None):
+        """
+        Make one pick in every session and update their stats. Returns the
+        index of the game each session picked. Picks can be given to
+        replay a known sequence instead.
+        """
+        candidates = self.candidates(player_count)
+        if picks is None:
+            if not candidates.any(axis=1).all():
+                raise IndexError('No games available for %s players.' %
+                                 (player_count))
+            # Find where a random point falls in each session's weights.
+            cumulative = np.cumsum(self.pick_weights(candidates), axis=1)
+            targets = self.rng.random(self.sessions) * cumulative[:, -1]
+            picks = (cumulative > targets[:, None]).argmax(axis=1)
+        picks = np.asarray(picks)
+        # Update the states.
+        self.occurrences[self.rows, picks] += 1
+        self.max_occurrence = np.maximum(self.max_occurrence,
+                                         self.occurrences[self.rows, picks])
+        self.played[self.rows, picks] = True
+        return picks
+
+    def run(self, player_count, picks):
+        """
+        Make a number of picks in every session, returning a Report.
+        """
+        eligible = self.eligible(player_count)
+        games = len(self.players)
+        counts = np.zeros((self.sessions, games), dtype=np.int64)
+        # Pick number when each session had played every eligible game.
+        coverage = np.full(self.sessions, -1, dtype=np.int64)
+        for i in range(picks):
+            chosen = self.step(player_count)
+            counts[self.rows, chosen] += 1
+            covered = (coverage < 0) & \
+                (counts[:, eligible] > 0).all(axis=1)
+            coverage[covered] = i + 1
+        return Report(counts, eligible, coverage)
+
+
+class Report(object):
+    """
+    Distribution metrics from a simulation run.
+    """
+    def __init__(self, counts, eligible, coverage):
+        """
+        Set the per-session pick counts, the eligible games and the pick
+        each session reached full coverage on (-1 if it never did).
+        """
+        self.counts = counts
+        self.eligible = eligible
+        self.coverage = coverage
+
+    def frequencies(self):
+        """
+        Returns each game's share of all the picks.
+        """
+        totals = self.counts.sum(axis=0)
+        return totals / max(totals.sum(), 1)
+
+    def max_min_ratio(self):
+        """
+        Returns the ratio of the most to least picked eligible game.
+        """
+        totals = self.counts.sum(axis=0)[self.eligible]
+        if not len(totals) or totals.min() == 0:
+            return float('inf')
+        return totals.max() / totals.min()
+
+    def coverage_rate(self):
+        """
+        Returns the share of sessions that played every eligible game.
+        """
+        return (self.coverage > 0).mean()
+
+    def coverage_picks(self, percentiles=(50, 90, 99)):
+        """
+        Returns percentiles of the picks it took to play every eligible
+        game, over the sessions that did.
+        """
+        covered = self.coverage[self.coverage > 0]
+        if not len(covered):
+            return {p: None for p in percentiles}
+        return dict(zip(percentiles, np.percentile(covered, percentiles)))
+
+
+def main():
+    """
+    Simulate sessions for a games list and print the distribution.
+    """
+    from .app import Randomizer
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('games_json', type=str,
+                        help='The name of the JSON file ' +
+                             'containing the games information.')
+    parser.add_argument('-p', '--players', type=int, required=True)
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--picks', type=int, default=50,
+                        help='Picks per session.')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    randomizer = Randomizer(args.games_json, flush_every=None)
+    simulation = Simulation.from_randomizer(randomizer, args.sessions,
+                                            args.seed)
+    report = simulation.run(args.players, args.picks)
+    # Most picked first.
+    frequencies = report.frequencies()
+    for i in np.argsort(-frequencies):
+        if report.eligible[i]:
+            print('%6.2f%%  %s' % (frequencies[i] * 100,
+                                   randomizer.games_by_players[i]))
+    print('Max/min ratio: %.3f' % (report.max_min_ratio()))
+    print('Sessions covering every game: %.1f%%' %
+          (report.coverage_rate() * 100))
+    for p, picks in report.coverage_picks().items():
+        print('Picks to cover every game, p%s: %s' % (p, picks))
+
+
+if __name__ == '__main__':
+    main()
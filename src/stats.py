@@ -0,0 +1,436 @@
+import os
+import json
+import atexit
+import tempfile
+import threading
+import time
+import weakref
+from functools import partial
+try:
+    import fcntl
+except ImportError:
+    # Windows has its own file locking.
+    fcntl = None
+    import msvcrt
+
+
+def file_mode(path):
+    """
+    Returns the permissions of an existing file, or those a new file gets
+    under the current umask.
+    """
+    try:
+        return os.stat(path).st_mode & 0o777
+    except OSError:
+        # The umask can only be read by setting it, so put it straight
+        # back.
+        umask = os.umask(0o022)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def atomic_write(path, text):
+    """
+    Write text to a file by way of a temporary file, so a crash mid-write
+    never leaves a truncated file behind.
+    """
+    directory = os.path.dirname(path)
+    # Ensure the directory exists.
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    # Write to a temporary file, then swap it into place. Temporary files
+    # are only readable by their owner, so give it the file's permissions.
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        os.chmod(tmp_path, file_mode(path))
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+class FileLock(object):
+    """
+    Exclusive lock on a file shared between processes, held on a separate
+    <path>.lock file so the file itself can be replaced while locked.
+
+    The lock isn't reentrant: taking it again in the same process, even
+    from the same thread, waits for it to be released.
+    """
+    def __init__(self, path):
+        """
+        Set the path of the file to lock.
+        """
+        self.path = path + '.lock'
+        self.f = None
+
+    def __enter__(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.f = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_EX)
+        else:
+            # Lock the first byte, retrying as LK_LOCK gives up after 10
+            # seconds.
+            self.f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self.f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+        else:
+            self.f.seek(0)
+            msvcrt.locking(self.f.fileno(), msvcrt.LK_UNLCK, 1)
+        self.f.close()
+        self.f = None
+        return False
+
+
+def stats_path(games, stats_dir=None):
+    """
+    Returns the path of the JSON stats file for a games list, in the
+    .game_randomizer folder of the home directory by default.
+    """
+    if stats_dir is None:
+        stats_dir = os.path.join(os.path.expanduser('~'), '.game_randomizer')
+    return os.path.join(stats_dir, '%s_stats.json' % (games))
+
+
+class JSONStats(object):
+    """
+    Stores the game occurrence stats as a single JSON map, rewritten in
+    full on every save.
+
+    Several processes can share the file: saves are made under a file
+    lock, and add the changes since this process last loaded or saved to
+    the counts on disk, rather than overwriting other processes' picks.
+    """
+    # Whether the games from load_catalog change as soon as it's called
+    # again, rather than being a copy.
+    LIVE_CATALOG = False
+
+    def __init__(self, path, verbose=False):
+        """
+        Set the path of the stats file.
+        """
+        self.path = path
+        self.verbose = verbose
+        # The counts as of the last load or save, to work out changes.
+        self.baseline = {}
+
+    def load(self):
+        """
+        Returns the stored stats, or an empty map if there are none yet.
+        """
+        stats = self.read()
+        self.baseline = dict(stats)
+        return stats
+
+    def read(self):
+        """
+        Returns the stats in the file, or an empty map if there are none.
+        """
+        try:
+            with open(self.path) as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            if self.verbose:
+                print('No stats file, creating new.')
+            return {}
+
+    def save(self, stats, picks):
+        """
+        Save the stats. The picks made since the last save are given too,
+        for backends that store them. stats is kept as the baseline, so
+        pass a copy no other thread changes.
+        """
+        with FileLock(self.path):
+            merged = self.read()
+            for game, count in stats.items():
+                merged[game] = merged.get(game, 0) + count - \
+                    self.baseline.get(game, 0)
+            atomic_write(self.path, json.dumps(merged, indent=4))
+        self.baseline = stats
+
+    def history(self):
+        """
+        Returns the recorded picks, which this backend doesn't keep.
+        """
+        return []
+
+    def load_catalog(self, json_path):
+        """
+        Returns the games and settings if the backend stores them, or None
+        to load them from the JSON file.
+        """
+        return None
+
+
+class JournalStats(JSONStats):
+    """
+    Appends a compact record of each pick to a log file, and periodically
+    compacts the counts into a snapshot.
+
+    The snapshot notes how far into the log it covers, so loading reads
+    the snapshot then replays only the tail of the log. The log itself is
+    kept as the pick history.
+
+    Several processes can share the log: appends, compaction and reads are
+    made under a file lock, and snapshots are rebuilt from the log rather
+    than taken from one process's counts.
+    """
+    def __init__(self, path, compact_every=1000, verbose=False):
+        """
+        Set up the log and snapshot paths alongside the JSON stats path.
+        """
+        super().__init__(path, verbose)
+        base = path[:-5] if path.endswith('.json') else path
+        self.log_path = base + '.log'
+        self.snapshot_path = base + '.snapshot.json'
+        # Number of logged picks between snapshots.
+        self.compact_every = compact_every
+        self.uncompacted = 0
+
+    def load(self):
+        """
+        Rebuild the stats from the snapshot and the tail of the log.
+        """
+        with FileLock(self.log_path):
+            stats, self.uncompacted = self.replay()
+        return stats
+
+    def replay(self):
+        """
+        Returns the stats from the snapshot and the tail of the log, and
+        the number of picks replayed from the log. The lock must be held.
+        """
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.loads(f.read())
+            stats = snapshot['stats']
+            offset = snapshot['offset']
+        except FileNotFoundError:
+            # Start from an existing JSON stats file if there is one.
+            stats = self.read()
+            offset = 0
+        # Skip the log if it was replaced since the snapshot was taken.
+        if self.log_size() < offset:
+            offset = 0
+        replayed = 0
+        for record in self.read_log(offset):
+            stats[record['game']] = stats.get(record['game'], 0) + 1
+            replayed += 1
+        return stats, replayed
+
+    def save(self, stats, picks):
+        """
+        Append the picks to the log, compacting it if it's due.
+        """
+        lines = ''.join(json.dumps(
+            {'game': game, 'time': timestamp, 'players': players},
+            separators=(',', ':')) + '\n'
+            for game, timestamp, players in picks)
+        with FileLock(self.log_path):
+            if lines:
+                with open(self.log_path, 'a') as f:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.uncompacted += len(picks)
+            if self.uncompacted >= self.compact_every:
+                self.compact()
+
+    def compact(self):
+        """
+        Write a snapshot of the stats covering the whole log, including
+        picks logged by other processes. The lock must be held.
+        """
+        stats, replayed = self.replay()
+        snapshot = {'offset': self.log_size(), 'stats': stats}
+        atomic_write(self.snapshot_path, json.dumps(snapshot))
+        self.uncompacted = 0
+
+    def history(self):
+        """
+        Returns every pick recorded in the log, oldest first.
+        """
+        with FileLock(self.log_path):
+            return list(self.read_log(0))
+
+    def log_size(self):
+        """
+        Returns the size of the log file in bytes.
+        """
+        try:
+            return os.path.getsize(self.log_path)
+        except FileNotFoundError:
+            return 0
+
+    def read_log(self, offset):
+        """
+        Yields the pick records in the log from the given byte offset.
+        """
+        try:
+            f = open(self.log_path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(offset)
+            end = offset
+            for line in f:
+                # A crash can leave the last record half written.
+                if not line.endswith(b'\n'):
+                    break
+                end += len(line)
+                yield json.loads(line)
+        # Drop any partial record so new picks start on a fresh line.
+        if end < self.log_size():
+            os.truncate(self.log_path, end)
+
+
+class SQLiteStats(JSONStats):
+    """
+    Keeps the games list, settings and play counts in a SQLite database,
+    updating only the rows for the games picked.
+    """
+    LIVE_CATALOG = True
+
+    def __init__(self, path, verbose=False):
+        """
+        Open the database alongside the JSON stats path.
+        """
+        super().__init__(path, verbose)
+        # Only load sqlite when this backend is used.
+        from .store import SQLiteStore
+        base = path[:-5] if path.endswith('.json') else path
+        self.store = SQLiteStore(base + '.db')
+
+    def load_catalog(self, json_path):
+        """
+        Returns the games and settings from the database, importing the
+        games JSON file first if it's new or has changed.
+        """
+        from .store import GameTable
+        if self.store.sync(json_path) and self.verbose:
+            print(f'Imported games from { json_path }')
+        return GameTable(self.store), self.store.settings()
+
+    def load(self):
+        """
+        Returns the play counts, taking them from an existing JSON stats
+        file the first time.
+        """
+        stats = self.store.stats()
+        if not stats:
+            stats = self.store.import_stats(super().load())
+        return stats
+
+    def save(self, stats, picks):
+        """
+        Add the picks to the play counts.
+        """
+        self.store.add_picks(game for game, timestamp, players in picks)
+
+
+def flush_at_exit(ref):
+    """
+    Save the unsaved picks of a WriteBehind at exit, if it's still around.
+    """
+    write_behind = ref()
+    if write_behind is not None:
+        write_behind.flush()
+
+
+class WriteBehind(object):
+    """
+    Holds picks back from the stats backend, saving them after every
+    flush_every picks and no more than flush_interval seconds after an
+    unsaved pick. Set both to None to only save them on flush() and at
+    exit.
+
+    The exit hook only holds a weak reference, so whatever owns the
+    WriteBehind can still be freed before exit.
+    """
+    def __init__(self, save, flush_every=1, flush_interval=None):
+        """
+        Set the function saving a list of (game, time, player count)
+        picks, and when to call it.
+        """
+        self.save = save
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.pending_picks = []
+        self.timer = None
+        # The lock guards the pending picks and the timer, and is never
+        # held while saving, so picks don't wait on the disk. Saves take
+        # turns under the save lock, so they're made in order.
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        # Make sure buffered picks are saved when the app exits.
+        self.exit_hook = partial(flush_at_exit, weakref.ref(self))
+        atexit.register(self.exit_hook)
+
+    def record(self, game, player_count):
+        """
+        Note an unsaved pick, saving the picks once the limits are reached.
+        """
+        with self.lock:
+            self.pending_picks.append((game, time.time(), player_count))
+            pending = len(self.pending_picks)
+            # Start the clock on the oldest unsaved pick.
+            if self.flush_interval is not None and self.timer is None:
+                self.timer = threading.Timer(self.flush_interval,
+                                             self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        if self.flush_every is not None and pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """
+        Save any picks that haven't been saved yet.
+        """
+        with self.save_lock:
+            with self.lock:
+                # Stop any pending timed flush, we're doing it now.
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+                # Take the picks, so new ones start a fresh list.
+                picks, self.pending_picks = self.pending_picks, []
+            if not picks:
+                return
+            try:
+                self.save(picks)
+            except BaseException:
+                # Keep the picks to try again with the next save.
+                with self.lock:
+                    self.pending_picks[:0] = picks
+                raise
+
+    def close(self):
+        """
+        Save any unsaved picks and remove the exit hook.
+        """
+        self.flush()
+        atexit.unregister(self.exit_hook)
+
+
+# Stats backends by name.
+BACKENDS = {
+    'json': JSONStats,
+    'journal': JournalStats,
+    'sqlite': SQLiteStats,
+}
@@ -0,0 +1,318 @@
+import os
+import json
+import sqlite3
+import threading
+from collections.abc import Mapping
+from .index import player_range
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    name TEXT PRIMARY KEY,
+    pack TEXT NOT NULL DEFAULT '',
+    players INTEGER NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    image TEXT NOT NULL DEFAULT '',
+    weight REAL NOT NULL DEFAULT 1,
+    min_players INTEGER NOT NULL DEFAULT 1,
+    tags TEXT NOT NULL DEFAULT '[]',
+    duration INTEGER,
+    extras TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS games_players ON games (players);
+CREATE INDEX IF NOT EXISTS games_pack ON games (pack);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    game TEXT PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Game fields stored as columns, in table order.
+GAME_FIELDS = ('pack', 'players', 'description', 'image', 'weight',
+               'min_players', 'tags', 'duration', 'extras')
+# Fields of the games JSON with a column, the rest are kept as JSON in
+# the extras column.
+KNOWN_FIELDS = frozenset(GAME_FIELDS[:-1] + ('max_players',))
+
+# Game columns added since the first version, with their definitions.
+ADDED_COLUMNS = [
+    ('min_players', 'INTEGER NOT NULL DEFAULT 1'),
+    ('tags', "TEXT NOT NULL DEFAULT '[]'"),
+    ('duration', 'INTEGER'),
+    ('extras', "TEXT NOT NULL DEFAULT '{}'"),
+]
+
+
+def game_info(row):
+    """
+    Returns the info for a game from its columns. Optional fields are left
+    out when they aren't set, as in the games JSON.
+    """
+    info = dict(zip(GAME_FIELDS, row))
+    info['tags'] = json.loads(info['tags'])
+    info.update(json.loads(info.pop('extras')))
+    for field, default in (('min_players', 1), ('tags', []),
+                           ('duration', None)):
+        if info[field] == default:
+            del info[field]
+    return info
+
+
+class SQLiteStore(object):
+    """
+    SQLite database holding a games list, its settings and play counts.
+    """
+    def __init__(self, path):
+        """
+        Open the database, creating the tables if needed.
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        # The stats can be flushed from a timer thread, so share the
+        # connection behind a lock.
+        self.lock = threading.RLock()
+        # Other processes can hold the database while writing, so wait
+        # for them rather than failing.
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # Write-ahead logging lets readers carry on during writes.
+        self.db.execute('PRAGMA journal_mode=WAL')
+        with self.lock, self.db:
+            self.db.executescript(SCHEMA)
+            self.upgrade()
+
+    def upgrade(self):
+        """
+        Add any columns missing from a database made by an older version,
+        and have the games imported again to fill them in.
+        """
+        columns = [r[1] for r in self.db.execute('PRAGMA table_info(games)')]
+        for column, definition in ADDED_COLUMNS:
+            if column not in columns:
+                self.db.execute('ALTER TABLE games ADD COLUMN %s %s' %
+                                (column, definition))
+                self.db.execute("DELETE FROM meta WHERE key = 'source'")
+
+    def close(self):
+        """
+        Close the database.
+        """
+        with self.lock:
+            self.db.close()
+
+    def import_json(self, data, source=None):
+        """
+        Replace the games and settings with those from a games JSON
+        structure, keeping the play counts. The source file, if given, is
+        noted so sync() can tell when it changes.
+        """
+        games = ((name, info.get('pack', ''), player_range(info)[1],
+                  info.get('description', ''), info.get('image', ''),
+                  info.get('weight', 1), player_range(info)[0],
+                  json.dumps(info.get('tags', [])), info.get('duration'),
+                  json.dumps({k: v for k, v in info.items()
+                              if k not in KNOWN_FIELDS}))
+                 for name, info in data['Games'].items())
+        settings = ((k, json.dumps(v)) for k, v in data['Settings'].items())
+        with self.lock, self.db:
+            self.db.execute('DELETE FROM games')
+            # Name the columns, upgraded databases may order them
+            # differently.
+            self.db.executemany(
+                'INSERT INTO games (name, %s) VALUES (?%s)' %
+                (', '.join(GAME_FIELDS), ', ?' * len(GAME_FIELDS)), games)
+            self.db.execute('DELETE FROM settings')
+            self.db.executemany('INSERT INTO settings VALUES (?, ?)',
+                                settings)
+            if source is not None:
+                self.db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                                ('source', self.source_key(source)))
+
+    def import_file(self, json_path):
+        """
+        Import a games JSON file.
+        """
+        with open(json_path) as f:
+            self.import_json(json.loads(f.read()), source=json_path)
+
+    def export_json(self):
+        """
+        Returns the games and settings in the games JSON structure.
+        """
+        return {'Games': {name: dict(info) for name, info in self.games()},
+                'Settings': self.settings()}
+
+    def export_file(self, json_path):
+        """
+        Write the games and settings out as a games JSON file.
+        """
+        with open(json_path, 'w') as f:
+            json.dump(self.export_json(), f, indent=4)
+
+    def source_key(self, json_path):
+        """
+        Returns a key identifying the current version of a JSON file.
+        """
+        info = os.stat(json_path)
+        return '%s:%s:%s' % (os.path.abspath(json_path), info.st_mtime_ns,
+                             info.st_size)
+
+    def sync(self, json_path):
+        """
+        Import a games JSON file unless it's already been imported
+        unchanged. Returns True if it was imported.
+        """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT value FROM meta WHERE key = 'source'").fetchone()
+        if row is not None and row[0] == self.source_key(json_path):
+            return False
+        self.import_file(json_path)
+        return True
+
+    def settings(self):
+        """
+        Returns the settings.
+        """
+        with self.lock:
+            rows = self.db.execute('SELECT key, value FROM settings')
+            return {k: json.loads(v) for k, v in rows}
+
+    def game(self, name):
+        """
+        Returns the info for a single game.
+        """
+        with self.lock:
+            row = self.db.execute(
+                'SELECT %s FROM games WHERE name = ?' %
+                (', '.join(GAME_FIELDS)), (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return game_info(row)
+
+    def games(self, players=None, pack=None):
+        """
+        Yields (name, info) for the games, optionally only those that
+        support a number of players or are from a pack.
+        """
+        query = 'SELECT name, %s FROM games' % (', '.join(GAME_FIELDS))
+        conditions = []
+        params = []
+        if players is not None:
+            conditions.append('players >= ? AND min_players <= ?')
+            params.extend([players, players])
+        if pack is not None:
+            conditions.append('pack = ?')
+            params.append(pack)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        with self.lock:
+            cursor = self.db.execute(query, params)
+        # Read the rows in batches rather than all at once.
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            for row in rows:
+                yield row[0], game_info(row[1:])
+
+    def count(self):
+        """
+        Returns the number of games.
+        """
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM games').fetchone()[0]
+
+    def names(self):
+        """
+        Returns the game names.
+        """
+        with self.lock:
+            return [r[0] for r in self.db.execute('SELECT name FROM games')]
+
+    def contains(self, name):
+        """
+        Returns whether there's a game with the given name.
+        """
+        with self.lock:
+            return self.db.execute('SELECT 1 FROM games WHERE name = ?',
+                                   (name,)).fetchone() is not None
+
+    def stats(self):
+        """
+        Returns the play counts.
+        """
+        with self.lock:
+            return dict(self.db.execute('SELECT game, count FROM stats'))
+
+    def set_stats(self, stats):
+        """
+        Replace the play counts.
+        """
+        with self.lock, self.db:
+            self.db.execute('DELETE FROM stats')
+            self.db.executemany('INSERT INTO stats VALUES (?, ?)',
+                                stats.items())
+
+    def import_stats(self, stats):
+        """
+        Set the play counts if there aren't any yet, checking and setting
+        them in one transaction so picks saved by another process in the
+        meantime aren't replaced. Returns the play counts.
+        """
+        with self.lock, self.db:
+            # Take the write lock before checking.
+            self.db.execute('BEGIN IMMEDIATE')
+            if self.db.execute('SELECT 1 FROM stats').fetchone() is None:
+                self.db.executemany('INSERT INTO stats VALUES (?, ?)',
+                                    stats.items())
+            return dict(self.db.execute('SELECT game, count FROM stats'))
+
+    def add_picks(self, games):
+        """
+        Add a play to the count of each game given, in one transaction.
+        """
+        with self.lock, self.db:
+            self.db.executemany(
+                'INSERT INTO stats VALUES (?, 1) ON CONFLICT (game) '
+                'DO UPDATE SET count = count + 1', ((g,) for g in games))
+
+
+class GameTable(Mapping):
+    """
+    Read-only mapping of game name to info backed by a SQLiteStore, so
+    game info is only loaded when it's looked up.
+    """
+    def __init__(self, store):
+        """
+        Set the store to read from.
+        """
+        self.store = store
+
+    def __getitem__(self, name):
+        return self.store.game(name)
+
+    def __iter__(self):
+        return iter(self.store.names())
+
+    def __len__(self):
+        return self.store.count()
+
+    def __contains__(self, name):
+        return self.store.contains(name)
+
+    def items(self):
+        """
+        Returns the games and their info in a single query.
+        """
+        return self.store.games()
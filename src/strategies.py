@@ -0,0 +1,339 @@
+import bisect
+import random
+from .sampler import WeightedSampler
+
+
+class Strategy(object):
+    """
+    Base class for the rules used to pick a game.
+
+    A strategy is given the player index and each game's weight and play
+    count, in index order, and keeps whatever state it needs to pick from
+    them. UPDATES lists the updates it needs from the Randomizer, so
+    strategies that don't use them don't pay for them:
+
+    occurrences - occurred() is called whenever a game's play count goes
+                  up.
+    """
+    UPDATES = frozenset()
+
+    def __init__(self, index, weights, occurrences, max_occurrence=None,
+                 rng=random):
+        """
+        Set up the strategy's state.
+        """
+        self.index = index
+        self.rng = rng
+        # Indexes of the games played this session.
+        self.played = set()
+
+    def pick(self, player_count):
+        """
+        Returns the index of the game picked for the number of players.
+        """
+        raise NotImplementedError
+
+    def occurred(self, index):
+        """
+        Note another play of a game.
+        """
+        pass
+
+    def set_index(self, index):
+        """
+        Pick from a different view of the same games, such as one limited
+        by a filter.
+        """
+        self.index = index
+
+    def set_played(self, indexes):
+        """
+        Mark games as already played this session.
+        """
+        self.played.update(indexes)
+
+    def reset(self):
+        """
+        Clear the games played this session.
+        """
+        self.played = set()
+
+
+class ReverseOccurrence(Strategy):
+    """
+    The default strategy. Games are weighted by
+    weight * (max_occurrence + 1 - occurrences) so the least played are
+    favoured, and aren't repeated until every game for the player count
+    has been played.
+    """
+    UPDATES = frozenset(['occurrences'])
+
+    def __init__(self, index, weights, occurrences, max_occurrence=None,
+                 rng=random):
+        """
+        Set up the weighted sampler in index order.
+        """
+        super().__init__(index, weights, occurrences, max_occurrence, rng)
+        self.sampler = WeightedSampler(weights, occurrences, max_occurrence)
+        # Samplers over the eligible games for player counts where they
+        # aren't a prefix of the index, by player count.
+        self.subsamplers = {}
+
+    def pick(self, player_count):
+        """
+        Returns the index of the game picked for the number of players.
+        """
+        eligible = self.index.eligible(player_count)
+        # Prefixes of the index can use the main sampler directly.
+        if isinstance(eligible, range):
+            sampler, end = self.sampler, len(eligible)
+        else:
+            sampler, end = self.subsampler(player_count), None
+        # Reset games played if we've gone through the entire list, as
+        # long as there are games to go through.
+        if sampler.available(end) < 1 and len(self.played) > 0 and \
+                len(eligible):
+            self.reset()
+        index = eligible[sampler.sample(end, self.rng)]
+        for sampler, i in self.samplers(index):
+            sampler.remove(i)
+        self.played.add(index)
+        return index
+
+    def subsampler(self, player_count):
+        """
+        Returns the sampler over the eligible games for a player count,
+        setting it up from the main sampler the first time.
+        """
+        if player_count not in self.subsamplers:
+            eligible = self.index.eligible(player_count)
+            sampler = WeightedSampler(
+                [self.sampler.weights[i] for i in eligible],
+                [self.sampler.occurrences[i] for i in eligible],
+                self.sampler.max_occurrence)
+            for i, index in enumerate(eligible):
+                if not self.sampler.active[index]:
+                    sampler.remove(i)
+            self.subsamplers[player_count] = (eligible, sampler)
+        return self.subsamplers[player_count][1]
+
+    def samplers(self, index):
+        """
+        Yields each sampler holding a game, with its position in that
+        sampler.
+        """
+        yield self.sampler, index
+        for eligible, sampler in self.subsamplers.values():
+            i = bisect.bisect_left(eligible, index)
+            if i < len(eligible) and eligible[i] == index:
+                yield sampler, i
+
+    def set_index(self, index):
+        """
+        Pick from a different view of the same games, such as one limited
+        by a filter.
+        """
+        super().set_index(index)
+        self.subsamplers = {}
+
+    def occurred(self, index):
+        """
+        Note another play of a game.
+        """
+        for sampler, i in self.samplers(index):
+            sampler.increment(i)
+        # Every sampler weights against the same most played game.
+        for eligible, sampler in self.subsamplers.values():
+            sampler.max_occurrence = self.sampler.max_occurrence
+
+    def set_played(self, indexes):
+        """
+        Mark games as already played this session.
+        """
+        # The indexes are read twice, so take a copy of any generator.
+        indexes = list(indexes)
+        super().set_played(indexes)
+        for index in indexes:
+            for sampler, i in self.samplers(index):
+                sampler.remove(i)
+
+    def reset(self):
+        """
+        Clear the games played this session.
+        """
+        for index in self.played:
+            for sampler, i in self.samplers(index):
+                sampler.restore(i)
+        super().reset()
+
+
+class PureWeight(ReverseOccurrence):
+    """
+    Games are picked by their weight alone, without repeats until every
+    game for the player count has been played.
+    """
+    UPDATES = frozenset()
+
+    def __init__(self, index, weights, occurrences, max_occurrence=None,
+                 rng=random):
+        """
+        Set up the weighted sampler without the play counts.
+        """
+        super().__init__(index, weights, [0] * len(weights), 0, rng)
+
+
+class Uniform(Strategy):
+    """
+    Every game for the player count is equally likely, without repeats
+    until they've all been played. Picks cost O(1), using a pool of the
+    unplayed games that picked games are swapped out of.
+    """
+    def __init__(self, index, weights, occurrences, max_occurrence=None,
+                 rng=random):
+        """
+        Set up an empty pool.
+        """
+        super().__init__(index, weights, occurrences, max_occurrence, rng)
+        self.pool = []
+        self.pool_count = None
+
+    def pick(self, player_count):
+        """
+        Returns the index of the game picked for the number of players.
+        """
+        eligible = self.index.eligible(player_count)
+        # Rebuild the pool when the player count changes.
+        if player_count != self.pool_count:
+            self.pool = [i for i in eligible if i not in self.played]
+            self.pool_count = player_count
+        # Reset games played if we've gone through the entire list.
+        if not self.pool:
+            if not self.played or not len(eligible):
+                raise IndexError('No games available for %s players.' %
+                                 (player_count))
+            self.reset()
+            self.pool = list(eligible)
+            self.pool_count = player_count
+        # Swap a random game to the end of the pool and take it.
+        pos = self.rng.randrange(len(self.pool))
+        self.pool[pos], self.pool[-1] = self.pool[-1], self.pool[pos]
+        index = self.pool.pop()
+        self.played.add(index)
+        return index
+
+    def set_played(self, indexes):
+        """
+        Mark games as already played this session.
+        """
+        super().set_played(indexes)
+        self.pool_count = None
+
+    def set_index(self, index):
+        """
+        Pick from a different view of the same games, such as one limited
+        by a filter.
+        """
+        super().set_index(index)
+        self.pool_count = None
+
+    def reset(self):
+        """
+        Clear the games played this session, and the pool left without
+        them.
+        """
+        super().reset()
+        self.pool = []
+        self.pool_count = None
+
+
+class RecentDecay(Strategy):
+    """
+    Games are weighted by weight * (1 - decay ** picks since last played),
+    so recently played games are unlikely and the penalty fades away.
+    Repeats are allowed.
+    """
+    def __init__(self, index, weights, occurrences, max_occurrence=None,
+                 rng=random, decay=0.9):
+        """
+        Set up the games with none played yet.
+        """
+        super().__init__(index, weights, occurrences, max_occurrence, rng)
+        self.weights = list(weights)
+        self.decay = decay
+        self.last_played = [None] * len(weights)
+        self.picks = 0
+
+    def pick(self, player_count):
+        """
+        Returns the index of the game picked for the number of players.
+        """
+        eligible = self.index.eligible(player_count)
+        weights = [self.weights[i] if self.last_played[i] is None else
+                   self.weights[i] *
+                   (1 - self.decay ** (self.picks - self.last_played[i]))
+                   for i in eligible]
+        index = self.rng.choices(eligible, weights=weights)[0]
+        self.last_played[index] = self.picks
+        self.picks += 1
+        return index
+
+
+class RoundRobin(Strategy):
+    """
+    Plays every game for the player count once, in a random order, before
+    any repeats.
+    """
+    def __init__(self, index, weights, occurrences, max_occurrence=None,
+                 rng=random):
+        """
+        Set up an empty round.
+        """
+        super().__init__(index, weights, occurrences, max_occurrence, rng)
+        self.queue = []
+        self.queue_count = None
+
+    def pick(self, player_count):
+        """
+        Returns the index of the game picked for the number of players.
+        """
+        eligible = self.index.eligible(player_count)
+        # Start a new round when this one is done or the players change.
+        if not self.queue or player_count != self.queue_count:
+            if not len(eligible):
+                raise IndexError('No games available for %s players.' %
+                                 (player_count))
+            self.queue = [i for i in eligible if i not in self.played]
+            if not self.queue:
+                self.reset()
+                self.queue = list(eligible)
+            self.rng.shuffle(self.queue)
+            self.queue_count = player_count
+        index = self.queue.pop()
+        self.played.add(index)
+        return index
+
+    def set_index(self, index):
+        """
+        Pick from a different view of the same games, such as one limited
+        by a filter.
+        """
+        super().set_index(index)
+        self.queue = []
+
+    def reset(self):
+        """
+        Clear the games played this session, and the round left without
+        them.
+        """
+        super().reset()
+        self.queue = []
+
+
+# Strategies by name.
+STRATEGIES = {
+    'reverse_occurrence': ReverseOccurrence,
+    'pure_weight': PureWeight,
+    'uniform': Uniform,
+    'recent_decay': RecentDecay,
+    'round_robin': RoundRobin,
+}
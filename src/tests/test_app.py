@@ -1,6 +1,14 @@
 import unittest
+import gc
 import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import weakref
 from .. import app
+from ..filters import Query
 
 
 # Unit Tests JSON file
@@ -94,6 +102,206 @@ class TestRandomizer(unittest.TestCase):
         game, info = self.randomizer.pick_game(4, 'Game2')
         self.assertIn(game, 'Game1')
 
+    def test_eligible_games(self):
+        """
+        Test the player count index returns only supported games.
+        """
+        self.assertEqual(self.randomizer.eligible_games(2),
+                         ['Game1', 'Game2'])
+        self.assertEqual(self.randomizer.eligible_games(3), ['Game1'])
+        self.assertEqual(self.randomizer.eligible_games(5), [])
+
+    def test_player_counts(self):
+        """
+        Test lists without player minimums offer 2 up to Max_Players.
+        """
+        self.assertEqual(self.randomizer.player_counts(), [2, 3, 4])
+        self.randomizer.game_settings['Max_Players'] = 3
+        self.assertEqual(self.randomizer.player_counts(), [2, 3])
+        # Counts no game supports aren't offered.
+        self.randomizer.game_settings['Max_Players'] = 8
+        self.assertEqual(self.randomizer.player_counts(), [2, 3, 4])
+
+    def test_player_ranges(self):
+        """
+        Test games needing more players aren't picked for fewer.
+        """
+        self.randomizer.game_info['Game1']['min_players'] = 3
+        self.randomizer.build_index()
+        self.assertEqual(self.randomizer.eligible_games(2), ['Game2'])
+        self.assertEqual(self.randomizer.eligible_games(3), ['Game1'])
+        self.assertEqual(self.randomizer.player_counts(), [1, 2, 3, 4])
+        for i in range(3):
+            game, info = self.randomizer.pick_game(2, None)
+            self.assertEqual(game, 'Game2')
+
+    def test_played_games_reset(self):
+        """
+        Test played games are tracked and reset once all have been played.
+        """
+        first, info = self.randomizer.pick_game(2, None)
+        second, info = self.randomizer.pick_game(2, None)
+        # Both games get played before either repeats.
+        self.assertEqual({first, second}, {'Game1', 'Game2'})
+        self.assertEqual(self.randomizer.played_games, {'Game1', 'Game2'})
+        # The next roll starts the list over.
+        self.randomizer.pick_game(2, None)
+        self.assertEqual(len(self.randomizer.played_games), 1)
+        # The running maximum matches the stats.
+        self.assertEqual(self.randomizer.max_occurrence,
+                         max(self.randomizer.game_stats.values()))
+
+    def test_played_after_rebuild(self):
+        """
+        Test games played this session stay excluded after the index is
+        rebuilt.
+        """
+        first, info = self.randomizer.pick_game(2, None)
+        self.randomizer.build_index()
+        self.assertEqual(self.randomizer.played_games, {first})
+        # The played game has no chance of being picked.
+        sampler = self.randomizer.strategy.sampler
+        self.assertEqual(sampler.weight(self.randomizer.game_ids[first]), 0)
+
+    def test_played_after_filter(self):
+        """
+        Test games played this session stay excluded when the filter
+        changes and the index is rebuilt.
+        """
+        for seed in range(10):
+            self.randomizer.reset_played()
+            random.seed(seed)
+            first, info = self.randomizer.pick_game(3, None)
+            self.randomizer.set_filter(Query(['Pack1', 'Pack2']))
+            self.randomizer.build_index()
+            self.assertEqual(self.randomizer.played_games, {first})
+            second, info = self.randomizer.pick_game(2, None)
+            self.assertEqual((first, second), ('Game1', 'Game2'))
+            self.randomizer.set_filter(None)
+
+    def test_write_behind(self):
+        """
+        Test stats are only written once the flush limits are reached.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            randomizer = app.Randomizer(self.games_file, self.verbose,
+                                        flush_every=3, stats_dir=tmp)
+            # The first two picks are held back.
+            randomizer.pick_game(2, None)
+            randomizer.pick_game(2, None)
+            self.assertFalse(os.path.exists(randomizer.stats_file))
+            self.assertEqual(len(randomizer.pending_picks), 2)
+            # The third pick writes them all out.
+            randomizer.pick_game(2, None)
+            self.assertEqual(randomizer.pending_picks, [])
+            with open(randomizer.stats_file) as f:
+                self.assertEqual(sum(json.load(f).values()),
+                                 sum(randomizer.game_stats.values()))
+            # An explicit flush writes anything left over.
+            randomizer.pick_game(2, None)
+            randomizer.flush()
+            with open(randomizer.stats_file) as f:
+                self.assertEqual(json.load(f), randomizer.game_stats)
+            # Only the stats file, its lock file and the games cache are
+            # left behind.
+            self.assertEqual(sorted(os.listdir(tmp)),
+                             ['cache', 'unit_tests_stats.json',
+                              'unit_tests_stats.json.lock'])
+
+    def test_released(self):
+        """
+        Test a randomizer can be freed before exit, and close() saves its
+        picks.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            randomizer = app.Randomizer(self.games_file, self.verbose,
+                                        flush_every=None, stats_dir=tmp)
+            randomizer.pick_game(2, None)
+            randomizer.close()
+            with open(randomizer.stats_file) as f:
+                self.assertEqual(sum(json.load(f).values()), 1)
+            ref = weakref.ref(randomizer)
+            del randomizer
+            gc.collect()
+            self.assertIsNone(ref())
+
+    def test_saved_copy(self):
+        """
+        Test the stats are copied for saving, so a pick or reload on
+        another thread can't change them part way through.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            randomizer = app.Randomizer(self.games_file, self.verbose,
+                                        flush_every=1, stats_dir=tmp)
+            saved = []
+            save = randomizer.stats_store.save
+            randomizer.stats_store.save = lambda stats, picks: (
+                saved.append(stats), save(stats, picks))
+            randomizer.pick_game(2, None)
+            self.assertEqual(saved, [randomizer.game_stats])
+            self.assertIsNot(saved[0], randomizer.game_stats)
+
+    def test_flush_interval(self):
+        """
+        Test unsaved picks are written once the flush interval passes.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            randomizer = app.Randomizer(self.games_file, self.verbose,
+                                        flush_every=None, flush_interval=0.05,
+                                        stats_dir=tmp)
+            randomizer.pick_game(2, None)
+            timer = randomizer.flush_timer
+            self.assertFalse(os.path.exists(randomizer.stats_file))
+            # Wait for the timed flush to finish.
+            timer.join()
+            self.assertTrue(os.path.exists(randomizer.stats_file))
+            self.assertEqual(randomizer.pending_picks, [])
+
+    def test_sqlite_backend(self):
+        """
+        Test picking games with the games and stats in SQLite.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            randomizer = app.Randomizer(self.games_file, self.verbose,
+                                        stats_backend='sqlite', stats_dir=tmp)
+            self.assertEqual(len(randomizer.games_list()), 2)
+            game, info = randomizer.pick_game(3, None)
+            self.assertEqual(game, 'Game1')
+            self.assertEqual(info, TEST_DATA['Games']['Game1'])
+            # The stats are kept between sessions.
+            randomizer = app.Randomizer(self.games_file, self.verbose,
+                                        stats_backend='sqlite', stats_dir=tmp)
+            self.assertEqual(randomizer.view_stats(),
+                             {'Game1': 1, 'Game2': 0})
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_cli_imports(self):
+        """
+        Test loading the app doesn't load the GUI or pkg_resources.
+        """
+        check = ('import sys, game_randomizer.app; '
+                 'print([m for m in ("tkinter", "PIL", "pkg_resources") '
+                 'if m in sys.modules])')
+        result = subprocess.run([sys.executable, '-c', check],
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    def test_cli_no_games(self):
+        """
+        Test asking for more players than any game supports gives a usage
+        error rather than a traceback.
+        """
+        run = ('import sys; from game_randomizer.app import cli_app; '
+               'sys.argv[1:] = ["unit_tests", "--players", "9", '
+               '"--count", "2"]; cli_app()')
+        result = subprocess.run([sys.executable, '-c', run],
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 2)
+        self.assertIn('No games support 9 players.', result.stderr)
+        self.assertNotIn('Traceback', result.stderr)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from .. import catalog
+from .test_app import TEST_DATA
+
+
+class TestGameCatalog(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a catalog of the test games.
+        """
+        self.catalog = catalog.GameCatalog(TEST_DATA['Games'].items())
+
+    def test_records(self):
+        """
+        Test the records read the same as the games' dicts.
+        """
+        self.assertEqual(len(self.catalog), 2)
+        self.assertEqual(list(self.catalog), ['Game1', 'Game2'])
+        self.assertIn('Game1', self.catalog)
+        self.assertNotIn('Game3', self.catalog)
+        self.assertRaises(KeyError, self.catalog.__getitem__, 'Game3')
+        for name, info in self.catalog.items():
+            self.assertEqual(info, TEST_DATA['Games'][name])
+            self.assertEqual(dict(info), TEST_DATA['Games'][name])
+        info = self.catalog['Game1']
+        self.assertEqual(info['players'], 4)
+        self.assertEqual(info.get('min_players', 1), 1)
+        self.assertRaises(KeyError, info.__getitem__, 'tags')
+
+    def test_changes(self):
+        """
+        Test games and fields can be changed, including fields the columns
+        don't cover.
+        """
+        self.catalog['Game3'] = {'pack': 'Pack3', 'min_players': 3,
+                                 'max_players': 8, 'description': 'Ünïcode',
+                                 'tags': ['drawing'], 'weight': 0.5}
+        info = self.catalog['Game3']
+        self.assertEqual(dict(info), {'pack': 'Pack3', 'players': 8,
+                                      'min_players': 3,
+                                      'description': 'Ünïcode', 'image': '',
+                                      'weight': 0.5, 'tags': ['drawing']})
+        info['description'] = 'Changed'
+        info['duration'] = 20
+        del info['tags']
+        self.assertEqual(self.catalog['Game3']['description'], 'Changed')
+        self.assertEqual(self.catalog['Game3']['duration'], 20)
+        self.assertNotIn('tags', self.catalog['Game3'])
+        self.assertRaises(TypeError, info.__delitem__, 'players')
+        # Replacing a game keeps its place.
+        self.catalog['Game1'] = dict(TEST_DATA['Games']['Game2'])
+        self.assertEqual(list(self.catalog), ['Game1', 'Game2', 'Game3'])
+        self.assertEqual(self.catalog['Game1'], TEST_DATA['Games']['Game2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
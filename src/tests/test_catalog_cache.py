@@ -0,0 +1,136 @@
+import os
+import json
+import tempfile
+import unittest
+from .. import catalog_cache
+from ..catalog import GameCatalog
+from ..loader import load_catalog
+from .test_app import TEST_DATA
+
+
+class TestCatalogCache(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Write a games file with a mix of fields to a temporary directory.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.tmp.name, 'games.json')
+        data = json.loads(json.dumps(TEST_DATA))
+        data['Games']['Gämé3'] = {'pack': 'Pack3', 'min_players': 3,
+                                  'max_players': 8, 'description': 'Ünïcode',
+                                  'tags': ['drawing'], 'duration': 20}
+        self.write(data)
+        self.cache_dir = os.path.join(self.tmp.name, 'cache')
+        self.cache = catalog_cache.CatalogCache(self.json_path,
+                                                self.cache_dir)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data):
+        """
+        Write the games file.
+        """
+        with open(self.json_path, 'w') as f:
+            json.dump(data, f)
+
+    def load(self):
+        """
+        Returns the games and settings parsed from the games file, and
+        the file's source from before it was parsed.
+        """
+        source = self.cache.source()
+        games, settings = load_catalog(self.json_path, games=GameCatalog())
+        return games, settings, source
+
+    def test_round_trip(self):
+        """
+        Test the cached games and settings match the parsed ones.
+        """
+        self.assertIsNone(self.cache.load())
+        games, settings, source = self.load()
+        path = self.cache.save(games, settings, source)
+        self.assertEqual(path, self.cache.path)
+        cached, cached_settings = self.cache.load()
+        self.assertIsNotNone(cached.buffer)
+        self.assertEqual(cached_settings, settings)
+        self.assertEqual(list(cached), list(games))
+        for name, info in games.items():
+            self.assertEqual(dict(cached[name]), dict(info))
+        # The mapped columns are copied once a game changes.
+        cached['Game1']['description'] = 'Changed'
+        cached['Game4'] = {'players': 2}
+        self.assertIsNone(cached.buffer)
+        self.assertEqual(cached['Game1']['description'], 'Changed')
+        self.assertEqual(cached['Game4']['players'], 2)
+        self.assertEqual(cached['Gämé3']['description'], 'Ünïcode')
+
+    def test_invalidation(self):
+        """
+        Test the cache is only used while the games file is unchanged.
+        """
+        self.cache.save(*self.load())
+        stat = os.stat(self.json_path)
+        # Touching the file keeps the cache, as the hash still matches.
+        os.utime(self.json_path, ns=(stat.st_atime_ns,
+                                     stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNotNone(self.cache.load())
+        # Changing the file makes the cache stale.
+        data = json.loads(json.dumps(TEST_DATA))
+        data['Games']['Game1']['players'] = 9
+        self.write(data)
+        self.assertIsNone(self.cache.load())
+        # As does a corrupt cache.
+        self.cache.save(*self.load())
+        with open(self.cache.path, 'r+b') as f:
+            f.truncate(catalog_cache.HEADER.size + 8)
+        self.assertIsNone(self.cache.load())
+
+    def test_location(self):
+        """
+        Test the cache is kept in the cache directory, not next to the
+        games file, with lists of the same name in different folders
+        cached apart.
+        """
+        self.cache.save(*self.load())
+        self.assertEqual(os.path.dirname(self.cache.path), self.cache_dir)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)),
+                         ['cache', 'games.json'])
+        other = os.path.join(self.tmp.name, 'other', 'games.json')
+        self.assertNotEqual(catalog_cache.CatalogCache(
+            other, self.cache_dir).path, self.cache.path)
+        # A cache directory that can't be written to just skips the cache.
+        with open(os.path.join(self.tmp.name, 'file'), 'w') as f:
+            f.write('')
+        blocked = catalog_cache.CatalogCache(
+            self.json_path, os.path.join(self.tmp.name, 'file'))
+        self.assertIsNone(blocked.save(*self.load()))
+        self.assertIsNone(blocked.load())
+
+    def test_edited_while_parsing(self):
+        """
+        Test games parsed before the file was edited aren't cached as the
+        edited file.
+        """
+        games, settings, source = self.load()
+        data = json.loads(json.dumps(TEST_DATA))
+        data['Games']['Game1']['weight'] = 2
+        self.write(data)
+        stat = os.stat(self.json_path)
+        os.utime(self.json_path, ns=(stat.st_atime_ns,
+                                     source[0][0] + 10 ** 9))
+        self.assertIsNone(self.cache.save(games, settings, source))
+        self.assertIsNone(self.cache.load())
+        # Loading again caches the edited games.
+        games, settings = catalog_cache.load_games(self.json_path,
+                                                   self.cache_dir)
+        self.assertEqual(games['Game1']['weight'], 2)
+        games, settings = catalog_cache.load_games(self.json_path,
+                                                   self.cache_dir)
+        self.assertIsNotNone(games.buffer)
+        self.assertEqual(games['Game1']['weight'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
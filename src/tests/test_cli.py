@@ -1,4 +1,6 @@
 import unittest
+import csv
+import json
 from unittest.mock import Mock, patch
 from io import StringIO
 from .. import cli
@@ -64,6 +66,35 @@ class TestCLI(unittest.TestCase):
             self.assertIn(str(info["players"]), output)
             self.assertIn(info["description"], output)
 
+    def test_batch(self):
+        """
+        Ensure batch picks are written in each output format.
+        """
+        info = {"pack": "Test Pack", "players": 4}
+        self.randomizer_mock.pick_game.return_value = ("Test Game", info)
+        self.cli.players = 3
+        expected = [{'pick': i, 'game': 'Test Game', 'pack': 'Test Pack',
+                     'players': 4} for i in (1, 2, 3)]
+        # Newline delimited JSON
+        out = StringIO()
+        self.cli.batch(3, 'ndjson', out)
+        self.assertEqual([json.loads(line) for line in
+                          out.getvalue().splitlines()], expected)
+        self.randomizer_mock.pick_game.assert_called_with(3, "Test Game")
+        # JSON list
+        out = StringIO()
+        self.cli.batch(3, 'json', out)
+        self.assertEqual(json.loads(out.getvalue()), expected)
+        out = StringIO()
+        self.cli.batch(0, 'json', out)
+        self.assertEqual(json.loads(out.getvalue()), [])
+        # CSV
+        out = StringIO()
+        self.cli.batch(3, 'csv', out)
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual(rows, [{k: str(v) for k, v in row.items()}
+                                for row in expected])
+
 
 if __name__ == '__main__':
     unittest.main()
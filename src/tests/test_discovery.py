@@ -0,0 +1,127 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest.mock import patch
+from .. import app
+from .. import discovery
+from .. import resources
+from .test_app import TEST_DATA
+
+
+class TestCatalogIndex(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up two folders of games lists and an index over them with its
+        own cache.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.first = os.path.join(self.tmp.name, 'first')
+        self.second = os.path.join(self.tmp.name, 'second')
+        os.makedirs(self.first)
+        os.makedirs(self.second)
+        self.write(self.first, 'mine', 'My Games', 3)
+        self.write(self.second, 'mine', 'Hidden Games', 1)
+        self.write(self.second, 'theirs', 'Their Games', 2)
+        with open(os.path.join(self.second, 'notes.json'), 'w') as f:
+            json.dump(['not', 'a', 'games', 'list'], f)
+        self.cache = os.path.join(self.tmp.name, 'cache', 'catalogs.json')
+        self.index = discovery.CatalogIndex([self.first, self.second,
+                                             self.tmp.name + '/missing'],
+                                            self.cache)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, directory, name, title, count):
+        """
+        Write a games list with a number of games.
+        """
+        data = {'Games': {'Game%d' % (i): TEST_DATA['Games']['Game1']
+                          for i in range(count)},
+                'Settings': dict(TEST_DATA['Settings'], Title=title)}
+        with open(os.path.join(directory, name + '.json'), 'w') as f:
+            json.dump(data, f)
+
+    def age(self, path, seconds=60):
+        """
+        Move a file's or folder's modification time back.
+        """
+        mtime = os.stat(path).st_mtime_ns - seconds * 10 ** 9
+        os.utime(path, ns=(mtime, mtime))
+
+    def test_refresh(self):
+        """
+        Test the lists are found, earlier folders hiding later ones.
+        """
+        catalogs = self.index.refresh()
+        self.assertEqual(list(catalogs), ['mine', 'theirs'])
+        self.assertEqual(catalogs['mine']['title'], 'My Games')
+        self.assertEqual(catalogs['mine']['games'], 3)
+        self.assertEqual(catalogs['mine']['image_dir'], 'unit_tests')
+        self.assertEqual(catalogs['mine']['path'],
+                         os.path.join(self.first, 'mine.json'))
+        self.assertEqual(catalogs['theirs']['games'], 2)
+        self.assertTrue(os.path.exists(self.cache))
+
+    def test_cached(self):
+        """
+        Test unchanged lists are taken from the cache, and changed or new
+        lists are read again.
+        """
+        for directory in (self.first, self.second):
+            for name in os.listdir(directory):
+                self.age(os.path.join(directory, name))
+            self.age(directory)
+        self.index.refresh()
+        # Mark the cached summaries, to see which are read again.
+        with open(self.cache) as f:
+            cached = json.load(f)
+        for directory in cached['dirs'].values():
+            for entry in directory['files'].values():
+                entry['title'] = 'Cached'
+        with open(self.cache, 'w') as f:
+            json.dump(cached, f)
+        catalogs = discovery.CatalogIndex(self.index.dirs,
+                                          self.cache).refresh()
+        self.assertEqual(catalogs['mine']['title'], 'Cached')
+        self.assertEqual(catalogs['theirs']['title'], 'Cached')
+        # Edit one list and add another.
+        self.write(self.first, 'mine', 'My New Games', 4)
+        self.write(self.first, 'new', 'New Games', 1)
+        catalogs = self.index.refresh()
+        self.assertEqual(catalogs['mine']['title'], 'My New Games')
+        self.assertEqual(catalogs['new']['title'], 'New Games')
+        self.assertEqual(catalogs['theirs']['title'], 'Cached')
+
+    def test_bad_cache(self):
+        """
+        Test a corrupt cache is rebuilt.
+        """
+        os.makedirs(os.path.dirname(self.cache))
+        with open(self.cache, 'w') as f:
+            f.write('{"version": 1, "dirs": ')
+        self.assertEqual(self.index.names(), ['mine', 'theirs'])
+
+    def test_randomizer(self):
+        """
+        Test games lists in the folders from GAME_RANDOMIZER_PATH are
+        found and loaded.
+        """
+        environ = {resources.PATH_ENV_VAR: self.second}
+        with patch.dict(os.environ, environ):
+            self.assertEqual(resources.catalog_dirs()[0], self.second)
+            self.assertEqual(resources.catalog_path('theirs'),
+                             os.path.join(self.second, 'theirs.json'))
+            randomizer = app.Randomizer('theirs', flush_every=None,
+                                        stats_dir=self.tmp.name)
+        self.assertEqual(len(randomizer.games_list()), 2)
+        self.assertEqual(randomizer.settings()['Title'], 'Their Games')
+        # Lists that aren't found anywhere are looked for in the assets.
+        self.assertEqual(resources.catalog_path('nowhere', [self.first]),
+                         resources.asset_path('nowhere.json'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import json
+import random
+import tempfile
+from .. import app
+from .. import filters
+from ..index import PlayerIndex
+from .test_app import TEST_DATA
+
+
+# Games with packs, tags and durations, in player index order.
+GAMES = [
+    ('Drawful', {'pack': 'Pack1', 'players': 8, 'tags': ['drawing'],
+                 'duration': 20}),
+    ('Quiplash', {'pack': 'Pack2', 'players': 8, 'tags': ['writing'],
+                  'duration': 15}),
+    ('Tee K.O.', {'pack': 'Pack3', 'players': 8, 'min_players': 3,
+                  'tags': ['drawing', 'writing'], 'duration': 30}),
+    ('Fibbage', {'pack': 'Pack1', 'players': 8}),
+    ('Word Spud', {'pack': 'Pack1', 'players': 8, 'duration': 10}),
+    ('Bidiots', {'pack': 'Pack2', 'players': 6, 'min_players': 3,
+                 'tags': ['drawing'], 'duration': 45}),
+]
+
+
+class TestFilters(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Index the test games.
+        """
+        self.game_ids = {g: i for i, (g, info) in enumerate(GAMES)}
+        self.attributes = filters.AttributeIndex(GAMES, self.game_ids)
+        self.index = PlayerIndex([info['players'] for g, info in GAMES],
+                                 [info.get('min_players', 1)
+                                  for g, info in GAMES])
+
+    def matching(self, query):
+        """
+        Returns the indexes of the games matching a query, checked one by
+        one.
+        """
+        return [i for i, (g, info) in enumerate(GAMES) if query.matches(info)]
+
+    def test_mask(self):
+        """
+        Test the bitsets match the same games as checking each game.
+        """
+        queries = [filters.Query(packs=['Pack1']),
+                   filters.Query(packs=['Pack1', 'Pack3']),
+                   filters.Query(packs=[]),
+                   filters.Query(tags=['drawing']),
+                   filters.Query(tags=['drawing', 'writing']),
+                   filters.Query(tags=['unknown']),
+                   filters.Query(max_duration=20),
+                   filters.Query(min_duration=20, max_duration=40),
+                   filters.Query(packs=['Pack2'], tags=['drawing'],
+                                 max_duration=60)]
+        for query in queries:
+            self.assertTrue(query)
+            self.assertEqual(
+                filters.mask_indexes(self.attributes.mask(query)),
+                self.matching(query))
+        self.assertFalse(filters.Query())
+        self.assertEqual(self.attributes.packs(), ['Pack1', 'Pack2', 'Pack3'])
+        self.assertEqual(self.attributes.tags(), ['drawing', 'writing'])
+
+    def test_filtered_index(self):
+        """
+        Test the filtered index keeps the player ranges.
+        """
+        query = filters.Query(tags=['drawing'])
+        index = filters.FilteredIndex(self.index,
+                                      self.attributes.mask(query))
+        self.assertEqual(index.eligible(2), [0])
+        self.assertEqual(index.eligible(4), [0, 2, 5])
+        self.assertEqual(index.eligible(7), [0, 2])
+        self.assertEqual(index.player_counts(), list(range(1, 9)))
+        # Prefixes matching every game stay ranges.
+        index = filters.FilteredIndex(self.index, self.attributes.all)
+        self.assertEqual(index.eligible(4), range(6))
+
+    def test_randomizer_filter(self):
+        """
+        Test the Randomizer only picks games matching its filter.
+        """
+        with open('src/assets/unit_tests.json', 'w') as f:
+            json.dump(TEST_DATA, f, indent=4)
+        with tempfile.TemporaryDirectory() as tmp:
+            randomizer = app.Randomizer('unit_tests', flush_every=None,
+                                        stats_dir=tmp)
+            randomizer.set_filter(filters.Query(packs=['Pack2']))
+            self.assertEqual(randomizer.eligible_games(2), ['Game2'])
+            for i in range(3):
+                self.assertEqual(randomizer.pick_game(2, None)[0], 'Game2')
+            # Nothing left to pick.
+            self.assertEqual(randomizer.eligible_count(4), 0)
+            self.assertRaises(IndexError, randomizer.pick_game, 4, None)
+            # Clearing the filter picks from every game again.
+            randomizer.set_filter(None)
+            self.assertEqual(randomizer.pick_game(2, None)[0], 'Game1')
+
+    def test_strategies(self):
+        """
+        Test every strategy keeps to a filter, and changing it.
+        """
+        from ..strategies import STRATEGIES
+        for name, strategy in STRATEGIES.items():
+            policy = strategy(self.index, [1] * 6, [0] * 6,
+                              rng=random.Random(1))
+            for query in [filters.Query(packs=['Pack1']),
+                          filters.Query(tags=['drawing']), None]:
+                if query is None:
+                    policy.set_index(self.index)
+                    eligible = self.index.eligible(4)
+                else:
+                    eligible = self.matching(query)
+                    policy.set_index(filters.FilteredIndex(
+                        self.index, self.attributes.mask(query)))
+                for i in range(10):
+                    index = policy.pick(4)
+                    self.assertIn(index, eligible)
+                    if 'occurrences' in policy.UPDATES:
+                        policy.occurred(index)
+
+
+if __name__ == '__main__':
+    unittest.main()
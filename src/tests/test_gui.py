@@ -1,7 +1,29 @@
 import unittest
+from unittest.mock import patch
 from .. import gui
 
 
+class FakeRoot(object):
+    """
+    Stand-in for the Tk root that runs after() callbacks on demand.
+    """
+    def __init__(self):
+        self.callbacks = {}
+        self.next_id = 0
+
+    def after(self, delay, callback):
+        self.next_id += 1
+        self.callbacks[self.next_id] = callback
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        del self.callbacks[after_id]
+
+    def run_next(self):
+        after_id = min(self.callbacks)
+        self.callbacks.pop(after_id)()
+
+
 class TestJSONGUI(unittest.TestCase):
 
     def test_default_json_files(self):
@@ -48,5 +70,63 @@ class TestJSONGUI(unittest.TestCase):
         self.assertIsNone(selected)
 
 
+class TestRollAnimation(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up an animation on a fake root and clock.
+        """
+        self.root = FakeRoot()
+        self.drawn = []
+        self.finished = []
+        self.animation = gui.RollAnimation(
+            self.root, 10, 1.0,
+            draw_frame=lambda: self.drawn.append(self.animation.frame),
+            on_finish=lambda: self.finished.append(True))
+        self.now = 0.0
+        self.clock = patch('time.perf_counter', side_effect=lambda: self.now)
+        self.clock.start()
+
+    def tearDown(self):
+        """
+        Restore the clock.
+        """
+        self.clock.stop()
+
+    def test_run(self):
+        """
+        Test frames follow the easing curve and the animation finishes.
+        """
+        self.animation.start()
+        self.assertEqual(self.drawn, [0])
+        self.now = 0.5
+        self.root.run_next()
+        # Three quarters of the frames are done at the halfway point, and
+        # the ones in between were dropped.
+        self.assertEqual(self.drawn, [0, 7])
+        self.assertEqual(self.animation.dropped, 6)
+        self.now = 1.0
+        self.root.run_next()
+        self.assertEqual(self.finished, [True])
+        self.assertFalse(self.animation.running)
+        self.assertEqual(self.root.callbacks, {})
+
+    def test_skip_and_cancel(self):
+        """
+        Test skipping ends the animation and cancelling stops it quietly.
+        """
+        self.animation.start()
+        self.animation.finish()
+        self.assertEqual(self.finished, [True])
+        self.assertEqual(self.root.callbacks, {})
+        # Finishing again does nothing.
+        self.animation.finish()
+        self.assertEqual(self.finished, [True])
+        self.animation.start()
+        self.animation.cancel()
+        self.assertEqual(self.finished, [True])
+        self.assertEqual(self.root.callbacks, {})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import os
+from .. import images
+
+
+# Test images from the unit tests game list.
+ASSETS = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                      'assets', 'unit_tests')
+
+
+class TestImageCache(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a cache that keeps the PIL images rather than Tk images.
+        """
+        self.cache = images.ImageCache(wrap=lambda img: img)
+        self.game1 = os.path.join(ASSETS, 'Game1.png')
+        self.game2 = os.path.join(ASSETS, 'Game2.png')
+
+    def test_get(self):
+        """
+        Test images are resized and only loaded once.
+        """
+        img = self.cache.get(self.game1)
+        self.assertEqual(img.size, images.BANNER_SIZE)
+        self.assertIs(self.cache.get(self.game1), img)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        # A different size is cached separately.
+        self.assertEqual(self.cache.get(self.game1, (64, 32)).size, (64, 32))
+        self.assertEqual(len(self.cache), 2)
+
+    def test_memory_cap(self):
+        """
+        Test the least recently used images are evicted over the cap.
+        """
+        banner_bytes = images.BANNER_SIZE[0] * images.BANNER_SIZE[1] * 4
+        self.cache.max_bytes = banner_bytes * 2
+        self.cache.get(self.game1)
+        self.cache.get(self.game2)
+        # Use the first image so the second is the oldest.
+        self.cache.get(self.game1)
+        self.cache.get(os.path.join(ASSETS, 'logo.png'))
+        self.assertEqual(len(self.cache), 2)
+        self.assertIn((self.game1, images.BANNER_SIZE), self.cache)
+        self.assertNotIn((self.game2, images.BANNER_SIZE), self.cache)
+        self.assertEqual(self.cache.total_bytes, banner_bytes * 2)
+
+
+class TestPrefetcher(unittest.TestCase):
+
+    def test_prefetch(self):
+        """
+        Test every image ends up cached once polling finishes.
+        """
+        cache = images.ImageCache(wrap=lambda img: img)
+        paths = [os.path.join(ASSETS, f) for f in
+                 ['Game1.png', 'Game2.png', 'Game1.png', 'missing.png']]
+        prefetcher = images.Prefetcher(cache, paths, max_workers=2)
+        # Duplicates are only loaded once.
+        self.assertEqual(prefetcher.total, 3)
+        prefetcher.start()
+        # Nothing is cached until it's polled.
+        for path, future in list(prefetcher.futures):
+            future.exception()
+        self.assertEqual(len(cache), 0)
+        self.assertTrue(prefetcher.poll())
+        self.assertEqual(prefetcher.done, 3)
+        # The missing image is skipped.
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(prefetcher.pool)
+
+    def test_memory_cap(self):
+        """
+        Test no more images are loaded than fit in the cache.
+        """
+        banner_bytes = images.BANNER_SIZE[0] * images.BANNER_SIZE[1] * 4
+        cache = images.ImageCache(max_bytes=banner_bytes, wrap=lambda i: i)
+        paths = [os.path.join(ASSETS, f) for f in ['Game1.png', 'Game2.png']]
+        self.assertEqual(images.Prefetcher(cache, paths).total, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
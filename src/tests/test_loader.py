@@ -0,0 +1,56 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+from .. import loader
+from .test_app import TEST_DATA
+
+
+class TestLoader(unittest.TestCase):
+
+    def test_load_catalog(self):
+        """
+        Test streaming a games file gives the same games and settings as
+        parsing it whole, whatever the chunk size.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'unit_tests.json')
+            with open(path, 'w') as f:
+                json.dump(TEST_DATA, f, indent=4)
+            for chunk_size in [1, 7, 64 * 1024]:
+                games, settings = loader.load_catalog(path, chunk_size)
+                self.assertEqual(games, TEST_DATA['Games'])
+                self.assertEqual(list(games), list(TEST_DATA['Games']))
+                self.assertEqual(settings, TEST_DATA['Settings'])
+            # Every game shares the same field names.
+            first, second = games.values()
+            for a, b in zip(first, second):
+                self.assertIs(a, b)
+
+    def test_iter_catalog(self):
+        """
+        Test escaped names, numbers split across chunks and other top
+        level keys.
+        """
+        text = '{"Version": [1, {"x": 2}], "Games": {"A \\"B\\"": ' \
+            '{"players": 12345}, "C\\\\D": {}},\n "Settings": {}}'
+        for chunk_size in [1, 2, 5, 100]:
+            entries = list(loader.iter_catalog(io.StringIO(text),
+                                               chunk_size))
+            self.assertEqual(entries,
+                             [('Games', 'A "B"', {'players': 12345}),
+                              ('Games', 'C\\D', {})])
+
+    def test_malformed(self):
+        """
+        Test broken files raise a JSON decode error.
+        """
+        for text in ['', '[]', '{"Games": {"A": }}', '{"Games": {"A": 1',
+                     '{"Games": {"A" 1}}', '{"Games": {"A": 1} "x": 2}']:
+            with self.assertRaises(json.JSONDecodeError):
+                list(loader.iter_catalog(io.StringIO(text), 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import json
+import os
+import random
+import sys
+import tempfile
+from .. import manager
+from .test_app import TEST_DATA
+
+
+class TestCatalogManager(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Write a games list with player ranges and set up a manager with
+        its own stats.
+        """
+        data = json.loads(json.dumps(TEST_DATA))
+        for i in range(3, 9):
+            data['Games']['Game%d' % (i)] = {'pack': 'Pack3',
+                                             'min_players': 3,
+                                             'max_players': i,
+                                             'weight': 1}
+        with open('src/assets/unit_tests.json', 'w') as f:
+            json.dump(data, f, indent=4)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = manager.CatalogManager(stats_dir=self.tmp.name,
+                                              flush_every=None)
+
+    def tearDown(self):
+        with open('src/assets/unit_tests.json', 'w') as f:
+            json.dump(TEST_DATA, f, indent=4)
+        self.tmp.cleanup()
+
+    def test_shared(self):
+        """
+        Test sessions share one catalog and its play counts.
+        """
+        first = self.manager.session('unit_tests', 2, random.Random(1))
+        second = self.manager.session('unit_tests', 4, random.Random(2))
+        self.assertIs(first.catalog, second.catalog)
+        self.assertIs(self.manager.catalog('unit_tests'), first.catalog)
+        self.assertEqual(first.catalog.settings, TEST_DATA['Settings'])
+        for i in range(5):
+            first.pick()
+            second.pick()
+        self.assertEqual(sum(first.catalog.stats.values()), 10)
+        # Sessions only hold their own state.
+        self.assertLess(sys.getsizeof(first) + sys.getsizeof(first.played),
+                        1024)
+        self.manager.flush()
+        self.assertEqual(first.catalog.stats_store.load(),
+                         first.catalog.stats)
+
+    def test_read_only(self):
+        """
+        Test a session can't change the games or settings for the others.
+        """
+        first = self.manager.session('unit_tests', 2, random.Random(1))
+        second = self.manager.session('unit_tests', 2, random.Random(1))
+        game, info = first.pick()
+        self.assertEqual(dict(info), first.catalog.games[game])
+        with self.assertRaises(TypeError):
+            info['weight'] = 99
+        with self.assertRaises(TypeError):
+            first.catalog.games[game] = {'weight': 99}
+        with self.assertRaises(TypeError):
+            first.catalog.settings['Max_Players'] = 99
+        # A copy can be changed without touching the shared games.
+        edited = dict(info, weight=99)
+        self.assertEqual(edited['weight'], 99)
+        self.assertNotEqual(second.catalog.games[game]['weight'], 99)
+
+    def test_no_repeats(self):
+        """
+        Test a session plays every eligible game before repeating any.
+        """
+        session = self.manager.session('unit_tests', 4, random.Random(3))
+        eligible = {'Game1', 'Game4', 'Game5', 'Game6', 'Game7', 'Game8'}
+        picks = [session.pick()[0] for i in range(len(eligible))]
+        self.assertEqual(set(picks), eligible)
+        self.assertEqual(session.played_games, eligible)
+        # The next pick starts the list over.
+        self.assertIn(session.pick()[0], eligible)
+        self.assertEqual(len(session.played), 1)
+        # Another session can still pick any game.
+        other = self.manager.session('unit_tests', 2)
+        self.assertIn(other.pick()[0], {'Game1', 'Game2'})
+        self.assertRaises(IndexError, other.pick, 9)
+
+    def test_least_played(self):
+        """
+        Test the least played games are favoured, as by the Randomizer.
+        """
+        with open(os.path.join(self.tmp.name, 'unit_tests_stats.json'),
+                  'w') as f:
+            json.dump({'Game1': 50, 'Game2': 0}, f)
+        rng = random.Random(4)
+        picks = [self.manager.session('unit_tests', 2, rng).pick()[0]
+                 for i in range(20)]
+        self.assertGreaterEqual(picks.count('Game2'), 18)
+
+    def test_flush_interval(self):
+        """
+        Test picks are saved once the flush interval passes, with no pick
+        count limit.
+        """
+        timed = manager.CatalogManager(stats_dir=self.tmp.name,
+                                       flush_every=None,
+                                       flush_interval=0.05)
+        session = timed.session('unit_tests', 2)
+        session.pick()
+        catalog = session.catalog
+        timer = catalog.write_behind.timer
+        self.assertEqual(catalog.stats_store.load(), {})
+        # Wait for the timed flush to finish.
+        timer.join()
+        self.assertEqual(sum(catalog.stats_store.load().values()), 1)
+        self.assertEqual(catalog.write_behind.pending_picks, [])
+
+    def test_no_players(self):
+        """
+        Test picking without a number of players is a clear error.
+        """
+        session = self.manager.session('unit_tests')
+        self.assertRaises(ValueError, session.pick)
+        self.assertIn(session.pick(2)[0], {'Game1', 'Game2'})
+
+
+if __name__ == '__main__':
+    unittest.main()
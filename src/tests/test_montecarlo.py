@@ -0,0 +1,54 @@
+import unittest
+import json
+import tempfile
+from .. import app
+from .. import montecarlo
+from .test_app import TEST_DATA
+
+
+class TestMonteCarlo(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a runner on the unit test games.
+        """
+        with open('src/assets/unit_tests.json', 'w') as f:
+            json.dump(TEST_DATA, f, indent=4)
+        with tempfile.TemporaryDirectory() as tmp:
+            randomizer = app.Randomizer('unit_tests', flush_every=None,
+                                        stats_dir=tmp)
+        self.runner = montecarlo.MonteCarlo(randomizer, workers=2, seed=1)
+
+    def test_run(self):
+        """
+        Test the results of every worker are merged, and runs repeat.
+        """
+        reports = self.runner.run(list(montecarlo.STRATEGIES), 2, 5, 10)
+        self.assertEqual(set(reports), set(montecarlo.STRATEGIES))
+        for strategy, report in reports.items():
+            self.assertEqual(sum(report.totals), 50)
+            self.assertEqual(len(report.coverage), 5)
+            # Only recent decay allows repeats before both are played.
+            if strategy != 'recent_decay':
+                self.assertEqual(report.coverage_picks(50), 2)
+                self.assertEqual(report.max_min_ratio(), 1)
+        # The same seed gives the same results.
+        again = self.runner.run(['recent_decay'], 2, 5, 10)['recent_decay']
+        self.assertEqual(again.totals, reports['recent_decay'].totals)
+        # Only Game1 supports 4 players.
+        report = self.runner.run(['round_robin'], 4, 5, 10)['round_robin']
+        self.assertEqual(report.totals, [50, 0])
+        self.assertEqual(report.shares(), {'Game1': 1.0})
+
+    def test_no_eligible(self):
+        """
+        Test a report with no eligible games still summarizes.
+        """
+        report = montecarlo.StrategyReport('uniform', ['Game1', 'Game2'], [])
+        self.assertEqual(report.share_spread(), 0)
+        self.assertEqual(report.max_min_ratio(), float('inf'))
+        self.assertEqual(report.shares(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import json
+import pstats
+import tempfile
+import unittest
+from .. import profiling
+from .. import app
+from .. import images
+from .test_images import ASSETS
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a profiler of our own and a temporary directory.
+        """
+        self.profiler = profiling.Profiler()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.profiler.disable()
+        self.tmp.cleanup()
+
+    def test_disabled(self):
+        """
+        Test nothing is recorded until the profiler is enabled.
+        """
+        self.assertIs(self.profiler.timer('pick'), profiling.NULL_TIMER)
+        with self.profiler.timer('pick'):
+            self.profiler.count('picks')
+        self.assertEqual(self.profiler.report(),
+                         {'timers': {}, 'counters': {}})
+
+    def test_report(self):
+        """
+        Test timings and counters are summed and written out at the end.
+        """
+        json_path = os.path.join(self.tmp.name, 'profile.json')
+        cprofile_path = os.path.join(self.tmp.name, 'profile.pstats')
+        self.profiler.enable(json_path, cprofile_path)
+        for i in range(3):
+            with self.profiler.timer('pick'):
+                self.profiler.count('picks')
+        self.profiler.count('persist.picks', 5)
+        report = self.profiler.report()
+        self.assertEqual(report['timers']['pick']['calls'], 3)
+        self.assertGreaterEqual(report['timers']['pick']['max_ms'],
+                                report['timers']['pick']['mean_ms'])
+        self.assertEqual(report['counters'], {'persist.picks': 5,
+                                              'picks': 3})
+        self.assertIn('pick', self.profiler.summary())
+        self.profiler.finish()
+        with open(json_path) as f:
+            self.assertEqual(json.load(f)['counters'], report['counters'])
+        # The cProfile stats can be read back with pstats.
+        self.assertTrue(pstats.Stats(cprofile_path).total_calls)
+
+    def test_env(self):
+        """
+        Test the environment variables turn the app's profiler on.
+        """
+        self.assertFalse(profiling.enable_from_env({}))
+        self.assertFalse(profiling.enable_from_env({profiling.ENV_VAR: '0'}))
+        try:
+            self.assertTrue(profiling.enable_from_env(
+                {profiling.ENV_VAR: '1'}))
+        finally:
+            profiling.profiler.disable()
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Turn on the app's profiler.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        profiling.profiler.reset()
+        profiling.profiler.enable()
+
+    def tearDown(self):
+        profiling.profiler.disable()
+        profiling.profiler.reset()
+        self.tmp.cleanup()
+
+    def test_hot_paths(self):
+        """
+        Test loading, picking, saving and image loading are timed.
+        """
+        randomizer = app.Randomizer('unit_tests', stats_dir=self.tmp.name)
+        for i in range(4):
+            randomizer.pick_game(2, None)
+        images.ImageCache(wrap=lambda img: img).get(
+            os.path.join(ASSETS, 'Game1.png'))
+        report = profiling.profiler.report()
+        self.assertEqual(report['timers']['load']['calls'], 1)
+        self.assertEqual(report['timers']['pick']['calls'], 4)
+        self.assertEqual(report['timers']['persist']['calls'], 4)
+        self.assertEqual(report['counters']['persist.picks'], 4)
+        self.assertEqual(report['timers']['image.decode']['calls'], 1)
+        self.assertEqual(report['timers']['image.resize']['calls'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
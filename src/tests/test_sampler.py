@@ -0,0 +1,90 @@
+import unittest
+import random
+from .. import sampler
+
+
+class TestFenwickTree(unittest.TestCase):
+
+    def test_prefix_sum(self):
+        """
+        Test prefix sums match a plain sum after updates.
+        """
+        values = [3, 1, 4, 1, 5, 9, 2, 6]
+        tree = sampler.FenwickTree(values)
+        for end in range(len(values) + 1):
+            self.assertEqual(tree.prefix_sum(end), sum(values[:end]))
+        # Update a value and check again.
+        tree.add(2, 10)
+        values[2] += 10
+        for end in range(len(values) + 1):
+            self.assertEqual(tree.prefix_sum(end), sum(values[:end]))
+
+
+class TestWeightedSampler(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a sampler with a few weighted items.
+        """
+        self.weights = [1, 0.5, 2, 1]
+        self.occurrences = [0, 3, 1, 2]
+        self.sampler = sampler.WeightedSampler(self.weights,
+                                               self.occurrences)
+
+    def expected_weights(self):
+        """
+        Compute the weights the same way pick_game used to.
+        """
+        max_occurrence = max(self.sampler.occurrences)
+        return [w * (max_occurrence + 1 - o) if a else 0 for w, o, a in
+                zip(self.weights, self.sampler.occurrences,
+                    self.sampler.active)]
+
+    def test_total(self):
+        """
+        Test the totals follow the reverse occurrence weighting.
+        """
+        self.assertAlmostEqual(self.sampler.total(),
+                               sum(self.expected_weights()))
+        self.assertAlmostEqual(self.sampler.total(2),
+                               sum(self.expected_weights()[:2]))
+        # Raising the maximum reweights every item.
+        for i in range(3):
+            self.sampler.increment(1)
+        self.assertEqual(self.sampler.max_occurrence, 6)
+        self.assertAlmostEqual(self.sampler.total(),
+                               sum(self.expected_weights()))
+
+    def test_remove_restore(self):
+        """
+        Test removed items are never sampled until restored.
+        """
+        self.sampler.remove(0)
+        self.sampler.remove(2)
+        self.assertEqual(self.sampler.available(), 2)
+        self.assertAlmostEqual(self.sampler.total(),
+                               sum(self.expected_weights()))
+        for i in range(200):
+            self.assertIn(self.sampler.sample(), [1, 3])
+        # Only removed items remain in the first slot.
+        self.assertRaises(IndexError, self.sampler.sample, 1)
+        self.sampler.restore(0)
+        self.assertEqual(self.sampler.sample(1), 0)
+
+    def test_sample_distribution(self):
+        """
+        Test samples follow the item weights.
+        """
+        rng = random.Random(1)
+        draws = 20000
+        counts = [0] * len(self.weights)
+        for i in range(draws):
+            counts[self.sampler.sample(rng=rng)] += 1
+        expected = self.expected_weights()
+        total = sum(expected)
+        for count, weight in zip(counts, expected):
+            self.assertAlmostEqual(count / draws, weight / total, delta=0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
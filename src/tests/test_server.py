@@ -0,0 +1,168 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from .. import app
+from .. import server
+from .test_app import TEST_DATA
+
+
+class TestRandomizerServer(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a randomizer over the test games with its own stats.
+        """
+        with open('src/assets/unit_tests.json', 'w') as f:
+            json.dump(TEST_DATA, f, indent=4)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.randomizer = app.Randomizer('unit_tests', flush_every=None,
+                                         stats_dir=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def serve(self, client_test):
+        """
+        Run a test coroutine against a server on a free port, passing it a
+        connected client.
+        """
+        async def run():
+            service = server.RandomizerServer(self.randomizer, port=0)
+            self.service = service
+            await service.start()
+            client = server.HTTPClient(service.host, service.port)
+            try:
+                await client_test(client)
+            finally:
+                await client.close()
+                await service.close()
+        asyncio.run(run())
+
+    def test_endpoints(self):
+        """
+        Test each endpoint and the errors for bad requests.
+        """
+        async def client_test(client):
+            status, data = await client.request('GET', '/settings')
+            self.assertEqual((status, data), (200, TEST_DATA['Settings']))
+            status, data = await client.request('GET', '/games')
+            self.assertEqual(data, TEST_DATA['Games'])
+            status, data = await client.request('GET', '/games?players=3')
+            self.assertEqual(list(data), ['Game1'])
+            status, data = await client.request('POST', '/pick?players=3')
+            self.assertEqual(status, 200)
+            self.assertEqual(data['game'], 'Game1')
+            self.assertEqual(data['info'], TEST_DATA['Games']['Game1'])
+            status, data = await client.request('POST', '/pick',
+                                                {'players': 2})
+            self.assertEqual(data['game'], 'Game2')
+            status, data = await client.request('GET', '/stats')
+            self.assertEqual(data, {'Game1': 1, 'Game2': 1})
+            # Bad requests get an error message back.
+            for method, target, expected in (
+                    ('GET', '/pick?players=2', 405),
+                    ('POST', '/pick', 400),
+                    ('POST', '/pick?players=two', 400),
+                    ('POST', '/pick?players=9', 400),
+                    ('GET', '/nowhere', 404)):
+                status, data = await client.request(method, target)
+                self.assertEqual(status, expected)
+                self.assertIn('error', data)
+        self.serve(client_test)
+        # The picks are saved when the server closes.
+        self.assertEqual(self.randomizer.stats_store.load(),
+                         {'Game1': 1, 'Game2': 1})
+
+    def test_concurrent_picks(self):
+        """
+        Test picks from many clients at once are all counted.
+        """
+        async def client_test(client):
+            clients = [server.HTTPClient(client.host, client.port)
+                       for i in range(10)]
+
+            async def picks(c):
+                for i in range(10):
+                    status, data = await c.request('POST', '/pick?players=2')
+                    self.assertEqual(status, 200)
+                await c.close()
+            await asyncio.gather(*(picks(c) for c in clients))
+            status, data = await client.request('GET', '/stats')
+            self.assertEqual(sum(data.values()), 100)
+        self.serve(client_test)
+
+    def test_watch(self):
+        """
+        Test edits to the games list are served once reloaded.
+        """
+        async def client_test(client):
+            watch = asyncio.ensure_future(self.service.watch(0.01))
+            status, data = await client.request('GET', '/games')
+            games = dict(data, Game3=dict(data['Game2'], players=6))
+            path = 'src/assets/unit_tests.json'
+            mtime = os.stat(path).st_mtime_ns + 10 ** 9
+            with open(path, 'w') as f:
+                json.dump({'Games': games,
+                           'Settings': TEST_DATA['Settings']}, f)
+            os.utime(path, ns=(mtime, mtime))
+            # The cached games list is replaced once it's reloaded.
+            while 'Game3' not in data:
+                await asyncio.sleep(0.01)
+                status, data = await client.request('GET', '/games')
+            watch.cancel()
+            status, data = await client.request('POST', '/pick?players=6')
+            self.assertEqual(data['game'], 'Game3')
+        self.serve(client_test)
+
+    def test_slow_save(self):
+        """
+        Test picks are answered while the write-behind timer is saving.
+        """
+        randomizer = app.Randomizer('unit_tests', flush_every=None,
+                                    flush_interval=0.01,
+                                    stats_dir=self.tmp.name)
+        saving = threading.Event()
+        release = threading.Event()
+        save = randomizer.stats_store.save
+
+        def slow_save(stats, picks):
+            saving.set()
+            # Hold the save for a while, or until the test is done.
+            release.wait(3)
+            save(stats, picks)
+        randomizer.stats_store.save = slow_save
+        self.randomizer = randomizer
+
+        async def client_test(client):
+            try:
+                status, data = await client.request('POST',
+                                                    '/pick?players=2')
+                # Wait for the timer to start saving that pick.
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, saving.wait)
+                start = loop.time()
+                status, data = await client.request('POST',
+                                                    '/pick?players=2')
+                self.assertEqual(status, 200)
+                self.assertLess(loop.time() - start, 1)
+            finally:
+                release.set()
+        self.serve(client_test)
+        self.assertEqual(sum(randomizer.stats_store.load().values()), 2)
+
+    def test_server_error(self):
+        """
+        Test an unexpected error still gets a response.
+        """
+        service = server.RandomizerServer(self.randomizer)
+        service.routes['/stats'] = ('GET', lambda params: {}['missing'])
+        status, data = service.dispatch('GET', '/stats', b'')
+        self.assertEqual(status, 500)
+        self.assertIn('error', json.loads(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
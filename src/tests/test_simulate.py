@@ -0,0 +1,92 @@
+import unittest
+import json
+import random
+import tempfile
+from .. import app
+from .test_app import TEST_DATA
+try:
+    import numpy as np
+    from .. import simulate
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestSimulation(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a Randomizer on the unit test games.
+        """
+        with open('src/assets/unit_tests.json', 'w') as f:
+            json.dump(TEST_DATA, f, indent=4)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.randomizer = app.Randomizer('unit_tests', flush_every=None,
+                                         stats_dir=self.tmp.name)
+
+    def tearDown(self):
+        """
+        Clean up the stats directory.
+        """
+        self.tmp.cleanup()
+
+    def randomizer_probabilities(self, player_count):
+        """
+        Returns the chance of the Randomizer picking each game next.
+        """
+        sampler = self.randomizer.strategy.sampler
+        end = self.randomizer.eligible_count(player_count)
+        # Played games are reset if none are left to pick.
+        active = [sampler.active[i] for i in range(end)]
+        if not any(active):
+            active = [True] * end
+        weights = [self.randomizer.game_info[g]['weight'] *
+                   (sampler.max_occurrence + 1 - sampler.occurrences[i])
+                   if i < end and active[i] else 0
+                   for i, g in enumerate(self.randomizer.games_by_players)]
+        return [w / sum(weights) for w in weights]
+
+    def test_matches_randomizer(self):
+        """
+        Test the simulation gives the same pick chances as the Randomizer
+        when replaying its picks.
+        """
+        random.seed(3)
+        simulation = simulate.Simulation.from_randomizer(self.randomizer,
+                                                         sessions=2)
+        for player_count in [2, 4, 2, 2, 3, 2, 2, 4, 2]:
+            expected = self.randomizer_probabilities(player_count)
+            for row in simulation.probabilities(player_count):
+                np.testing.assert_allclose(row, expected)
+            game, info = self.randomizer.pick_game(player_count, None)
+            index = self.randomizer.game_ids[game]
+            simulation.step(player_count, picks=[index, index])
+
+    def test_run(self):
+        """
+        Test the run report on the unit test games.
+        """
+        simulation = simulate.Simulation.from_randomizer(
+            self.randomizer, sessions=500, seed=1)
+        report = simulation.run(2, 10)
+        # Both games support 2 players and never repeat back to back, so
+        # they're picked equally and covered within two picks.
+        np.testing.assert_allclose(report.frequencies(), [0.5, 0.5])
+        self.assertEqual(report.max_min_ratio(), 1)
+        self.assertEqual(report.coverage_rate(), 1)
+        self.assertEqual(report.coverage_picks((50,)), {50: 2})
+        # Only Game1 supports 4 players.
+        report = simulation.run(4, 3)
+        self.assertEqual(list(report.eligible), [True, False])
+        self.assertEqual(report.frequencies()[0], 1)
+
+    def test_no_games(self):
+        """
+        Test picking with no games for the player count fails.
+        """
+        simulation = simulate.Simulation.from_randomizer(self.randomizer)
+        self.assertRaises(IndexError, simulation.step, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
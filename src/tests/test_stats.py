@@ -0,0 +1,259 @@
+import unittest
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .. import stats
+
+
+def write_picks(backend, path, picks, seed, **options):
+    """
+    Pick games at random and save each pick, as a Randomizer with
+    flush_every=1 would, in a worker process.
+    """
+    rng = random.Random(seed)
+    store = stats.BACKENDS[backend](path, **options)
+    counts = store.load()
+    for i in range(picks):
+        game = rng.choice(['Game1', 'Game2', 'Game3'])
+        counts[game] = counts.get(game, 0) + 1
+        store.save(dict(counts), [(game, time.time(), 2)])
+
+
+class TestJSONStats(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a stats file in a temporary directory.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'games_stats.json')
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory.
+        """
+        self.tmp.cleanup()
+
+    def test_save_load(self):
+        """
+        Test the stats map is written and read back.
+        """
+        store = stats.JSONStats(self.path)
+        self.assertEqual(store.load(), {})
+        store.save({'Game1': 2, 'Game2': 0}, [])
+        self.assertEqual(store.load(), {'Game1': 2, 'Game2': 0})
+        self.assertEqual(store.history(), [])
+
+    def test_permissions(self):
+        """
+        Test rewritten files keep their permissions, and new ones follow
+        the umask.
+        """
+        umask = os.umask(0o027)
+        try:
+            stats.atomic_write(self.path, '{}')
+            self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o640)
+            os.chmod(self.path, 0o644)
+            stats.atomic_write(self.path, '{}')
+            self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o644)
+        finally:
+            os.umask(umask)
+
+
+class TestJournalStats(TestJSONStats):
+
+    def test_save_load(self):
+        """
+        Test picks are logged and the counts rebuilt from the log.
+        """
+        store = stats.JournalStats(self.path, compact_every=3)
+        self.assertEqual(store.load(), {})
+        store.save({'Game1': 1}, [('Game1', 1.0, 4)])
+        store.save({'Game1': 1, 'Game2': 1}, [('Game2', 2.0, 2)])
+        # Rebuild the counts from the snapshot and the log tail.
+        reloaded = stats.JournalStats(self.path, compact_every=3)
+        self.assertEqual(reloaded.load(), {'Game1': 1, 'Game2': 1})
+        self.assertEqual(reloaded.history(), [
+            {'game': 'Game1', 'time': 1.0, 'players': 4},
+            {'game': 'Game2', 'time': 2.0, 'players': 2}])
+
+    def test_compact(self):
+        """
+        Test the snapshot covers the log once compacted.
+        """
+        store = stats.JournalStats(self.path, compact_every=2)
+        store.load()
+        counts = {}
+        for i, game in enumerate(['Game1', 'Game2', 'Game1']):
+            counts[game] = counts.get(game, 0) + 1
+            store.save(dict(counts), [(game, float(i), 2)])
+        with open(store.snapshot_path) as f:
+            snapshot = json.load(f)
+        # The snapshot was taken after the second pick.
+        self.assertEqual(snapshot['stats'], {'Game1': 1, 'Game2': 1})
+        self.assertEqual(store.uncompacted, 1)
+        # Only the tail is replayed on top of the snapshot.
+        self.assertEqual(stats.JournalStats(self.path).load(), counts)
+        self.assertEqual(len(store.history()), 3)
+
+    def test_migrate(self):
+        """
+        Test existing JSON stats are picked up by the journal.
+        """
+        stats.JSONStats(self.path).save({'Game1': 5}, [])
+        store = stats.JournalStats(self.path)
+        self.assertEqual(store.load(), {'Game1': 5})
+        store.save({'Game1': 6}, [('Game1', 1.0, 4)])
+        self.assertEqual(stats.JournalStats(self.path).load(), {'Game1': 6})
+
+    def test_partial_record(self):
+        """
+        Test a half written record is dropped.
+        """
+        store = stats.JournalStats(self.path)
+        store.load()
+        store.save({'Game1': 1}, [('Game1', 1.0, 4)])
+        with open(store.log_path, 'a') as f:
+            f.write('{"game":"Ga')
+        reloaded = stats.JournalStats(self.path)
+        self.assertEqual(reloaded.load(), {'Game1': 1})
+        reloaded.save({'Game1': 2}, [('Game1', 2.0, 4)])
+        self.assertEqual(len(reloaded.history()), 2)
+
+
+class TestWriteBehind(unittest.TestCase):
+
+    def test_slow_save(self):
+        """
+        Test picks aren't held up by a save, and saves stay in order.
+        """
+        saving = threading.Event()
+        release = threading.Event()
+        saved = []
+
+        def save(picks):
+            saving.set()
+            release.wait()
+            saved.append([game for game, timestamp, players in picks])
+        write_behind = stats.WriteBehind(save, flush_every=None)
+        try:
+            write_behind.record('Game1', 2)
+            flush = threading.Thread(target=write_behind.flush)
+            flush.start()
+            saving.wait()
+            # Picks are noted while the first save is still going.
+            pick = threading.Thread(target=write_behind.record,
+                                    args=('Game2', 2))
+            pick.start()
+            pick.join(5)
+            self.assertFalse(pick.is_alive())
+            self.assertEqual(len(write_behind.pending_picks), 1)
+            # A second flush waits its turn behind the first.
+            second = threading.Thread(target=write_behind.flush)
+            second.start()
+            release.set()
+            flush.join()
+            second.join()
+            self.assertEqual(saved, [['Game1'], ['Game2']])
+        finally:
+            release.set()
+            write_behind.close()
+
+    def test_failed_save(self):
+        """
+        Test the picks of a save that fails are kept for the next one.
+        """
+        saved = []
+
+        def save(picks):
+            if not saved:
+                saved.append(None)
+                raise OSError('Disk full.')
+            saved.append([game for game, timestamp, players in picks])
+        write_behind = stats.WriteBehind(save, flush_every=None)
+        write_behind.record('Game1', 2)
+        with self.assertRaises(OSError):
+            write_behind.flush()
+        write_behind.record('Game2', 2)
+        write_behind.close()
+        self.assertEqual(saved, [None, ['Game1', 'Game2']])
+
+
+class TestConcurrentWriters(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a stats file in a temporary directory.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'games_stats.json')
+
+    def tearDown(self):
+        """
+        Clean up the temporary directory.
+        """
+        self.tmp.cleanup()
+
+    def stress(self, backend, workers=6, picks=40, **options):
+        """
+        Save picks from several processes at once and check none are lost.
+        """
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(write_picks, backend, self.path, picks, i,
+                                   **options)
+                       for i in range(workers)]
+            for future in futures:
+                future.result()
+        counts = stats.BACKENDS[backend](self.path).load()
+        self.assertEqual(sum(counts.values()), workers * picks)
+
+    def test_json(self):
+        """
+        Test JSON stats merge each process's picks.
+        """
+        self.stress('json')
+
+    def test_journal(self):
+        """
+        Test journal stats log every process's picks, including across
+        compactions.
+        """
+        self.stress('journal', compact_every=25)
+
+    def test_sqlite(self):
+        """
+        Test SQLite stats count every process's picks.
+        """
+        self.stress('sqlite')
+
+    def test_threads(self):
+        """
+        Test picks from several threads of a Randomizer are all saved.
+        """
+        from .. import app
+        from .test_app import TEST_DATA
+        with open('src/assets/unit_tests.json', 'w') as f:
+            json.dump(TEST_DATA, f, indent=4)
+        randomizer = app.Randomizer('unit_tests', flush_every=3,
+                                    stats_dir=self.tmp.name)
+
+        def picks():
+            for i in range(50):
+                randomizer.pick_game(2, None)
+        threads = [threading.Thread(target=picks) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        randomizer.flush()
+        self.assertEqual(sum(randomizer.game_stats.values()), 400)
+        self.assertEqual(randomizer.stats_store.load(),
+                         randomizer.game_stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import json
+import os
+import tempfile
+from .. import store
+from .. import stats
+from .test_app import TEST_DATA
+
+
+class TestSQLiteStore(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a store in a temporary directory with the test games.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.tmp.name, 'unit_tests.json')
+        with open(self.json_path, 'w') as f:
+            json.dump(TEST_DATA, f, indent=4)
+        self.store = store.SQLiteStore(os.path.join(self.tmp.name, 'games.db'))
+
+    def tearDown(self):
+        """
+        Close the store and clean up the temporary directory.
+        """
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_import_export(self):
+        """
+        Test a games JSON file survives an import and export.
+        """
+        self.assertTrue(self.store.sync(self.json_path))
+        self.assertEqual(self.store.export_json(), TEST_DATA)
+        # An unchanged file isn't imported again.
+        self.assertFalse(self.store.sync(self.json_path))
+
+    def test_games_query(self):
+        """
+        Test filtering the games by players and pack.
+        """
+        self.store.sync(self.json_path)
+        self.assertEqual([g for g, info in self.store.games(players=3)],
+                         ['Game1'])
+        self.assertEqual([g for g, info in self.store.games(pack='Pack2')],
+                         ['Game2'])
+        table = store.GameTable(self.store)
+        self.assertEqual(len(table), 2)
+        self.assertIn('Game1', table)
+        self.assertEqual(table['Game2'], TEST_DATA['Games']['Game2'])
+        self.assertRaises(KeyError, table.__getitem__, 'Game3')
+
+    def test_player_ranges(self):
+        """
+        Test games are only listed for player counts in their range, the
+        optional fields are kept, and older databases get the new columns.
+        """
+        data = {'Games': {'Game3': {'min_players': 3, 'max_players': 6,
+                                    'weight': 1, 'tags': ['drawing'],
+                                    'duration': 20}},
+                'Settings': {}}
+        self.store.import_json(data)
+        self.assertEqual([g for g, info in self.store.games(players=2)], [])
+        info = self.store.game('Game3')
+        self.assertEqual(info['min_players'], 3)
+        self.assertEqual(info['tags'], ['drawing'])
+        self.assertEqual(info['duration'], 20)
+        # Drop the column as a database from before it was added.
+        self.store.sync(self.json_path)
+        self.store.db.executescript('ALTER TABLE games DROP COLUMN '
+                                    'duration')
+        self.store.upgrade()
+        # The games are imported again to fill it in.
+        self.assertTrue(self.store.sync(self.json_path))
+        self.assertEqual(self.store.game('Game1'),
+                         TEST_DATA['Games']['Game1'])
+
+    def test_extra_fields(self):
+        """
+        Test fields without a column of their own are kept.
+        """
+        data = json.loads(json.dumps(TEST_DATA))
+        data['Games']['Game1']['url'] = 'https://example.com/game1'
+        data['Games']['Game1']['extras'] = {'rating': 5}
+        self.store.import_json(data)
+        self.assertEqual(self.store.game('Game1'), data['Games']['Game1'])
+        self.assertEqual(self.store.game('Game2'), data['Games']['Game2'])
+        self.assertEqual(self.store.export_json(), data)
+
+    def test_add_picks(self):
+        """
+        Test picks add to the play counts.
+        """
+        self.store.set_stats({'Game1': 2})
+        self.store.add_picks(['Game1', 'Game2', 'Game2'])
+        self.assertEqual(self.store.stats(), {'Game1': 3, 'Game2': 2})
+
+
+class TestSQLiteStats(unittest.TestCase):
+
+    def test_migrate(self):
+        """
+        Test existing JSON stats are copied into the database.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'unit_tests_stats.json')
+            stats.JSONStats(path).save({'Game1': 4}, [])
+            backend = stats.SQLiteStats(path)
+            self.assertEqual(backend.load(), {'Game1': 4})
+            backend.save({}, [('Game1', 1.0, 2)])
+            self.assertEqual(backend.store.stats(), {'Game1': 5})
+            backend.store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+import json
+import random
+import tempfile
+from .. import app
+from .. import strategies
+from ..index import PlayerIndex, player_range
+from .test_app import TEST_DATA
+
+
+class TestStrategies(unittest.TestCase):
+
+    def test_player_index(self):
+        """
+        Test the games for a player count are counted from the index.
+        """
+        index = PlayerIndex([4, 3, 3, 2])
+        self.assertEqual(index.eligible_count(2), 4)
+        self.assertEqual(index.eligible_count(3), 3)
+        self.assertEqual(index.eligible_count(5), 0)
+        with self.assertRaises(ValueError):
+            PlayerIndex([2, 4])
+
+    def test_player_ranges(self):
+        """
+        Test games needing more players are left out of smaller counts.
+        """
+        index = PlayerIndex([6, 5, 4, 2], [3, 1, 2, 1])
+        self.assertEqual(list(index.eligible(2)), [1, 2, 3])
+        self.assertEqual(index.eligible(3), range(3))
+        self.assertEqual(list(index.eligible(1)), [1, 3])
+        self.assertEqual(index.eligible_count(7), 0)
+        self.assertEqual(index.player_counts(), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(player_range({'players': 4}), (1, 4))
+        self.assertEqual(player_range({'min_players': 2, 'max_players': 5}),
+                         (2, 5))
+
+    def test_ranges_no_repeats(self):
+        """
+        Test every strategy only picks games in range, and the ones without
+        repeats play every eligible game first.
+        """
+        index = PlayerIndex([6, 5, 4, 2], [3, 1, 2, 1])
+        for name, strategy in strategies.STRATEGIES.items():
+            policy = strategy(index, [1, 2, 1, 1], [0, 2, 1, 0],
+                              rng=random.Random(1))
+            picks = []
+            for player_count in [2, 2, 2, 6, 2, 2, 2, 3, 1, 1]:
+                picks.append(policy.pick(player_count))
+                self.assertIn(picks[-1], index.eligible(player_count))
+                if 'occurrences' in policy.UPDATES:
+                    policy.occurred(picks[-1])
+            if name != 'recent_decay':
+                self.assertEqual(sorted(picks[:3]), [1, 2, 3])
+
+    def test_round_robin(self):
+        """
+        Test every eligible game is played once per round.
+        """
+        policy = strategies.RoundRobin(PlayerIndex([4, 3, 2]), [1, 1, 1],
+                                       [0, 0, 0], rng=random.Random(1))
+        picks = [policy.pick(3) for i in range(6)]
+        for i in range(0, 6, 2):
+            self.assertEqual(sorted(picks[i:i + 2]), [0, 1])
+
+    def test_no_repeats(self):
+        """
+        Test the strategies without repeats play every game first.
+        """
+        for strategy in ['reverse_occurrence', 'pure_weight', 'uniform']:
+            policy = strategies.STRATEGIES[strategy](
+                PlayerIndex([4, 4, 4]), [1, 0.5, 2], [3, 0, 1],
+                rng=random.Random(1))
+            picks = []
+            for i in range(9):
+                picks.append(policy.pick(2))
+                if 'occurrences' in policy.UPDATES:
+                    policy.occurred(picks[-1])
+            for i in range(0, 9, 3):
+                self.assertEqual(sorted(picks[i:i + 3]), [0, 1, 2])
+
+    def test_uniform(self):
+        """
+        Test the uniform pool follows player count changes and played
+        games.
+        """
+        policy = strategies.Uniform(PlayerIndex([4, 3, 2, 2]), [1] * 4,
+                                    [0] * 4, rng=random.Random(1))
+        policy.set_played([0])
+        self.assertEqual(policy.pick(4), 0)
+        self.assertEqual(sorted(policy.pick(2) for i in range(3)),
+                         [1, 2, 3])
+        with self.assertRaises(IndexError):
+            policy.pick(5)
+
+    def test_reset(self):
+        """
+        Test the games played before a reset can be picked straight after
+        it, with every strategy leaving played games out.
+        """
+        index = PlayerIndex([4, 4, 4])
+        for name, strategy in strategies.STRATEGIES.items():
+            # Recent games fade back in rather than being left out.
+            if name == 'recent_decay':
+                continue
+            repeats = 0
+            for seed in range(300):
+                policy = strategy(index, [1, 1, 1], [0, 0, 0],
+                                  rng=random.Random(seed))
+                first = policy.pick(2)
+                policy.reset()
+                self.assertEqual(policy.played, set())
+                repeats += policy.pick(2) == first
+            # A third of the picks with no games left out.
+            self.assertGreater(repeats, 50, name)
+
+    def test_recent_decay(self):
+        """
+        Test a game is rarely picked twice in a row.
+        """
+        policy = strategies.RecentDecay(PlayerIndex([4] * 5), [1] * 5,
+                                        [0] * 5, rng=random.Random(1))
+        picks = [policy.pick(2) for i in range(2000)]
+        repeats = sum(1 for a, b in zip(picks, picks[1:]) if a == b)
+        # Uniform picks would repeat a fifth of the time.
+        self.assertLess(repeats / 2000, 0.1)
+
+    def test_randomizer_strategy(self):
+        """
+        Test the Randomizer picks with the strategy it's given.
+        """
+        with open('src/assets/unit_tests.json', 'w') as f:
+            json.dump(TEST_DATA, f, indent=4)
+        with tempfile.TemporaryDirectory() as tmp:
+            randomizer = app.Randomizer('unit_tests', flush_every=None,
+                                        stats_dir=tmp, strategy='uniform')
+            self.assertIsInstance(randomizer.strategy, strategies.Uniform)
+            picks = {randomizer.pick_game(2, None)[0] for i in range(2)}
+            self.assertEqual(picks, {'Game1', 'Game2'})
+            self.assertEqual(randomizer.played_games, {'Game1', 'Game2'})
+            # Stats are kept whatever the strategy.
+            self.assertEqual(randomizer.game_stats, {'Game1': 1, 'Game2': 1})
+            self.assertEqual(randomizer.max_occurrence, 1)
+            # Strategies can be given as classes too.
+            randomizer = app.Randomizer('unit_tests', flush_every=None,
+                                        stats_dir=tmp,
+                                        strategy=strategies.RoundRobin)
+            self.assertEqual(randomizer.pick_game(4, None)[0], 'Game1')
+
+    def test_reset_played(self):
+        """
+        Test Randomizer.reset_played() lets every strategy leaving played
+        games out pick them again.
+        """
+        with open('src/assets/unit_tests.json', 'w') as f:
+            json.dump(TEST_DATA, f, indent=4)
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in strategies.STRATEGIES:
+                if name == 'recent_decay':
+                    continue
+                randomizer = app.Randomizer('unit_tests', flush_every=None,
+                                            stats_dir=tmp, strategy=name)
+                randomizer.strategy.rng = random.Random(1)
+                repeats = 0
+                for i in range(100):
+                    first = randomizer.pick_game(2, None)[0]
+                    randomizer.reset_played()
+                    self.assertEqual(randomizer.played_games, set())
+                    repeats += randomizer.pick_game(2, None)[0] == first
+                    randomizer.reset_played()
+                self.assertGreater(repeats, 10, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
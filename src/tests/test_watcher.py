@@ -0,0 +1,242 @@
+import unittest
+import json
+import os
+import tempfile
+import threading
+from .. import app
+from .. import watcher
+from .test_app import TEST_DATA
+
+
+class TestCatalogWatcher(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a randomizer over the test games with its own stats and a
+        watcher on its games list.
+        """
+        self.data = json.loads(json.dumps(TEST_DATA))
+        self.write()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.randomizer = app.Randomizer('unit_tests', flush_every=None,
+                                         stats_dir=self.tmp.name)
+        self.watcher = watcher.CatalogWatcher(self.randomizer)
+
+    def tearDown(self):
+        self.data = TEST_DATA
+        self.write()
+        self.tmp.cleanup()
+
+    def write(self, text=None):
+        """
+        Write the games list, moving its time on so every edit is seen.
+        """
+        path = 'src/assets/unit_tests.json'
+        mtime = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+        with open(path, 'w') as f:
+            if text is None:
+                json.dump(self.data, f, indent=4)
+            else:
+                f.write(text)
+        os.utime(path, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+
+    def test_unchanged(self):
+        """
+        Test nothing is reloaded until the file changes.
+        """
+        self.assertIsNone(self.watcher.check())
+        self.data['Games']['Game1']['description'] = 'Edited.'
+        self.write()
+        self.assertEqual(self.watcher.check(), ([], [], ['Game1']))
+        self.assertIsNone(self.watcher.check())
+
+    def test_edit(self):
+        """
+        Test edits to the descriptions keep the pick index.
+        """
+        index = self.randomizer.index
+        self.randomizer.pick_game(3, None)
+        self.data['Games']['Game2']['description'] = 'Edited.'
+        self.write()
+        self.watcher.check()
+        self.assertIs(self.randomizer.index, index)
+        self.assertEqual(self.randomizer.games_list()['Game2']['description'],
+                         'Edited.')
+        self.assertEqual(self.randomizer.view_stats(),
+                         {'Game1': 1, 'Game2': 0})
+
+    def test_add_remove(self):
+        """
+        Test added games can be picked and removed games can't, keeping
+        the stats and the games played.
+        """
+        self.randomizer.pick_game(3, None)
+        self.data['Games']['Game3'] = {'pack': 'Pack3', 'players': 6,
+                                       'description': 'New.',
+                                       'image': 'Game3.png', 'weight': 1}
+        del self.data['Games']['Game2']
+        self.write()
+        self.assertEqual(self.watcher.check(), (['Game3'], ['Game2'], []))
+        self.assertEqual(self.randomizer.eligible_games(2),
+                         ['Game3', 'Game1'])
+        self.assertEqual(self.randomizer.eligible_games(6), ['Game3'])
+        self.assertEqual(self.randomizer.view_stats(),
+                         {'Game1': 1, 'Game2': 0, 'Game3': 0})
+        self.assertEqual(self.randomizer.played_games, {'Game1'})
+        self.assertEqual(self.randomizer.pick_game(2, None)[0], 'Game3')
+
+    def test_players_changed(self):
+        """
+        Test changing a game's players rebuilds the pick index.
+        """
+        self.data['Games']['Game2']['players'] = 8
+        self.write()
+        self.watcher.check()
+        self.assertEqual(self.randomizer.eligible_games(8), ['Game2'])
+
+    def test_bad_file(self):
+        """
+        Test a file that can't be parsed keeps the old games until it's
+        fixed.
+        """
+        self.write('{"Games": {"Game1": ')
+        self.assertIsNone(self.watcher.check())
+        self.assertEqual(sorted(self.randomizer.games_list()),
+                         ['Game1', 'Game2'])
+        self.data['Games']['Game2']['weight'] = 3
+        self.write()
+        self.assertEqual(self.watcher.check(), ([], [], ['Game2']))
+
+    def test_missing_file(self):
+        """
+        Test a file missing while it's saved keeps the old games, and the
+        background thread reloads it once it's back.
+        """
+        reloaded = threading.Event()
+        missing = threading.Event()
+        load_info = self.randomizer.load_info
+
+        def load_missing(games):
+            # Gone between the poll and the load, as in a save by rename.
+            self.randomizer.load_info = load_info
+            os.remove(self.randomizer.json_path)
+            missing.set()
+            return load_info(games)
+        self.randomizer.load_info = load_missing
+        background = self.randomizer.watch(0.01, lambda changes:
+                                           reloaded.set())
+        try:
+            self.data['Games']['Game1']['description'] = 'Edited.'
+            self.write()
+            self.assertTrue(missing.wait(5))
+            self.assertEqual(sorted(self.randomizer.games_list()),
+                             ['Game1', 'Game2'])
+            self.assertFalse(reloaded.is_set())
+            self.write()
+            self.assertTrue(reloaded.wait(5))
+            self.assertEqual(
+                self.randomizer.games_list()['Game1']['description'],
+                'Edited.')
+        finally:
+            background.stop()
+
+    def test_rebuild_unlocked(self):
+        """
+        Test the pick index is rebuilt without holding the pick lock, and
+        picks made meanwhile are kept.
+        """
+        index_games = self.randomizer.index_games
+
+        def build(games, snapshot):
+            self.assertFalse(self.randomizer.pick_lock.locked())
+            self.randomizer.pick_game(3, None)
+            return index_games(games, snapshot)
+        self.randomizer.index_games = build
+        self.data['Games']['Game2']['players'] = 8
+        self.write()
+        self.assertEqual(self.randomizer.reload(), ([], [], ['Game2']))
+        strategy = self.randomizer.strategy
+        game_id = self.randomizer.game_ids['Game1']
+        self.assertEqual(self.randomizer.view_stats()['Game1'], 1)
+        self.assertEqual(strategy.sampler.occurrences[game_id], 1)
+        self.assertEqual(self.randomizer.played_games, {'Game1'})
+
+    def test_background(self):
+        """
+        Test the background thread reloads the games while picks go on.
+        """
+        reloaded = threading.Event()
+        background = self.randomizer.watch(0.01, lambda changes:
+                                           reloaded.set())
+        try:
+            self.data['Games']['Game3'] = {'pack': 'Pack3', 'players': 2,
+                                           'description': 'New.',
+                                           'image': 'Game3.png',
+                                           'weight': 1}
+            self.write()
+            while not reloaded.is_set():
+                self.randomizer.reset_played()
+                game, info = self.randomizer.pick_game(2, None)
+                self.assertIn(game, self.randomizer.games_list())
+            self.assertIn('Game3', self.randomizer.eligible_games(2))
+        finally:
+            background.stop()
+
+    def test_reads_during_reload(self):
+        """
+        Test reads running alongside reloads always see one version of the
+        games, never a mix of the old and new.
+        """
+        more = json.loads(json.dumps(TEST_DATA))
+        for i in range(3, 40):
+            more['Games']['Game%s' % (i)] = {
+                'pack': 'Pack%s' % (i), 'players': i % 6 + 2,
+                'min_players': 2, 'description': 'New.',
+                'image': 'Game%s.png' % (i), 'weight': i % 3 + 1}
+        texts = [json.dumps(TEST_DATA), json.dumps(more)]
+        # Every game supports 2 players in both versions.
+        versions = [set(TEST_DATA['Games']), set(more['Games'])]
+        errors = []
+
+        def reload():
+            try:
+                for i in range(40):
+                    self.write(texts[i % 2])
+                    self.randomizer.reload()
+            except Exception as e:
+                errors.append(e)
+        background = threading.Thread(target=reload)
+        background.start()
+        try:
+            while background.is_alive():
+                self.assertIn(set(self.randomizer.snapshot_games(2)),
+                              versions)
+                self.assertIn(set(self.randomizer.snapshot_games()),
+                              versions)
+                self.assertIn(set(self.randomizer.eligible_games(2)),
+                              versions)
+                self.assertIn(set(self.randomizer.games_list()), versions)
+                self.assertIn(max(self.randomizer.player_counts()), (4, 7))
+                self.randomizer.reset_played()
+                game, info = self.randomizer.pick_game(2, None)
+                self.assertEqual(info['image'], game + '.png')
+                self.assertIn(game, self.randomizer.view_stats())
+        finally:
+            background.join()
+        self.assertEqual(errors, [])
+
+    def test_sqlite(self):
+        """
+        Test reloading games kept by the SQLite backend.
+        """
+        randomizer = app.Randomizer('unit_tests', flush_every=None,
+                                    stats_dir=self.tmp.name,
+                                    stats_backend='sqlite')
+        self.data['Games']['Game1']['pack'] = 'Pack2'
+        self.write()
+        self.assertEqual(randomizer.reload(), ([], [], ['Game1']))
+        self.assertEqual(randomizer.games_list()['Game1']['pack'], 'Pack2')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Watch a games JSON file and reload the games into a Randomizer when it
+changes, so edits show up without restarting.
+
+The file is polled for a new modification time or size, which works the
+same on every platform and costs one stat per poll.
+"""
+import os
+import threading
+from .index import player_range
+
+
+def diff_games(old, new):
+    """
+    Returns the names of the games added to, removed from and changed
+    between two games lists, each sorted.
+    """
+    added = sorted(g for g in new.keys() if g not in old)
+    removed = sorted(g for g in old.keys() if g not in new)
+    changed = sorted(g for g, info in new.items()
+                     if g in old and dict(old[g]) != dict(info))
+    return added, removed, changed
+
+
+def index_changed(old, new, games):
+    """
+    Returns whether any of the games changed player range or weight
+    between two games lists, so the pick index needs rebuilding.
+    """
+    for g in games:
+        if player_range(old[g]) != player_range(new[g]) or \
+                old[g].get('weight') != new[g].get('weight'):
+            return True
+    return False
+
+
+class CatalogWatcher(object):
+    """
+    Polls a Randomizer's games JSON file, reloading the games whenever it
+    changes.
+
+    check() polls once, for apps with their own loop such as the GUI, or
+    start() polls on a background thread every interval seconds.
+    """
+    def __init__(self, randomizer, interval=1.0, on_reload=None):
+        """
+        Set the randomizer to reload and how often to poll. on_reload is
+        called with the (added, removed, changed) games after each reload.
+        """
+        self.randomizer = randomizer
+        self.interval = interval
+        self.on_reload = on_reload
+        self.signature = self.file_signature()
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def file_signature(self):
+        """
+        Returns the modification time and size of the JSON file, or None
+        if it can't be read.
+        """
+        try:
+            stat = os.stat(self.randomizer.json_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self):
+        """
+        Reload the games if the file has changed since the last check.
+        Returns the (added, removed, changed) games, or None if it hasn't
+        changed or couldn't be loaded.
+        """
+        signature = self.file_signature()
+        if signature is None or signature == self.signature:
+            return None
+        try:
+            changes = self.randomizer.reload()
+        except (ValueError, KeyError, OSError) as e:
+            # Likely caught part way through being saved, or missing while
+            # an editor saves by renaming, so keep the games we have and
+            # try again next time.
+            if self.randomizer.verbose:
+                print(f'Not reloading { self.randomizer.json_path }: { e }')
+            return None
+        self.signature = signature
+        if self.on_reload is not None:
+            self.on_reload(changes)
+        return changes
+
+    def run(self):
+        """
+        Poll until stopped.
+        """
+        while not self.stopped.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """
+        Start polling on a background thread.
+        """
+        if self.thread is None:
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread.
+        """
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self.thread = None